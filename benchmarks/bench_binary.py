@@ -0,0 +1,73 @@
+"""
+Compare BinaryDB with an exact FaissDB index on memory, recall and speed.
+
+The corpus is drawn around random cluster centres, closer to real
+embeddings than plain Gaussian noise. Recall@k is measured against the
+exact cosine top-k for several rescore factors.
+
+Usage:
+
+    python benchmarks/bench_binary.py --size 200000 --dimension 384
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from rago.augmented.db import BinaryDB, FaissDB
+
+
+def main() -> None:
+    """Run the benchmark for every rescore factor."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=200_000)
+    parser.add_argument('--queries', type=int, default=256)
+    parser.add_argument('--dimension', type=int, default=384)
+    parser.add_argument('--clusters', type=int, default=1_000)
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument(
+        '--rescore-factors', type=int, nargs='+', default=[1, 4, 10, 40]
+    )
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centres = rng.standard_normal((args.clusters, args.dimension), 'float32')
+    labels = rng.integers(args.clusters, size=args.size + args.queries)
+    points = centres[labels] + 0.5 * rng.standard_normal(
+        (len(labels), args.dimension), np.float32
+    )
+    corpus, queries = points[: args.size], points[args.size :]
+
+    exact = FaissDB(metric='cosine')
+    exact.embed(corpus)
+    start = time.perf_counter()
+    expected = exact.search_many(queries, top_k=args.top_k)
+    exact_ms = 1000 * (time.perf_counter() - start)
+    float_mb = corpus.nbytes / 2**20
+    print(f'faiss flat       {float_mb:8.1f} MB  {exact_ms:8.1f} ms')
+
+    db = BinaryDB()
+    db.embed(corpus)
+    binary_mb = db.index.ntotal * db.index.code_size / 2**20
+    for factor in args.rescore_factors:
+        db.rescore_factor = factor
+        start = time.perf_counter()
+        results = db.search_many(queries, top_k=args.top_k)
+        elapsed = 1000 * (time.perf_counter() - start)
+        recall = np.mean(
+            [
+                len(set(ids) & set(expected_ids)) / args.top_k
+                for (_, ids), (_, expected_ids) in zip(results, expected)
+            ]
+        )
+        print(
+            f'binary x{factor:<7} {binary_mb:8.1f} MB  {elapsed:8.1f} ms  '
+            f'recall@{args.top_k} {recall:.3f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
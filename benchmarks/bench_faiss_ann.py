@@ -0,0 +1,102 @@
+"""
+Benchmark approximate FaissDB index types against the exact baseline.
+
+Builds every index from the same synthetic clustered corpus and reports
+build time, queries per second and recall@k against `IndexFlatL2`.
+
+Usage:
+
+    python benchmarks/bench_faiss_ann.py --size 200000 --dimension 128
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from rago.augmented.db import FaissDB
+
+FACTORIES = [
+    ('IVF1024,Flat', {'nprobe': 16}),
+    ('IVF1024,PQ32', {'nprobe': 16}),
+    ('HNSW32', {'ef_search': 64}),
+    ('OPQ32,IVF1024,PQ32,RFlat', {'nprobe': 16, 'k_factor': 4}),
+]
+
+
+def make_corpus(
+    size: int, queries: int, dimension: int, seed: int = 0
+) -> tuple[np.ndarray, np.ndarray]:
+    """Sample corpus and query vectors around random cluster centers."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((256, dimension), dtype=np.float32)
+    labels = rng.integers(0, len(centers), size + queries)
+    noise = rng.standard_normal((size + queries, dimension), dtype=np.float32)
+    data = centers[labels] + 0.5 * noise
+    return data[:size], data[size:]
+
+
+def search_all(db: FaissDB, queries: np.ndarray, top_k: int) -> np.ndarray:
+    """Search every query with the public FaissDB API."""
+    return np.stack(
+        [
+            np.asarray(db.search(queries[i : i + 1], top_k=top_k)[1])
+            for i in range(len(queries))
+        ]
+    )
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    """Return the mean fraction of true neighbours that were found."""
+    hits = sum(
+        len(np.intersect1d(row, expected))
+        for row, expected in zip(found, truth)
+    )
+    return hits / truth.size
+
+
+def run(
+    factory: str,
+    params: dict[str, int],
+    corpus: np.ndarray,
+    queries: np.ndarray,
+    top_k: int,
+    truth: np.ndarray | None,
+) -> np.ndarray:
+    """Build one index, search it and print its figures."""
+    db = FaissDB(index_factory=factory, **params)
+    start = time.perf_counter()
+    db.embed(corpus)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    found = search_all(db, queries, top_k)
+    qps = len(queries) / (time.perf_counter() - start)
+
+    recall = recall_at_k(found, truth) if truth is not None else 1.0
+    print(
+        f'{factory:<28} build {build:7.2f}s  {qps:9.0f} QPS  '
+        f'recall@{top_k} {recall:.3f}'
+    )
+    return found
+
+
+def main() -> None:
+    """Run the benchmark for every configured index factory."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=200_000)
+    parser.add_argument('--queries', type=int, default=1_000)
+    parser.add_argument('--dimension', type=int, default=128)
+    parser.add_argument('--top-k', type=int, default=10)
+    args = parser.parse_args()
+
+    corpus, queries = make_corpus(args.size, args.queries, args.dimension)
+    truth = run('Flat', {}, corpus, queries, args.top_k, None)
+    for factory, params in FACTORIES:
+        run(factory, params, corpus, queries, args.top_k, truth)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Compare the brute-force NumpyDB backend with exact FaissDB indexes.
+
+Reports the cold import time of each backend module, the time to build
+the index and the throughput of batched searches over the same corpus.
+
+Usage:
+
+    python benchmarks/bench_numpy_db.py --size 100000 --dimension 384
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from rago.augmented.db import DBBase, FaissDB, NumpyDB
+
+
+def import_time(module: str) -> float:
+    """Return the seconds a fresh interpreter needs to import `module`."""
+    code = (
+        'import time; start = time.perf_counter(); '
+        f'import {module}; print(time.perf_counter() - start)'
+    )
+    output = subprocess.check_output([sys.executable, '-c', code], text=True)
+    return float(output)
+
+
+def run(
+    name: str,
+    module: str,
+    db: DBBase,
+    corpus: np.ndarray,
+    queries: np.ndarray,
+    top_k: int,
+) -> None:
+    """Build one backend, search it and print its figures."""
+    start = time.perf_counter()
+    db.embed(corpus)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    db.search_many(queries, top_k=top_k)
+    qps = len(queries) / (time.perf_counter() - start)
+
+    print(
+        f'{name:<16} import {import_time(module):6.3f}s  '
+        f'build {build:6.3f}s  {qps:9.0f} QPS'
+    )
+
+
+def main() -> None:
+    """Run the benchmark for both backends."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=100_000)
+    parser.add_argument('--queries', type=int, default=256)
+    parser.add_argument('--dimension', type=int, default=384)
+    parser.add_argument('--top-k', type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    corpus = rng.standard_normal((args.size, args.dimension), np.float32)
+    queries = rng.standard_normal((args.queries, args.dimension), np.float32)
+
+    run(
+        'numpy float32',
+        'rago.augmented.db.numpy',
+        NumpyDB(),
+        corpus,
+        queries,
+        args.top_k,
+    )
+    run(
+        'numpy float16',
+        'rago.augmented.db.numpy',
+        NumpyDB(dtype='float16'),
+        corpus,
+        queries,
+        args.top_k,
+    )
+    run(
+        'numpy int8',
+        'rago.augmented.db.numpy',
+        NumpyDB(dtype='int8'),
+        corpus,
+        queries,
+        args.top_k,
+    )
+    run(
+        'faiss Flat',
+        'rago.augmented.db.faiss',
+        FaissDB(),
+        corpus,
+        queries,
+        args.top_k,
+    )
+    run(
+        'faiss SQfp16',
+        'rago.augmented.db.faiss',
+        FaissDB(dtype='float16'),
+        corpus,
+        queries,
+        args.top_k,
+    )
+    run(
+        'faiss SQ8',
+        'rago.augmented.db.faiss',
+        FaissDB(dtype='int8'),
+        corpus,
+        queries,
+        args.top_k,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Measure on-disk IVF search latency under several memory budgets.
+
+The inverted lists are written to a file in a temporary directory; only
+the coarse centroids and the lists cached within the budget stay in
+memory. Latency is reported per query batch, after a warm-up batch.
+
+Usage:
+
+    python benchmarks/bench_ondisk.py --size 1000000 --budgets 16 64 256
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+
+from pathlib import Path
+
+import numpy as np
+
+from rago.augmented.db import FaissDB
+
+
+def main() -> None:
+    """Run the benchmark for every memory budget (in MiB)."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=1_000_000)
+    parser.add_argument('--queries', type=int, default=64)
+    parser.add_argument('--dimension', type=int, default=128)
+    parser.add_argument('--nlist', type=int, default=1024)
+    parser.add_argument('--nprobe', type=int, default=16)
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budgets', type=int, nargs='+', default=[16, 256])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    corpus = rng.standard_normal((args.size, args.dimension), np.float32)
+    queries = rng.standard_normal((args.queries, args.dimension), np.float32)
+    print(f'{corpus.nbytes / 2**20:.0f} MiB of vectors')
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db = FaissDB(
+            index_factory=f'IVF{args.nlist},Flat',
+            nprobe=args.nprobe,
+            on_disk=Path(temp_dir) / 'lists.ivf',
+        )
+        db.embed(corpus)
+        lists = db._lists
+        assert lists is not None
+        for budget in args.budgets:
+            lists.budget = budget * 2**20
+            lists.clear()
+            db.search_many(queries, top_k=args.top_k)
+
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                db.search_many(queries, top_k=args.top_k)
+                timings.append(time.perf_counter() - start)
+            print(
+                f'{budget:>6} MiB budget  '
+                f'{1000 * min(timings):8.1f} ms per {args.queries} queries  '
+                f'{lists.nbytes / 2**20:6.1f} MiB cached'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Compare sentence-transformer encoding on PyTorch and ONNX Runtime.
+
+Reports documents per second on CPU for the PyTorch runtime, ONNX Runtime
+and ONNX Runtime with dynamic int8 quantization, and the lowest cosine
+similarity of each runtime's embeddings to the PyTorch ones.
+
+Usage:
+
+    python benchmarks/bench_onnx.py --documents 2000 --threads 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+import torch
+
+from rago.augmented.sentence_transformer import SentenceTransformerAug
+
+WORDS = (
+    'vector search retrieval augmented generation embedding index query '
+    'document chunk model token batch latency throughput memory cache'
+).split()
+
+
+def main() -> None:
+    """Run the benchmark for every runtime."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--model', default='paraphrase-MiniLM-L12-v2')
+    parser.add_argument('--documents', type=int, default=2_000)
+    parser.add_argument('--words', type=int, default=64)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--threads', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    rng = np.random.default_rng(0)
+    documents = [
+        ' '.join(rng.choice(WORDS, size=args.words))
+        for _ in range(args.documents)
+    ]
+
+    reference = None
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for name, options in (
+            ('torch', {}),
+            ('onnx', {'runtime': 'onnx'}),
+            ('onnx-int8', {'runtime': 'onnx', 'quantize': True}),
+        ):
+            aug = SentenceTransformerAug(
+                model_name=args.model,
+                batch_size=args.batch_size,
+                onnx_cache_dir=cache_dir,
+                **options,
+            )
+            aug.get_embedding(documents[: args.batch_size])  # warm up
+            start = time.perf_counter()
+            vectors = np.asarray(aug.get_embedding(documents))
+            elapsed = time.perf_counter() - start
+            if reference is None:
+                reference = vectors
+            cosine = np.sum(reference * vectors, axis=1) / (
+                np.linalg.norm(reference, axis=1)
+                * np.linalg.norm(vectors, axis=1)
+            )
+            print(
+                f'{name:>10}: {args.documents / elapsed:8.1f} docs/s, '
+                f'min cosine to torch {cosine.min():.5f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
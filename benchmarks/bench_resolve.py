@@ -0,0 +1,95 @@
+"""
+Benchmark per-query latency of the `Augmented` wrapper.
+
+The concrete backend is replaced by a mocked sentence-transformer whose
+model load sleeps for `--load-ms`, so the numbers isolate the cost of
+rebuilding the backend on every query ("before") versus reusing the
+resolved instance ("after").
+
+Usage:
+
+    python benchmarks/bench_resolve.py --queries 50 --load-ms 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from typing import Any
+from unittest import mock
+
+import numpy as np
+
+from rago.augmented import Augmented
+from rago.augmented.base import AugmentedBase, EmbeddingType
+
+DIMENSION = 64
+
+
+class MockedSentenceTransformerAug(AugmentedBase):
+    """Augmenter that simulates a slow model load and a fast encode."""
+
+    load_seconds = 0.0
+
+    def _setup(self) -> None:
+        time.sleep(self.load_seconds)
+        self.model = np.random.default_rng(0).standard_normal(
+            (256, DIMENSION), dtype=np.float32
+        )
+
+    def get_embedding(self, content: list[str]) -> EmbeddingType:
+        """Embed texts with a hashed bag of bytes."""
+        model = np.asarray(self.model)
+        result = np.zeros((len(content), DIMENSION), dtype=np.float32)
+        for row, text in enumerate(content):
+            codes = np.frombuffer(text.encode('utf-8'), dtype=np.uint8)
+            result[row] = model[codes].sum(axis=0)
+        return result
+
+    def search(self, query: str, documents: Any, top_k: int = 0) -> list[str]:
+        """Search the documents for the query."""
+        self.db.embed(self.get_embedding(documents))
+        _, indices = self.db.search(self.get_embedding([query]), top_k)
+        return self._resolve_retrieved_docs(documents, indices)
+
+
+def _run(
+    aug: Augmented, documents: list[str], queries: int, reuse: bool
+) -> float:
+    latencies = []
+    for i in range(queries):
+        if not reuse:
+            aug._instance = None
+        start = time.perf_counter()
+        aug.search(f'query {i}', documents, top_k=3)
+        latencies.append(time.perf_counter() - start)
+    return float(np.median(latencies) * 1000)
+
+
+def main() -> None:
+    """Run the benchmark and print the median per-query latency."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--documents', type=int, default=1000)
+    parser.add_argument('--load-ms', type=float, default=200.0)
+    args = parser.parse_args()
+
+    MockedSentenceTransformerAug.load_seconds = args.load_ms / 1000
+    documents = [f'document number {i}' for i in range(args.documents)]
+
+    with mock.patch(
+        'rago.augmented.sentence_transformer.SentenceTransformerAug',
+        MockedSentenceTransformerAug,
+    ):
+        aug = Augmented(backend='sentence_transformers')
+        before = _run(aug, documents, args.queries, reuse=False)
+        after = _run(aug, documents, args.queries, reuse=True)
+
+    print(f'queries: {args.queries}, documents: {args.documents}')
+    print(f'rebuild per query (before): {before:8.2f} ms/query')
+    print(f'reused instance   (after):  {after:8.2f} ms/query')
+
+
+if __name__ == '__main__':
+    main()
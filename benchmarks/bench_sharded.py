@@ -0,0 +1,56 @@
+"""
+Measure how search latency changes with the number of ShardedDB shards.
+
+Every configuration indexes the same random corpus and answers the same
+query batch; with enough cores, latency should drop as shards are added.
+
+Usage:
+
+    python benchmarks/bench_sharded.py --size 1000000 --shards 1 2 4 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from rago.augmented.db import ShardedDB
+
+
+def main() -> None:
+    """Run the benchmark for every shard count."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=1_000_000)
+    parser.add_argument('--queries', type=int, default=64)
+    parser.add_argument('--dimension', type=int, default=128)
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    corpus = rng.standard_normal((args.size, args.dimension), np.float32)
+    queries = rng.standard_normal((args.queries, args.dimension), np.float32)
+
+    print(f'{os.cpu_count()} CPUs, {args.size} vectors')
+    for num_shards in args.shards:
+        db = ShardedDB(num_shards=num_shards)
+        db.embed(corpus)
+        db.search_many(queries, top_k=args.top_k)
+
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            db.search_many(queries, top_k=args.top_k)
+            timings.append(time.perf_counter() - start)
+        print(
+            f'{num_shards:>3} shards  '
+            f'{1000 * min(timings):8.1f} ms per {args.queries} queries'
+        )
+
+
+if __name__ == '__main__':
+    main()
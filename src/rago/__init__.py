@@ -25,6 +25,7 @@ __all__ = [
     'DB',
     'Augmented',
     'Cache',
+    'EmbeddingCache',
     'Generation',
     'Logs',
     'Rago',
@@ -41,6 +42,7 @@ _EXPORTS = {
     'Generation': ('rago.generation', 'Generation'),
     'Cache': ('rago.config', 'Cache'),
     'DB': ('rago.config', 'DB'),
+    'EmbeddingCache': ('rago.config', 'EmbeddingCache'),
     'Logs': ('rago.config', 'Logs'),
 }
 
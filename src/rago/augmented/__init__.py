@@ -8,7 +8,12 @@ from typing import Any
 from typeguard import typechecked
 
 from rago.augmented.base import AugmentedBase
-from rago.base import ParametersBase, StepBase, config_to_dict
+from rago.base import (
+    ParametersBase,
+    StepBase,
+    config_snapshot,
+    config_to_dict,
+)
 from rago.io import Input, Output
 
 __all__ = [
@@ -45,7 +50,11 @@ class Augmented(StepBase):
         api_params: dict[str, Any] | None = None,
         db: Any = None,
         cache: Any = None,
+        embedding_cache: Any = None,
         logs: dict[str, Any] | None = None,
+        min_score: float | None = None,
+        adaptive_k: bool = False,
+        runtime: str = '',
     ) -> None:
         super().__init__()
         self.backend = backend.lower() if backend else ''
@@ -55,10 +64,19 @@ class Augmented(StepBase):
             model_name=model_name,
             top_k=top_k,
             api_params=api_params or {},
+            min_score=min_score,
+            adaptive_k=adaptive_k,
         )
+        if runtime:
+            # only local backends take a runtime, e.g. 'onnx'
+            self.params.params['runtime'] = runtime
         self.db = db
         self.cache = cache
+        self.embedding_cache = embedding_cache
         self.logs = logs if logs is not None else {}
+        self._instance: AugmentedBase | None = None
+        # settings the instance was built with
+        self._instance_state: tuple[Any, ...] = ()
 
     def __call__(self, **kwargs: Any) -> Augmented:
         """Update this wrapper with additional augmentation parameters."""
@@ -75,15 +93,40 @@ class Augmented(StepBase):
                 self.engine = value.lower()
             elif key == 'db':
                 self.db = value
+            elif key == 'embedding_cache':
+                self.embedding_cache = value
             else:
                 self.params.params[key] = value
+        if self._config_state() != self._instance_state:
+            self._instance = None
+
+    def _config_state(self) -> tuple[Any, ...]:
+        """Return a snapshot of the settings used to build the backend."""
+        return (
+            self.backend,
+            self.engine,
+            config_snapshot(self.params.params),
+            id(self.db),
+            id(self.cache),
+            id(self.embedding_cache),
+            id(self.logs),
+        )
 
     def _resolve(self) -> AugmentedBase:
+        """Return the concrete augmenter, building it on first use."""
+        if self._instance is None:
+            self._instance = self._build()
+            self._instance_state = self._config_state()
+        return self._instance
+
+    def _build(self) -> AugmentedBase:
         config = deepcopy(self.params.params)
         if self.db is not None:
             config['db'] = self.db
         if self.cache is not None:
             config['cache'] = self.cache
+        if self.embedding_cache is not None:
+            config['embedding_cache'] = self.embedding_cache
         config['logs'] = self.logs
 
         if self.backend == 'cohere':
@@ -114,10 +157,58 @@ class Augmented(StepBase):
             return TogetherAug(**config)
         raise Exception(f'Unsupported augmented backend: {self.backend}')
 
-    def search(self, query: str, documents: Any, top_k: int = 0) -> list[str]:
+    def index(
+        self, documents: Any, metadata: list[dict[str, Any]] | None = None
+    ) -> None:
+        """Resolve the concrete augmenter and build its vector index."""
+        self._resolve().index(documents, metadata)
+
+    def attach_index(self, documents: Any) -> None:
+        """Resolve the concrete augmenter and attach a prebuilt index."""
+        self._resolve().attach_index(documents)
+
+    def add_documents(
+        self, documents: Any, metadata: list[dict[str, Any]] | None = None
+    ) -> None:
+        """Resolve the concrete augmenter and append documents to it."""
+        self._resolve().add_documents(documents, metadata)
+
+    def search(
+        self,
+        query: str,
+        documents: Any,
+        top_k: int = 0,
+        filter: dict[str, Any] | None = None,
+    ) -> list[str]:
         """Resolve the concrete augmenter and run search."""
         augmented_instance = self._resolve()
-        return augmented_instance.search(query, documents, top_k=top_k)
+        return augmented_instance.search(
+            query, documents, top_k=top_k, filter=filter
+        )
+
+    async def asearch(
+        self,
+        query: str,
+        documents: Any = None,
+        top_k: int = 0,
+        filter: dict[str, Any] | None = None,
+    ) -> list[str]:
+        """Resolve the concrete augmenter and search without blocking."""
+        return await self._resolve().asearch(
+            query, documents, top_k=top_k, filter=filter
+        )
+
+    def search_many(
+        self,
+        queries: list[str],
+        documents: Any = None,
+        top_k: int = 0,
+        filter: dict[str, Any] | None = None,
+    ) -> list[list[str]]:
+        """Resolve the concrete augmenter and search several queries."""
+        return self._resolve().search_many(
+            queries, documents, top_k=top_k, filter=filter
+        )
 
     def process(self, inp: Input) -> Output:
         """Process the current pipeline content with augmentation."""
@@ -130,6 +221,7 @@ class Augmented(StepBase):
         output = Output.from_input(inp)
         output.content = result
         output.data = result
+        output.scores = self._resolve().last_scores
         return output
 
 
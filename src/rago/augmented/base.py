@@ -2,9 +2,12 @@
 
 from __future__ import annotations
 
+import asyncio
+
 from abc import abstractmethod
-from collections.abc import Callable, Iterable
+from collections.abc import Awaitable, Callable, Iterable
 from functools import wraps
+from hashlib import sha256
 from typing import Any, Optional, Union, cast
 
 import numpy as np
@@ -14,9 +17,12 @@ from torch import Tensor
 from typeguard import typechecked
 from typing_extensions import TypeAlias
 
-from rago.augmented.db import DBBase, FaissDB
+from rago.augmented.batching import EmbeddingBatcher
+from rago.augmented.db import DBBase
+from rago.augmented.db.metadata import MetadataType
 from rago.base import StepBase, ensure_list
 from rago.extensions.cache import Cache
+from rago.extensions.embedding_cache import EmbeddingCache
 from rago.io import Input, Output
 
 EmbeddingType: TypeAlias = Union[
@@ -27,6 +33,29 @@ EmbeddingType: TypeAlias = Union[
 ]
 
 
+def to_float32(embedding: EmbeddingType) -> npt.NDArray[np.float32]:
+    """Convert any supported embedding output into a 2D float32 matrix."""
+    if isinstance(embedding, Tensor):
+        embedding = embedding.detach().cpu().numpy()
+    elif isinstance(embedding, list):
+        embedding = np.stack(
+            [item.detach().cpu().numpy() for item in embedding]
+        )
+    result = np.ascontiguousarray(embedding, dtype=np.float32)
+    if result.ndim == 1:
+        result = result.reshape(1, -1)
+    return result
+
+
+def _update_fingerprint(hasher: Any, documents: Iterable[str]) -> Any:
+    """Feed documents into a running corpus fingerprint."""
+    for document in documents:
+        data = document.encode('utf-8')
+        hasher.update(len(data).to_bytes(8, 'little'))
+        hasher.update(data)
+    return hasher
+
+
 @typechecked
 class AugmentedBase(StepBase):
     """Base class for all augmentation steps."""
@@ -40,6 +69,9 @@ class AugmentedBase(StepBase):
 
     default_model_name: str = ''
     default_top_k: int = 5
+    # input limits of one embedding request, 0 for none
+    default_batch_size: int = 0
+    default_batch_tokens: int = 0
 
     def __init_subclass__(cls, **kwargs: Any) -> None:
         """Wrap subclass `search` methods with shared cache handling."""
@@ -54,8 +86,11 @@ class AugmentedBase(StepBase):
             query: str,
             documents: Any,
             top_k: int = 0,
+            filter: Optional[MetadataType] = None,
         ) -> list[str]:
-            normalized_documents = ensure_list(documents)
+            normalized_documents = ensure_list(documents) or list(
+                self._documents
+            )
             actual_top_k = top_k or self.top_k or self.default_top_k
             cache_key = (
                 cls.__name__,
@@ -64,29 +99,34 @@ class AugmentedBase(StepBase):
                 query,
                 normalized_documents,
                 actual_top_k,
+                filter,
             )
             cached = cast(list[str] | None, self._get_cache(cache_key))
             if cached is not None:
+                cached_scores = self._get_cache((*cache_key, 'scores'))
+                self._last_scores = list(cached_scores or [])
                 self.logs['cache_hit'] = True
                 self.logs['query'] = query
                 self.logs['documents'] = normalized_documents
                 self.logs['top_k'] = actual_top_k
                 self.logs['result'] = cached
+                self.logs['scores'] = self._last_scores
                 return cached
 
-            typed_method = cast(
-                Callable[[AugmentedBase, str, Any, int], list[str]],
-                method,
-            )
+            typed_method = cast(Callable[..., list[str]], method)
+            options = {} if filter is None else {'filter': filter}
+            self._last_scores = []
             result = typed_method(
-                self, query, normalized_documents, actual_top_k
+                self, query, normalized_documents, actual_top_k, **options
             )
             self.logs['cache_hit'] = False
             self.logs['query'] = query
             self.logs['documents'] = normalized_documents
             self.logs['top_k'] = actual_top_k
             self.logs['result'] = result
+            self.logs['scores'] = self._last_scores
             self._save_cache(cache_key, result)
+            self._save_cache((*cache_key, 'scores'), self._last_scores)
             return result
 
         wrapped._rago_wrapped = True  # type: ignore[attr-defined]
@@ -100,19 +140,43 @@ class AugmentedBase(StepBase):
         api_key: str = '',
         api_params: dict[str, Any] | None = None,
         cache: Cache | None = None,
+        embedding_cache: EmbeddingCache | None = None,
         logs: dict[str, Any] | None = None,
+        min_score: Optional[float] = None,
+        adaptive_k: bool = False,
+        batcher: EmbeddingBatcher | None = None,
     ) -> None:
         super().__init__()
         self.api_key = api_key
         self.api_params = api_params or {}
         self.cache = cache
+        self.embedding_cache = embedding_cache
         self.logs = logs if logs is not None else {}
-        self.db = db or FaissDB()
+        if db is None:
+            from rago.augmented.db.faiss import FaissDB
+
+            db = FaissDB()
+        self.db = db
         self.top_k = top_k if top_k is not None else self.default_top_k
         self.model_name = (
             model_name if model_name is not None else self.default_model_name
         )
+        self.min_score = min_score
+        self.adaptive_k = adaptive_k
+        self.batcher = batcher or EmbeddingBatcher(
+            max_items=self.default_batch_size,
+            max_tokens=self.default_batch_tokens,
+        )
         self.model = None
+        self._documents: list[str] = []
+        self._last_scores: list[float] = []
+        self._fingerprint = _update_fingerprint(sha256(), [])
+        self._async_limiter: Optional[
+            tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]
+        ] = None
+        self._async_index_lock: Optional[
+            tuple[asyncio.AbstractEventLoop, asyncio.Lock]
+        ] = None
 
         self._validate()
         self._load_optional_modules()
@@ -128,14 +192,283 @@ class AugmentedBase(StepBase):
         """Retrieve embeddings for the given texts."""
         raise Exception('Method not implemented.')
 
+    def _embed_batched(
+        self,
+        content: list[str],
+        embed: Callable[[list[str]], EmbeddingType],
+    ) -> npt.NDArray[np.float32]:
+        """Embed texts with one `embed` call per batch of `batcher`."""
+        return self.batcher.embed(
+            content, lambda batch: to_float32(embed(batch))
+        )
+
+    def _limiter(self) -> asyncio.Semaphore:
+        """Return the semaphore bounding async requests on the running loop."""
+        loop = asyncio.get_running_loop()
+        if self._async_limiter is None or self._async_limiter[0] is not loop:
+            self._async_limiter = (
+                loop,
+                asyncio.Semaphore(self.batcher.max_workers),
+            )
+        return self._async_limiter[1]
+
+    def _index_lock(self) -> asyncio.Lock:
+        """Return the lock serializing `asearch` indexing and lookups."""
+        loop = asyncio.get_running_loop()
+        if (
+            self._async_index_lock is None
+            or self._async_index_lock[0] is not loop
+        ):
+            self._async_index_lock = (loop, asyncio.Lock())
+        return self._async_index_lock[1]
+
+    async def aget_embedding(self, content: list[str]) -> EmbeddingType:
+        """Retrieve embeddings for the texts without blocking the loop."""
+        async with self._limiter():
+            return await asyncio.to_thread(self.get_embedding, content)
+
+    async def _aembed_batched(
+        self,
+        content: list[str],
+        embed: Callable[[list[str]], Awaitable[EmbeddingType]],
+    ) -> npt.NDArray[np.float32]:
+        """Embed texts with one awaited `embed` call per batch."""
+
+        async def embed_batch(batch: list[str]) -> npt.NDArray[np.float32]:
+            return to_float32(await embed(batch))
+
+        return await self.batcher.aembed(content, embed_batch, self._limiter())
+
+    def _embed_documents(
+        self, documents: list[str]
+    ) -> npt.NDArray[np.float32]:
+        """Embed document chunks, reusing vectors from the embedding cache."""
+        if self.embedding_cache is None:
+            return to_float32(self.get_embedding(documents))
+
+        namespace = f'{self.__class__.__name__}:{self.model_name}'
+        return self.embedding_cache.get_or_embed(
+            namespace,
+            documents,
+            lambda content: to_float32(self.get_embedding(content)),
+        )
+
+    @property
+    def last_scores(self) -> list[float]:
+        """Scores of the chunks returned by the latest `search`."""
+        return list(self._last_scores)
+
+    def _search_options(
+        self, top_k: int, filter: Optional[MetadataType]
+    ) -> dict[str, Any]:
+        """Return the options in use for a vector search of `top_k`."""
+        # only pass the options in use, for searches that predate them
+        options: dict[str, Any] = {}
+        if filter is not None:
+            options['filter'] = filter
+        if self.min_score is not None:
+            options['min_score'] = self.min_score
+            options['max_results'] = top_k
+        if self.adaptive_k:
+            options['adaptive'] = True
+        return options
+
+    def _indexed(self) -> tuple[DBBase, list[str]]:
+        """Return the database to search and the documents it holds."""
+        return self.db.searchable(self._documents)
+
+    def _search_db(
+        self,
+        query_encoded: Any,
+        top_k: int,
+        filter: Optional[MetadataType] = None,
+    ) -> tuple[list[str], list[float]]:
+        """Search the vector database; return the hits and their scores."""
+        db, documents = self._indexed()
+        scores, indices = db.search(
+            query_encoded, top_k=top_k, **self._search_options(top_k, filter)
+        )
+        retrieved: list[str] = []
+        kept: list[float] = []
+        for score, index in zip(np.asarray(scores).tolist(), indices):
+            hit = self._resolve_retrieved_docs(documents, [index])
+            if hit:
+                retrieved.extend(hit)
+                kept.append(float(score))
+        return retrieved, kept
+
+    def _embed_queries(self, queries: list[str]) -> npt.NDArray[np.float32]:
+        """Embed search queries; override for query-specific encodings."""
+        return to_float32(self.get_embedding(queries))
+
+    async def _aembed_queries(
+        self, queries: list[str]
+    ) -> npt.NDArray[np.float32]:
+        """Embed search queries without blocking the event loop."""
+        return to_float32(await self.aget_embedding(queries))
+
+    async def _aembed_documents(
+        self, documents: list[str]
+    ) -> npt.NDArray[np.float32]:
+        """Embed document chunks without blocking the event loop."""
+        if self.embedding_cache is not None:
+            # the cache reads and writes files, so it runs on a thread
+            return await asyncio.to_thread(self._embed_documents, documents)
+        return to_float32(await self.aget_embedding(documents))
+
+    def _store_index(
+        self,
+        documents: list[str],
+        vectors: npt.NDArray[np.float32],
+        metadata: Optional[list[MetadataType]] = None,
+    ) -> None:
+        """Replace the vector index with the embedded documents."""
+        self.db.embed_texts(vectors, documents, metadata)
+        self._documents = documents
+        self._fingerprint = _update_fingerprint(sha256(), documents)
+
+    def index(
+        self,
+        documents: Any,
+        metadata: Optional[list[MetadataType]] = None,
+    ) -> None:
+        """Embed the documents, and optional metadata, into a new index."""
+        normalized_documents = [str(doc) for doc in ensure_list(documents)]
+        vectors = self._embed_documents(normalized_documents)
+        self._store_index(normalized_documents, vectors, metadata)
+
+    def attach_index(self, documents: Any) -> None:
+        """Declare that `db` already holds these documents, in this order."""
+        normalized_documents = [str(doc) for doc in ensure_list(documents)]
+        self._documents = normalized_documents
+        self._fingerprint = _update_fingerprint(sha256(), normalized_documents)
+
+    def add_documents(
+        self,
+        documents: Any,
+        metadata: Optional[list[MetadataType]] = None,
+    ) -> None:
+        """Embed only the new documents and append them to the index."""
+        new_documents = [str(doc) for doc in ensure_list(documents)]
+        if not new_documents:
+            return
+        if not self._documents:
+            self.index(new_documents, metadata)
+            return
+
+        vectors = self._embed_documents(new_documents)
+        start = len(self._documents)
+        ids: list[Union[int, str]] = list(
+            range(start, start + len(new_documents))
+        )
+        self.db.add_texts(ids, vectors, new_documents, metadata)
+        self._documents.extend(new_documents)
+        self._fingerprint = _update_fingerprint(
+            self._fingerprint.copy(), new_documents
+        )
+
+    def is_indexed(self, documents: Any) -> bool:
+        """Return True if the index already holds exactly these documents."""
+        normalized_documents = [str(doc) for doc in ensure_list(documents)]
+        fingerprint = _update_fingerprint(sha256(), normalized_documents)
+        return bool(
+            self._documents
+            and fingerprint.digest() == self._fingerprint.digest()
+        )
+
+    def _ensure_indexed(self, documents: list[str]) -> None:
+        """Index the documents unless they are already indexed."""
+        if not self.is_indexed(documents):
+            self.index(documents)
+
     @abstractmethod
-    def search(self, query: str, documents: Any, top_k: int = 0) -> list[str]:
+    def search(
+        self,
+        query: str,
+        documents: Any,
+        top_k: int = 0,
+        filter: Optional[MetadataType] = None,
+    ) -> list[str]:
         """Search for the most relevant documents."""
 
+    async def asearch(
+        self,
+        query: str,
+        documents: Any = None,
+        top_k: int = 0,
+        filter: Optional[MetadataType] = None,
+    ) -> list[str]:
+        """Search like `search`, without blocking the event loop."""
+        normalized_documents = [
+            str(doc) for doc in ensure_list(documents)
+        ] or list(self._documents)
+        actual_top_k = top_k or self.top_k or self.default_top_k
+        cache_key = (
+            self.__class__.__name__,
+            'search',
+            self.model_name,
+            query,
+            normalized_documents,
+            actual_top_k,
+            filter,
+        )
+        cached = cast(list[str] | None, self._get_cache(cache_key))
+        if cached is not None:
+            return cached
+
+        query_encoded = await self._aembed_queries([query])
+        async with self._index_lock():
+            if not self.is_indexed(normalized_documents):
+                vectors = await self._aembed_documents(normalized_documents)
+                await asyncio.to_thread(
+                    self._store_index, normalized_documents, vectors
+                )
+            result, scores = await asyncio.to_thread(
+                self._search_db, query_encoded, actual_top_k, filter
+            )
+        self._save_cache(cache_key, result)
+        self._save_cache((*cache_key, 'scores'), scores)
+        return result
+
+    def search_many(
+        self,
+        queries: list[str],
+        documents: Any = None,
+        top_k: int = 0,
+        filter: Optional[MetadataType] = None,
+    ) -> list[list[str]]:
+        """Search several queries against the same corpus at once."""
+        if not queries:
+            return []
+        normalized_documents = [
+            str(doc) for doc in ensure_list(documents)
+        ] or list(self._documents)
+        self._ensure_indexed(normalized_documents)
+        actual_top_k = top_k or self.top_k or self.default_top_k
+
+        queries_encoded = self._embed_queries(list(queries))
+        db, indexed = self._indexed()
+        results = db.search_many(
+            queries_encoded,
+            top_k=actual_top_k,
+            **self._search_options(actual_top_k, filter),
+        )
+        retrieved = [
+            self._resolve_retrieved_docs(indexed, indices)
+            for _, indices in results
+        ]
+        self.logs['queries'] = list(queries)
+        self.logs['top_k'] = actual_top_k
+        self.logs['result'] = retrieved
+        self.logs['scores'] = [
+            np.asarray(scores).tolist() for scores, _ in results
+        ]
+        return retrieved
+
     @staticmethod
     def _resolve_retrieved_docs(
         documents: list[str],
-        indices: Iterable[str] | Iterable[int],
+        indices: Iterable[Union[int, str]],
     ) -> list[str]:
         """Resolve vector DB indices from int or string ids."""
         retrieved_docs: list[str] = []
@@ -159,4 +492,5 @@ class AugmentedBase(StepBase):
         output = Output.from_input(inp)
         output.content = result
         output.data = result
+        output.scores = self.last_scores
         return output
@@ -0,0 +1,232 @@
+"""Split embedding requests into batches sent concurrently."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Optional, cast
+
+import numpy as np
+import numpy.typing as npt
+
+from typeguard import typechecked
+
+EmbedFunction = Callable[[list[str]], npt.NDArray[np.float32]]
+AsyncEmbedFunction = Callable[[list[str]], Awaitable[npt.NDArray[np.float32]]]
+
+
+# HTTP statuses worth retrying besides 5xx: timeout, conflict, rate limit
+TRANSIENT_STATUSES = (408, 409, 429)
+# words in the exception class names of SDKs and HTTP clients for errors
+# raised before any response arrived, e.g. `openai.APIConnectionError`
+TRANSIENT_NAMES = ('Timeout', 'Connect', 'RateLimit', 'Unavailable')
+
+
+def estimate_tokens(text: str) -> int:
+    """Return a rough token count, about four characters per token."""
+    return len(text) // 4 + 1
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Return True if retrying the request that raised `error` may succeed.
+
+    Rate limits, timeouts, lost connections and server errors (5xx) are
+    transient; anything else, e.g. an invalid request or a bad API key,
+    fails the same way on every attempt.
+    """
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    if isinstance(status, int):
+        return status in TRANSIENT_STATUSES or status >= 500
+    return any(
+        word in cls.__name__
+        for cls in type(error).__mro__
+        for word in TRANSIENT_NAMES
+    )
+
+
+@typechecked
+class EmbeddingBatcher:
+    """
+    Embed a list of texts with several requests, sent concurrently.
+
+    Texts are grouped in order into batches of at most `max_items` texts
+    and `max_tokens` estimated tokens, matching the input limits of an
+    embedding API. The batches are sent by up to `max_workers` threads; a
+    failing batch is retried alone, with exponential backoff, and the
+    results are written into one float32 matrix in the input order.
+
+    Parameters
+    ----------
+    max_items : int
+        Texts per request; 0 means no limit.
+    max_tokens : int
+        Estimated tokens per request; 0 means no limit. A single text over
+        the limit is still sent, alone.
+    max_workers : int
+        Requests in flight at once.
+    retries : int
+        Extra attempts for a failing batch before its error is raised.
+    backoff : float
+        Seconds to wait before the first retry, doubled on each attempt.
+    retry_on : callable, optional
+        Decide whether an error is worth retrying. Defaults to
+        `is_transient`.
+    """
+
+    def __init__(
+        self,
+        max_items: int = 0,
+        max_tokens: int = 0,
+        max_workers: int = 4,
+        retries: int = 3,
+        backoff: float = 1.0,
+        retry_on: Optional[Callable[[BaseException], bool]] = None,
+    ) -> None:
+        if max_items < 0 or max_tokens < 0:
+            raise ValueError('Batch limits must not be negative.')
+        if max_workers < 1:
+            raise ValueError('max_workers must be a positive integer.')
+        if retries < 0 or backoff < 0:
+            raise ValueError('retries and backoff must not be negative.')
+        self.max_items = max_items
+        self.max_tokens = max_tokens
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.retry_on = retry_on or is_transient
+
+    def batches(self, texts: list[str]) -> list[tuple[int, int]]:
+        """Return the `(start, stop)` row range of each batch."""
+        ranges: list[tuple[int, int]] = []
+        start = 0
+        tokens = 0
+        for position, text in enumerate(texts):
+            size = estimate_tokens(text) if self.max_tokens else 0
+            full = (self.max_items and position - start >= self.max_items) or (
+                self.max_tokens and tokens + size > self.max_tokens
+            )
+            if full and position > start:
+                ranges.append((start, position))
+                start = position
+                tokens = 0
+            tokens += size
+        if start < len(texts):
+            ranges.append((start, len(texts)))
+        return ranges
+
+    @staticmethod
+    def _check(
+        batch: list[str], result: npt.NDArray[np.float32]
+    ) -> npt.NDArray[np.float32]:
+        if len(result) != len(batch):
+            raise ValueError(
+                f'Expected {len(batch)} embeddings, got {len(result)}.'
+            )
+        return result
+
+    def _call(
+        self, embed: EmbedFunction, batch: list[str]
+    ) -> npt.NDArray[np.float32]:
+        """Embed one batch, retrying it on transient errors."""
+        attempt = 0
+        while True:
+            try:
+                return self._check(batch, embed(batch))
+            except Exception as exc:
+                if attempt == self.retries or not self.retry_on(exc):
+                    raise
+                time.sleep(self.backoff * 2**attempt)
+                attempt += 1
+
+    async def _acall(
+        self,
+        embed: AsyncEmbedFunction,
+        batch: list[str],
+        limiter: asyncio.Semaphore,
+    ) -> npt.NDArray[np.float32]:
+        """Embed one batch within the limiter, retrying transient errors."""
+        attempt = 0
+        while True:
+            try:
+                async with limiter:
+                    return self._check(batch, await embed(batch))
+            except Exception as exc:
+                if attempt == self.retries or not self.retry_on(exc):
+                    raise
+                # back off outside the limiter, leaving the slot to others
+                await asyncio.sleep(self.backoff * 2**attempt)
+                attempt += 1
+
+    def embed(
+        self, texts: list[str], embed: EmbedFunction
+    ) -> npt.NDArray[np.float32]:
+        """Embed the texts with `embed`, one call per batch."""
+        ranges = self.batches(texts)
+        if not ranges:
+            return embed(texts)
+        if len(ranges) == 1:
+            return self._call(embed, texts)
+
+        result: Optional[npt.NDArray[np.float32]] = None
+        workers = min(self.max_workers, len(ranges))
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='rago-embed'
+        ) as pool:
+            jobs = [
+                (
+                    start,
+                    stop,
+                    pool.submit(self._call, embed, texts[start:stop]),
+                )
+                for start, stop in ranges
+            ]
+            try:
+                for start, stop, job in jobs:
+                    vectors = job.result()
+                    if result is None:
+                        result = np.empty(
+                            (len(texts), vectors.shape[1]), dtype=np.float32
+                        )
+                    result[start:stop] = vectors
+            except BaseException:
+                for _, _, job in jobs:
+                    job.cancel()
+                raise
+        return cast(npt.NDArray[np.float32], result)
+
+    async def aembed(
+        self,
+        texts: list[str],
+        embed: AsyncEmbedFunction,
+        limiter: Optional[asyncio.Semaphore] = None,
+    ) -> npt.NDArray[np.float32]:
+        """
+        Embed the texts with the coroutine `embed`, one call per batch.
+
+        At most `max_workers` calls run at once, or as many as `limiter`
+        allows when it is shared by several callers.
+        """
+        limiter = limiter or asyncio.Semaphore(self.max_workers)
+        ranges = self.batches(texts)
+        if not ranges:
+            async with limiter:
+                return await embed(texts)
+        results = await asyncio.gather(
+            *(
+                self._acall(embed, texts[start:stop], limiter)
+                for start, stop in ranges
+            )
+        )
+        if len(results) == 1:
+            return results[0]
+        result = np.empty((len(texts), results[0].shape[1]), dtype=np.float32)
+        for (start, stop), vectors in zip(ranges, results):
+            result[start:stop] = vectors
+        return result
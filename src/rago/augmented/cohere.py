@@ -2,14 +2,17 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, cast
+from functools import partial
+from typing import TYPE_CHECKING, Optional, cast
 
 import numpy as np
+import numpy.typing as npt
 
 from typeguard import typechecked
 
 from rago._optional import require_dependency
 from rago.augmented.base import AugmentedBase, EmbeddingType
+from rago.augmented.db.metadata import MetadataType
 
 if TYPE_CHECKING:
     import cohere
@@ -21,6 +24,8 @@ class CohereAug(AugmentedBase):
 
     default_model_name = 'embed-english-v3.0'  # Cohere's recommended model
     default_top_k = 3
+    # texts per request accepted by the embed endpoint
+    default_batch_size = 96
 
     def _load_optional_modules(self) -> None:
         self._cohere = require_dependency(
@@ -34,40 +39,78 @@ class CohereAug(AugmentedBase):
         if not self.api_key:
             raise ValueError('API key for Cohere is required.')
         self.model = self._cohere.ClientV2(self.api_key)
+        self.async_model = self._cohere.AsyncClientV2(self.api_key)
 
     def get_embedding(self, content: list[str]) -> EmbeddingType:
         """Retrieve the embedding for given texts using Cohere API."""
+        return self._embed_batched(
+            content, partial(self._request_embedding, 'search_document')
+        )
+
+    def _embed_queries(self, queries: list[str]) -> npt.NDArray[np.float32]:
+        """Embed queries with Cohere's search-query input type."""
+        return self._embed_batched(
+            queries, partial(self._request_embedding, 'search_query')
+        )
+
+    def _request_embedding(
+        self, input_type: str, content: list[str]
+    ) -> EmbeddingType:
+        """Embed one batch of texts with a single API request."""
         model = cast('cohere.Client', self.model)
         response = model.embed(
             texts=content,
             model=self.model_name,
-            input_type='search_document',
+            input_type=input_type,
             embedding_types=['float'],
         )
-        result = np.array(response.embeddings.float_, dtype=np.float32)  # type: ignore[union-attr]
+        return np.array(response.embeddings.float_, dtype=np.float32)  # type: ignore[union-attr]
 
-        return result
+    async def aget_embedding(self, content: list[str]) -> EmbeddingType:
+        """Retrieve the embedding with Cohere's async client."""
+        return await self._aembed_batched(
+            content, partial(self._arequest_embedding, 'search_document')
+        )
+
+    async def _aembed_queries(
+        self, queries: list[str]
+    ) -> npt.NDArray[np.float32]:
+        """Embed queries with the search-query input type, asynchronously."""
+        return await self._aembed_batched(
+            queries, partial(self._arequest_embedding, 'search_query')
+        )
+
+    async def _arequest_embedding(
+        self, input_type: str, content: list[str]
+    ) -> EmbeddingType:
+        """Embed one batch of texts with a single async API request."""
+        model = cast('cohere.AsyncClientV2', self.async_model)
+        response = await model.embed(
+            texts=content,
+            model=self.model_name,
+            input_type=input_type,
+            embedding_types=['float'],
+        )
+        return np.array(response.embeddings.float_, dtype=np.float32)  # type: ignore[union-attr]
 
     def search(
-        self, query: str, documents: list[str], top_k: int = 0
+        self,
+        query: str,
+        documents: list[str],
+        top_k: int = 0,
+        filter: Optional[MetadataType] = None,
     ) -> list[str]:
         """Search an encoded query into vector database."""
         if not getattr(self, 'db', None):
             raise Exception('Vector database (db) is not initialized.')
-        document_encoded = self.get_embedding(documents)
-        model = cast('cohere.Client', self.model)
-        response = model.embed(
-            texts=[query],
-            model=self.model_name,
-            input_type='search_query',
-            embedding_types=['float'],
-        )
-        query_encoded = np.array(response.embeddings.float_, dtype=np.float32)  # type: ignore[union-attr]
+        self._ensure_indexed(documents)
+        query_encoded = self._embed_queries([query])
 
         top_k = top_k or self.top_k or self.default_top_k or 1
 
-        self.db.embed(document_encoded)
-        _, indices = self.db.search(query_encoded, top_k=top_k)
+        retrieved, self._last_scores = self._search_db(
+            query_encoded, top_k, filter
+        )
 
         # self.logs['indices'] = indices
         # self.logs['scores'] = scores
@@ -76,4 +119,4 @@ class CohereAug(AugmentedBase):
         #     'top_k': top_k,
         # }
 
-        return self._resolve_retrieved_docs(documents, indices)
+        return retrieved
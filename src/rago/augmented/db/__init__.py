@@ -2,8 +2,59 @@
 
 from __future__ import annotations
 
+from typing import Any
+
 from rago.augmented.db.base import DBBase
-from rago.augmented.db.chroma import ChromaDB
-from rago.augmented.db.faiss import FaissDB
+from rago.augmented.db.metadata import MetadataStore
+
+__all__ = [
+    'BinaryDB',
+    'ChromaDB',
+    'DBBase',
+    'FaissDB',
+    'MetadataStore',
+    'NumpyDB',
+    'SQLiteDB',
+    'ShardedDB',
+    'TenantDB',
+    'TenantManager',
+    'VersionedDB',
+]
+
+
+def __getattr__(name: str) -> Any:
+    # backends are imported on first use, so picking one does not pay for
+    # importing the native libraries of the others
+    if name == 'BinaryDB':
+        from rago.augmented.db.binary import BinaryDB
+
+        return BinaryDB
+    if name == 'ChromaDB':
+        from rago.augmented.db.chroma import ChromaDB
+
+        return ChromaDB
+    if name == 'FaissDB':
+        from rago.augmented.db.faiss import FaissDB
+
+        return FaissDB
+    if name == 'NumpyDB':
+        from rago.augmented.db.numpy import NumpyDB
+
+        return NumpyDB
+    if name == 'ShardedDB':
+        from rago.augmented.db.sharded import ShardedDB
+
+        return ShardedDB
+    if name == 'SQLiteDB':
+        from rago.augmented.db.sqlite import SQLiteDB
+
+        return SQLiteDB
+    if name in ('TenantDB', 'TenantManager'):
+        from rago.augmented.db import tenants
+
+        return getattr(tenants, name)
+    if name == 'VersionedDB':
+        from rago.augmented.db.versioned import VersionedDB
 
-__all__ = ['ChromaDB', 'DBBase', 'FaissDB']
+        return VersionedDB
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -2,11 +2,17 @@
 
 from __future__ import annotations
 
+import threading
+
 from abc import abstractmethod
-from typing import Any, Iterable, Union
+from typing import Any, Iterable, Optional, Sequence, Union
+
+import numpy as np
 
 from typeguard import typechecked
 
+from rago.augmented.db.metadata import MetadataType
+
 
 @typechecked
 class DBBase:
@@ -15,13 +21,150 @@ class DBBase:
     index: Any
 
     @abstractmethod
-    def embed(self, documents: Any) -> None:
-        """Embed the documents into the database."""
+    def embed(
+        self,
+        documents: Any,
+        metadata: Optional[Sequence[MetadataType]] = None,
+    ) -> None:
+        """Embed the documents, and their optional metadata, into the DB."""
         ...
 
+    def add(
+        self,
+        ids: Sequence[Union[int, str]],
+        vectors: Any,
+        metadata: Optional[Sequence[MetadataType]] = None,
+    ) -> None:
+        """Add vectors to the database without rebuilding it."""
+        raise NotImplementedError(
+            f'{self.__class__.__name__} does not support incremental add.'
+        )
+
+    def embed_texts(
+        self,
+        vectors: Any,
+        texts: Sequence[str],
+        metadata: Optional[Sequence[MetadataType]] = None,
+    ) -> None:
+        """Embed vectors computed from `texts`, which are ignored here."""
+        if metadata is None:
+            self.embed(vectors)
+        else:
+            self.embed(vectors, metadata=metadata)
+
+    def add_texts(
+        self,
+        ids: Sequence[Union[int, str]],
+        vectors: Any,
+        texts: Sequence[str],
+        metadata: Optional[Sequence[MetadataType]] = None,
+    ) -> None:
+        """Add vectors computed from `texts`, which are ignored here."""
+        self.add(ids, vectors, metadata)
+
+    def searchable(self, texts: list[str]) -> tuple[DBBase, list[str]]:
+        """Return the database to search and the texts its ids point to."""
+        return self, texts
+
+    def remove(self, ids: Sequence[Union[int, str]]) -> None:
+        """Remove vectors from the database by id."""
+        raise NotImplementedError(
+            f'{self.__class__.__name__} does not support removal.'
+        )
+
+    def update(
+        self,
+        ids: Sequence[Union[int, str]],
+        vectors: Any,
+        metadata: Optional[Sequence[MetadataType]] = None,
+    ) -> None:
+        """Replace the vectors (and metadata) stored under the given ids."""
+        self.remove(ids)
+        self.add(ids, vectors, metadata)
+
+    def get_metadata(
+        self, ids: Sequence[Union[int, str]]
+    ) -> list[MetadataType]:
+        """Return the metadata stored with the given ids."""
+        raise NotImplementedError(
+            f'{self.__class__.__name__} does not store metadata.'
+        )
+
+    def _compact(self) -> None:
+        """Reclaim the space left by removed vectors. Override if needed."""
+
+    def compact(self, background: bool = False) -> Optional[threading.Thread]:
+        """Reclaim the space left by removed vectors, optionally threaded."""
+        if not background:
+            self._compact()
+            return None
+        thread = threading.Thread(target=self._compact, daemon=True)
+        thread.start()
+        return thread
+
     @abstractmethod
     def search(
-        self, query_encoded: Any, top_k: int = 2
-    ) -> tuple[Iterable[float], Union[Iterable[str], Iterable[int]]]:
-        """Search a query from documents."""
+        self,
+        query_encoded: Any,
+        top_k: int = 2,
+        filter: Optional[MetadataType] = None,
+        min_score: Optional[float] = None,
+        max_results: Optional[int] = None,
+        adaptive: bool = False,
+    ) -> tuple[Iterable[float], Iterable[Union[int, str]]]:
+        """Search a query from documents, best score first."""
         ...
+
+    def search_many(
+        self,
+        queries_encoded: Any,
+        top_k: int = 2,
+        filter: Optional[MetadataType] = None,
+        min_score: Optional[float] = None,
+        max_results: Optional[int] = None,
+        adaptive: bool = False,
+    ) -> list[tuple[Iterable[float], Iterable[Union[int, str]]]]:
+        """Search several encoded queries, one `(scores, ids)` per row."""
+        options: dict[str, Any] = {}
+        if filter is not None:
+            options['filter'] = filter
+        if min_score is not None:
+            options['min_score'] = min_score
+        if max_results is not None:
+            options['max_results'] = max_results
+        if adaptive:
+            options['adaptive'] = adaptive
+        return [
+            self.search(query_encoded.reshape(1, -1), top_k=top_k, **options)
+            for query_encoded in np.asarray(queries_encoded, dtype=np.float32)
+        ]
+
+    @staticmethod
+    def _result_limit(
+        top_k: int, min_score: Optional[float], max_results: Optional[int]
+    ) -> Optional[int]:
+        """Return how many hits a search may return, None if unbounded."""
+        if max_results is not None:
+            return max_results
+        return None if min_score is not None else top_k
+
+    @staticmethod
+    def _cutoff(
+        scores: Any,
+        ids: Sequence[Union[int, str]],
+        min_score: Optional[float] = None,
+        max_results: Optional[int] = None,
+        adaptive: bool = False,
+    ) -> tuple[Any, list[Union[int, str]]]:
+        """Apply the score threshold, cap and adaptive-k to a ranked row."""
+        scores = np.asarray(scores, dtype=np.float32)
+        keep = len(scores)
+        if min_score is not None:
+            # rows are ranked, so the hits above the threshold are a prefix
+            keep = int(np.count_nonzero(scores >= min_score))
+        if max_results is not None:
+            keep = min(keep, max_results)
+        if adaptive and keep > 1:
+            gaps = scores[: keep - 1] - scores[1:keep]
+            keep = int(np.argmax(gaps)) + 1
+        return scores[:keep], list(ids[:keep])
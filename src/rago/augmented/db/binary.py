@@ -0,0 +1,401 @@
+"""Binary-quantized vector database with float rescoring."""
+
+from __future__ import annotations
+
+import os
+import tempfile
+import threading
+import weakref
+
+from pathlib import Path
+from typing import Any, Iterable, Literal, Optional, Sequence, Union
+
+import faiss
+import numpy as np
+
+from typeguard import typechecked
+
+from rago.augmented.db.base import DBBase
+from rago.augmented.db.metadata import MetadataStore, MetadataType
+
+METRICS = ('l2', 'ip', 'cosine')
+
+# float rows allocated up front, doubled whenever the memmap is full
+INITIAL_CAPACITY = 1024
+
+# float32 values gathered at once while rescoring candidates
+RESCORE_BLOCK = 1 << 22
+
+
+def binarize(vectors: Any) -> Any:
+    """Pack the sign bit of every dimension, 8 dimensions per byte."""
+    return np.packbits(np.asarray(vectors) > 0, axis=1)
+
+
+def _remove_file(path: Path) -> None:
+    path.unlink(missing_ok=True)
+
+
+@typechecked
+class BinaryDB(DBBase):
+    """
+    Search sign-bit codes by Hamming distance and rescore with floats.
+
+    Every vector is stored twice: as one bit per dimension in a faiss
+    binary index, which lives in memory and is 32x smaller than float32,
+    and as float32 in a `np.memmap` file. A search takes the
+    `top_k * rescore_factor` nearest codes by Hamming distance and ranks
+    only those candidates by their exact score, read from the file.
+
+    Recall grows with `rescore_factor`; `tune` picks the smallest factor
+    that reaches a recall target on sample queries.
+
+    Parameters
+    ----------
+    metric : str
+        Score used to rescore the candidates: `'cosine'` (the default),
+        `'ip'` (inner product) or `'l2'`. Scores are "higher is better",
+        as in `FaissDB`. Sign bits suit zero-centred embeddings, as
+        returned by most embedding models.
+    rescore_factor : int
+        Candidates rescored per requested result.
+    index_factory : str
+        A faiss binary index-factory string: `'BFlat'` (exhaustive
+        Hamming search, the default), `'BIVF1024'` or `'BHNSW32'`.
+    path : str or Path, optional
+        File holding the float vectors. Defaults to a temporary file that
+        is removed with the database.
+    """
+
+    def __init__(
+        self,
+        metric: str = 'cosine',
+        rescore_factor: int = 10,
+        index_factory: str = 'BFlat',
+        path: Optional[Union[Path, str]] = None,
+    ) -> None:
+        if metric not in METRICS:
+            raise ValueError(
+                f"Unknown metric '{metric}'. Options: {list(METRICS)}."
+            )
+        if rescore_factor < 1:
+            raise ValueError('rescore_factor must be a positive integer.')
+        self.metric = metric
+        self.rescore_factor = rescore_factor
+        self.index_factory = index_factory
+        if path is None:
+            handle, name = tempfile.mkstemp(prefix='rago-', suffix='.f32')
+            os.close(handle)
+            self.path = Path(name)
+            weakref.finalize(self, _remove_file, self.path)
+        else:
+            self.path = Path(path)
+        self.index: Any = None
+        self._vectors: Any = None
+        self._internal: dict[Union[int, str], int] = {}
+        self._external: dict[int, Union[int, str]] = {}
+        self._next_id = 0
+        self._metadata = MetadataStore()
+        self._lock = threading.RLock()
+
+    def _prepare(self, vectors: Any) -> Any:
+        """Return vectors as a float32 matrix, normalized for cosine."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        if self.metric != 'cosine':
+            return np.ascontiguousarray(vectors)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, np.finfo(np.float32).tiny)
+
+    def _create_index(self, dimension: int) -> Any:
+        """Create an empty binary index over `dimension` sign bits."""
+        # codes are padded to whole bytes
+        bits = 8 * ((dimension + 7) // 8)
+        index = faiss.index_binary_factory(bits, self.index_factory)
+        return faiss.IndexBinaryIDMap(index)
+
+    def _reserve(self, rows: int, dimension: int) -> None:
+        """Grow the float memmap to hold `rows` more vectors."""
+        if self._vectors is not None and self._vectors.shape[1] != dimension:
+            raise ValueError(
+                f'Expected vectors of dimension {self._vectors.shape[1]}, '
+                f'got {dimension}.'
+            )
+        needed = self._next_id + rows
+        capacity = 0 if self._vectors is None else len(self._vectors)
+        if needed <= capacity:
+            return
+
+        new_capacity = max(needed, 2 * capacity, INITIAL_CAPACITY)
+        mode: Literal['r+', 'w+'] = 'w+'
+        if self._vectors is not None:
+            # grow the file in place and map it again with the new shape
+            self._vectors.flush()
+            self._vectors = None
+            with open(self.path, 'r+b') as handle:
+                handle.truncate(new_capacity * dimension * 4)
+            mode = 'r+'
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._vectors = np.memmap(
+            self.path,
+            dtype=np.float32,
+            mode=mode,
+            shape=(new_capacity, dimension),
+        )
+
+    def embed(
+        self,
+        documents: Any,
+        metadata: Optional[Sequence[MetadataType]] = None,
+    ) -> None:
+        """Replace the contents with the given vectors, ids 0..n-1."""
+        with self._lock:
+            self.index = None
+            self._vectors = None
+            self._internal = {}
+            self._external = {}
+            self._next_id = 0
+            self._metadata = MetadataStore()
+            self.add(list(range(len(documents))), documents, metadata)
+
+    def add(
+        self,
+        ids: Sequence[Union[int, str]],
+        vectors: Any,
+        metadata: Optional[Sequence[MetadataType]] = None,
+    ) -> None:
+        """Add vectors, and optionally their metadata, under stable ids."""
+        vectors = self._prepare(vectors)
+        if len(ids) != len(vectors):
+            raise ValueError('The number of ids and vectors must match.')
+        if len(set(ids)) != len(ids):
+            raise ValueError('Duplicated ids in the same batch.')
+        with self._lock:
+            existing = [id_ for id_ in ids if id_ in self._internal]
+            if existing:
+                raise ValueError(
+                    f'Ids already in the database: {existing[:5]}. '
+                    'Use update() to replace them.'
+                )
+            self._reserve(len(ids), vectors.shape[1])
+            start, stop = self._next_id, self._next_id + len(ids)
+            self._vectors[start:stop] = vectors
+            internal = np.arange(start, stop, dtype=np.int64)
+            if self.index is None:
+                self.index = self._create_index(vectors.shape[1])
+            codes = binarize(vectors)
+            if not self.index.is_trained:
+                self.index.train(codes)
+            self.index.add_with_ids(codes, internal)
+            for external_id, internal_id in zip(ids, internal.tolist()):
+                self._internal[external_id] = internal_id
+                self._external[internal_id] = external_id
+            self._next_id = stop
+            self._metadata.resize(stop)
+            if metadata is not None:
+                self._metadata.set(internal.tolist(), metadata)
+
+    def remove(self, ids: Sequence[Union[int, str]]) -> None:
+        """
+        Remove vectors by id.
+
+        Codes are dropped from the binary index; the float rows stay in the
+        file, unreferenced, until the next `embed`.
+        """
+        with self._lock:
+            internal = [
+                self._internal.pop(id_) for id_ in ids if id_ in self._internal
+            ]
+            if not internal:
+                return
+            for internal_id in internal:
+                del self._external[internal_id]
+            try:
+                self.index.remove_ids(np.asarray(internal, dtype=np.int64))
+            except RuntimeError:
+                # HNSW cannot drop codes in place, index the live ones again
+                self._rebuild()
+
+    def _rebuild(self) -> None:
+        """Rebuild the binary index from the live float rows."""
+        live = np.fromiter(self._external, dtype=np.int64)
+        live.sort()
+        index = self._create_index(self._vectors.shape[1])
+        codes = binarize(self._vectors[live])
+        if not index.is_trained:
+            index.train(codes)
+        index.add_with_ids(codes, live)
+        self.index = index
+
+    def get_metadata(
+        self, ids: Sequence[Union[int, str]]
+    ) -> list[MetadataType]:
+        """Return the metadata stored with the given ids."""
+        with self._lock:
+            return self._metadata.get(self._internal[id_] for id_ in ids)
+
+    def _score(self, queries: Any, candidates: Any) -> Any:
+        """
+        Score each query against its own candidate rows, exactly.
+
+        Candidates are rescored a block of columns at a time, so at most
+        `RESCORE_BLOCK` floats are gathered whatever the number of queries
+        and candidates.
+        """
+        scores = np.full(candidates.shape, -np.inf, dtype=np.float32)
+        width = max(1, RESCORE_BLOCK // max(1, queries.size))
+        for start in range(0, candidates.shape[1], width):
+            block = candidates[:, start : start + width]
+            valid = block >= 0
+            rows, inverse = np.unique(block[valid], return_inverse=True)
+            # read every candidate of the block once, in file order
+            vectors = np.asarray(self._vectors[rows], dtype=np.float32)
+            gathered = np.zeros((*block.shape, queries.shape[1]), 'float32')
+            gathered[valid] = vectors[inverse]
+            if self.metric == 'l2':
+                gathered -= queries[:, None, :]
+                block_scores = -np.einsum('qkd,qkd->qk', gathered, gathered)
+            else:
+                block_scores = np.einsum('qkd,qd->qk', gathered, queries)
+            block_scores[~valid] = -np.inf
+            scores[:, start : start + width] = block_scores
+        return scores
+
+    def _hamming_search(
+        self, codes: Any, k: int, mask: Optional[Any] = None
+    ) -> Any:
+        """Return the ids of the `k` nearest codes, -1 padded."""
+        if mask is None:
+            return self.index.search(codes, k)[1]
+        bitmap = np.packbits(mask, bitorder='little')
+        params = faiss.SearchParameters()
+        params.sel = faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bitmap))
+        try:
+            return self.index.search(codes, k, params=params)[1]
+        except RuntimeError:
+            # binary HNSW takes no selector, scan the matching codes instead
+            selected = np.flatnonzero(mask)
+            index = faiss.IndexBinaryFlat(8 * codes.shape[1])
+            index.add(binarize(self._vectors[selected]))
+            rows = index.search(codes, k)[1]
+            return np.where(rows >= 0, selected[rows], -1)
+
+    def search(
+        self,
+        query_encoded: Any,
+        top_k: int = 2,
+        filter: Optional[MetadataType] = None,
+        min_score: Optional[float] = None,
+        max_results: Optional[int] = None,
+        adaptive: bool = False,
+    ) -> tuple[Iterable[float], Iterable[Union[int, str]]]:
+        """Search an encoded query into vector database."""
+        return self.search_many(
+            query_encoded,
+            top_k=top_k,
+            filter=filter,
+            min_score=min_score,
+            max_results=max_results,
+            adaptive=adaptive,
+        )[0]
+
+    def search_many(
+        self,
+        queries_encoded: Any,
+        top_k: int = 2,
+        filter: Optional[MetadataType] = None,
+        min_score: Optional[float] = None,
+        max_results: Optional[int] = None,
+        adaptive: bool = False,
+    ) -> list[tuple[Iterable[float], Iterable[Union[int, str]]]]:
+        """
+        Take the nearest codes by Hamming distance and rescore them.
+
+        A range search (`min_score` without `max_results`) has no result
+        count to scale the candidates by, so it rescores every vector.
+        """
+        queries = self._prepare(queries_encoded)
+        limit = self._result_limit(top_k, min_score, max_results)
+        with self._lock:
+            if self.index is None or limit == 0:
+                return [(np.empty(0, np.float32), []) for _ in queries]
+            mask = None
+            available = len(self._external)
+            if filter is not None:
+                mask = self._metadata.mask(filter)
+                live = np.zeros(len(mask), dtype=bool)
+                live[np.fromiter(self._external, dtype=np.int64)] = True
+                mask &= live
+                available = int(mask.sum())
+            if not available:
+                return [(np.empty(0, np.float32), []) for _ in queries]
+
+            candidates = available
+            if limit is not None:
+                candidates = min(limit * self.rescore_factor, available)
+            rows = self._hamming_search(binarize(queries), candidates, mask)
+            scores = self._score(queries, rows)
+
+            order = np.argsort(-scores, axis=1, kind='stable')
+            scores = np.take_along_axis(scores, order, axis=1)
+            rows = np.take_along_axis(rows, order, axis=1)
+            results: list[
+                tuple[Iterable[float], Iterable[Union[int, str]]]
+            ] = []
+            for row_scores, row_ids in zip(scores, rows):
+                found = row_ids >= 0
+                results.append(
+                    self._cutoff(
+                        row_scores[found],
+                        [self._external[id_] for id_ in row_ids[found]],
+                        min_score,
+                        limit,
+                        adaptive,
+                    )
+                )
+            return results
+
+    def recall(self, queries_encoded: Any, top_k: int = 10) -> float:
+        """
+        Measure recall@k against an exact search over the float vectors.
+
+        Returns the share of the exact top-k ids found by `search_many`.
+        """
+        with self._lock:
+            live = np.fromiter(self._external, dtype=np.int64)
+            queries = self._prepare(queries_encoded)
+            vectors = np.asarray(self._vectors[live], dtype=np.float32)
+            scores = queries @ vectors.T
+            if self.metric == 'l2':
+                # the query norm does not change the ranking
+                scores = 2 * scores - np.einsum('ij,ij->i', vectors, vectors)
+            k = min(top_k, len(live))
+            best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            exact = live[best]
+            results = self.search_many(queries_encoded, top_k=k)
+        found = sum(
+            len(set(row.tolist()) & {self._internal[id_] for id_ in ids})
+            for row, (_, ids) in zip(exact, results)
+        )
+        return found / exact.size
+
+    def tune(
+        self,
+        queries_encoded: Any,
+        top_k: int = 10,
+        target_recall: float = 0.95,
+        max_factor: int = 256,
+    ) -> float:
+        """
+        Set the smallest `rescore_factor` that reaches `target_recall`.
+
+        The factor is doubled until `recall` on the sample queries reaches
+        the target or `max_factor`. Returns the recall reached.
+        """
+        self.rescore_factor = 1
+        reached = self.recall(queries_encoded, top_k)
+        while reached < target_recall and self.rescore_factor < max_factor:
+            self.rescore_factor = min(2 * self.rescore_factor, max_factor)
+            reached = self.recall(queries_encoded, top_k)
+        return reached
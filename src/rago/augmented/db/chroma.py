@@ -1,72 +1,259 @@
 """ChromaDB implementation for vector database."""
 
-from typing import TYPE_CHECKING, Any, List, Tuple
+from itertools import islice, repeat
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 import numpy as np
 
 from rago.augmented.db.base import DBBase
+from rago.augmented.db.metadata import MetadataType, to_chroma_where
 
 if TYPE_CHECKING:
     from chromadb.api import ClientAPI
 
 
+# chroma distance spaces, the default `l2` is the squared distance
+METRICS = ('l2', 'ip', 'cosine')
+
+T = TypeVar('T')
+
+
 class ChromaDB(DBBase):
-    """ChromaDB implementation for vector database."""
+    """
+    ChromaDB implementation for vector database.
+
+    `metric` selects the collection's distance space (`'l2'`, `'ip'` or
+    `'cosine'`). Chroma returns distances, which searches convert into
+    "higher is better" scores: `1 - distance` for `'ip'` and `'cosine'`
+    and the negated distance for `'l2'`.
+
+    Writes are sent in chunks of `batch_size` records, by default the
+    largest batch the client accepts.
+    """
 
     def __init__(
         self,
         client: 'ClientAPI',
         collection_name: str = 'rago',
+        metric: str = 'l2',
+        batch_size: Optional[int] = None,
     ) -> None:
         """Initialize ChromaDB."""
+        if metric not in METRICS:
+            raise ValueError(
+                f"Unknown metric '{metric}'. Options: {list(METRICS)}."
+            )
         self.client = client
         self.collection_name = collection_name
+        if batch_size is not None and batch_size < 1:
+            raise ValueError('batch_size must be a positive integer.')
+        self.metric = metric
+        self.batch_size = batch_size or client.get_max_batch_size()
         self._setup()
 
     def _setup(self) -> None:
         """Set up ChromaDB client and collection."""
         self.collection = self.client.get_or_create_collection(
-            name=self.collection_name
+            name=self.collection_name,
+            metadata={'hnsw:space': self.metric},
         )
         self.index = self.collection
 
-    def embed(self, documents: Any) -> None:
-        """Embed the documents into the database."""
+    def _batches(self, items: Iterable[T]) -> Iterator[List[T]]:
+        """Split an iterable into lists of at most `batch_size` items."""
+        iterator = iter(items)
+        while batch := list(islice(iterator, self.batch_size)):
+            yield batch
+
+    def embed(
+        self,
+        documents: Any,
+        metadata: Optional[Iterable[MetadataType]] = None,
+    ) -> None:
+        """
+        Replace the contents with `(texts, embeddings)`, ids 0..n-1.
+
+        Records are upserted in batches under `str(position)`, the ids of
+        `add`, `remove` and `update`, and may come from lazy iterables.
+        Positions already holding the same text, vector and metadata are
+        skipped, and positions past a smaller corpus are deleted.
+        """
         if not isinstance(documents, tuple) or len(documents) != 2:
             raise ValueError(
                 'documents format must be: (List[str], List[List[float]])'
             )
 
-        documents_list: List[str] = documents[0]
-        embeddings_list: List[List[float]] = documents[1]
+        texts, embeddings = documents
+        fields = repeat(None) if metadata is None else metadata
+        previous = self.collection.count()
+        size = 0
+        for batch in self._batches(zip(texts, embeddings, fields)):
+            records = {
+                str(size + offset): (
+                    text,
+                    np.asarray(vector, dtype=np.float32),
+                    meta or None,
+                )
+                for offset, (text, vector, meta) in enumerate(batch)
+            }
+            size += len(batch)
+            stored = self.collection.get(
+                ids=list(records),
+                include=['documents', 'embeddings', 'metadatas'],
+            )
+            for id_, text, vector, meta in zip(
+                stored['ids'],
+                stored['documents'] or repeat(None),
+                repeat(None)
+                if stored['embeddings'] is None
+                else stored['embeddings'],
+                stored['metadatas'] or repeat(None),
+            ):
+                # rows whose vector changed, e.g. with a new model, are kept
+                if records[id_][0] == text and records[id_][2] == (
+                    meta or None
+                ):
+                    if vector is not None and np.array_equal(
+                        records[id_][1], vector
+                    ):
+                        del records[id_]
+            if not records:
+                continue
+            self.collection.upsert(
+                ids=list(records),
+                documents=[text for text, _, _ in records.values()],
+                embeddings=np.stack(
+                    [vector for _, vector, _ in records.values()]
+                ),
+                metadatas=[meta for _, _, meta in records.values()],  # type: ignore[misc]
+            )
+        if previous > size:
+            self.remove([str(id_) for id_ in range(size, previous)])
 
-        # Convert embeddings to numpy array
-        embeddings = np.array(embeddings_list, dtype=np.float32)
+    def _write(
+        self,
+        method: Any,
+        ids: Sequence[Union[int, str]],
+        vectors: Any,
+        metadata: Optional[Sequence[MetadataType]],
+    ) -> None:
+        """Send ids, vectors and metadata to `method` in batches."""
+        for start in range(0, len(ids), self.batch_size):
+            stop = start + self.batch_size
+            method(
+                ids=[str(id_) for id_ in ids[start:stop]],
+                embeddings=np.asarray(vectors[start:stop], dtype=np.float32),
+                metadatas=None
+                if metadata is None
+                else [fields or None for fields in metadata[start:stop]],
+            )
 
-        self.collection.add(
-            documents=documents_list,
-            embeddings=embeddings,
-            ids=[str(i) for i in range(len(documents_list))],
-        )
+    def add(
+        self,
+        ids: Sequence[Union[int, str]],
+        vectors: Any,
+        metadata: Optional[Sequence[MetadataType]] = None,
+    ) -> None:
+        """Add vectors to the collection under the given ids."""
+        self._write(self.collection.add, ids, vectors, metadata)
 
-    def search(
-        self, query_encoded: Any, top_k: int = 2
-    ) -> Tuple[List[float], List[str]]:
-        """Search a query from documents."""
-        # Convert query_encoded to numpy array
-        query_encoded_np = np.array([query_encoded], dtype=np.float32)
+    def remove(self, ids: Sequence[Union[int, str]]) -> None:
+        """Delete vectors from the collection by id."""
+        for batch in self._batches(ids):
+            self.collection.delete(ids=[str(id_) for id_ in batch])
+
+    def update(
+        self,
+        ids: Sequence[Union[int, str]],
+        vectors: Any,
+        metadata: Optional[Sequence[MetadataType]] = None,
+    ) -> None:
+        """Replace the vectors stored under the given ids."""
+        self._write(self.collection.upsert, ids, vectors, metadata)
+
+    def get_metadata(
+        self, ids: Sequence[Union[int, str]]
+    ) -> List[MetadataType]:
+        """Return the metadata stored with the given ids."""
+        keys = [str(id_) for id_ in ids]
+        result = self.collection.get(ids=keys, include=['metadatas'])
+        by_id = dict(zip(result['ids'], result['metadatas'] or []))
+        return [dict(by_id.get(key) or {}) for key in keys]
+
+    def search_many(
+        self,
+        queries_encoded: Any,
+        top_k: int = 2,
+        filter: Optional[MetadataType] = None,
+        min_score: Optional[float] = None,
+        max_results: Optional[int] = None,
+        adaptive: bool = False,
+    ) -> List[Tuple[Iterable[float], Iterable[Union[int, str]]]]:
+        """
+        Search several encoded queries with a single collection query.
+
+        A `filter` is passed to chroma as its `where` clause. Chroma has no
+        range query, so a `min_score` without `max_results` asks for the
+        whole collection and cuts the ranked results.
+        """
+        queries = np.asarray(queries_encoded, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries.reshape(1, -1)
+
+        limit = self._result_limit(top_k, min_score, max_results)
+        n_results = self.collection.count() if limit is None else limit
+        if not n_results:
+            return [(np.empty(0, np.float32), []) for _ in queries]
 
         results = self.collection.query(
-            query_embeddings=query_encoded_np.tolist(),
-            n_results=top_k,
+            query_embeddings=queries,
+            n_results=n_results,
+            where=to_chroma_where(filter) if filter else None,
+            include=['distances'],
         )
 
-        # Check if keys exist before accessing them
-        distances = results.get('distances', [[]])
-        ids = results.get('ids', [[]])
+        distances = results.get('distances') or [[] for _ in queries]
+        ids = results.get('ids') or [[] for _ in queries]
+        return [
+            self._cutoff(
+                self._to_scores(row), row_ids, min_score, limit, adaptive
+            )
+            for row, row_ids in zip(distances, ids)
+        ]
 
-        # Ensure distances and ids are not None before indexing
-        distances_list: List[float] = distances[0] if distances else []
-        ids_list: List[str] = ids[0] if ids else []
+    def _to_scores(self, distances: Any) -> Any:
+        """Turn chroma distances into "higher is better" scores."""
+        distances = np.asarray(distances, dtype=np.float32)
+        if self.metric == 'l2':
+            return -distances
+        return 1.0 - distances
 
-        return distances_list, ids_list
+    def search(
+        self,
+        query_encoded: Any,
+        top_k: int = 2,
+        filter: Optional[MetadataType] = None,
+        min_score: Optional[float] = None,
+        max_results: Optional[int] = None,
+        adaptive: bool = False,
+    ) -> Tuple[Iterable[float], Iterable[Union[int, str]]]:
+        """Search a query from documents."""
+        return self.search_many(
+            query_encoded,
+            top_k=top_k,
+            filter=filter,
+            min_score=min_score,
+            max_results=max_results,
+            adaptive=adaptive,
+        )[0]
@@ -2,27 +2,931 @@
 
 from __future__ import annotations
 
-from typing import Any, Iterable
+import json
+import os
+import re
+import threading
+import time
+
+from pathlib import Path
+from typing import Any, Iterable, Optional, Sequence, Union, cast
 
 import faiss
+import numpy as np
 
 from typeguard import typechecked
 
 from rago.augmented.db.base import DBBase
+from rago.augmented.db.metadata import MetadataStore, MetadataType
+from rago.augmented.db.ondisk import InvertedListCache
+
+# search-time knobs exposed by FaissDB, mapped to faiss parameter names
+SEARCH_PARAMS = {
+    'nprobe': 'nprobe',
+    'ef_search': 'efSearch',
+    'k_factor': 'k_factor_rf',
+}
+
+# similarity metrics, cosine is inner product over L2-normalized vectors
+METRICS = {
+    'l2': faiss.METRIC_L2,
+    'ip': faiss.METRIC_INNER_PRODUCT,
+    'cosine': faiss.METRIC_INNER_PRODUCT,
+}
+
+# vector storage types, mapped to faiss flat or scalar-quantizer codes
+DTYPES = {'float32': 'Flat', 'float16': 'SQfp16', 'int8': 'SQ8'}
+
+# candidate values tried by `FaissDB.tune`, cheapest first
+EF_SEARCH_GRID = (16, 32, 64, 128, 256, 512, 1024)
+K_FACTOR_GRID = (1, 2, 4, 8, 16, 32)
+
+# points needed to train a PQ codebook (256 centroids, 256 points each)
+PQ_TRAIN_SIZE = 256 * 256
+
+# map inverted lists from disk instead of reading them into memory
+MMAP_FLAGS = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+# flat codes (Flat, HNSW storage, ...) are mapped by a separate flag
+MMAP_FLAT_FLAGS = getattr(faiss, 'IO_FLAG_MMAP_IFC', 0)
+
+
+def quantized_factory(index_factory: str, dtype: str) -> str:
+    """
+    Swap the flat vector storage of a factory string for `dtype`.
+
+    `'Flat'` becomes `'SQ8'`, `'IVF1024,Flat'` becomes `'IVF1024,SQ8'` and
+    `'HNSW32'` becomes `'HNSW32_SQ8'` for int8, likewise with `'SQfp16'`
+    for float16. Indexes that already compress their vectors (PQ, SQ)
+    are rejected.
+    """
+    if dtype not in DTYPES:
+        raise ValueError(
+            f"Unsupported dtype '{dtype}'. Options: {list(DTYPES)}."
+        )
+    if dtype == 'float32':
+        return index_factory
+    *head, storage = index_factory.split(',')
+    if storage == 'Flat':
+        storage = DTYPES[dtype]
+    elif re.fullmatch(r'HNSW\d+(_Flat)?', storage):
+        storage = f'{storage.split("_")[0]}_{DTYPES[dtype]}'
+    else:
+        raise ValueError(
+            f"Cannot store the vectors of a '{index_factory}' index as "
+            f'{dtype}; use a Flat, IVF*,Flat or HNSW* index.'
+        )
+    return ','.join([*head, storage])
 
 
 @typechecked
 class FaissDB(DBBase):
-    """Faiss Database."""
+    """
+    Faiss Database.
+
+    Parameters
+    ----------
+    index_factory : str
+        A faiss index-factory string, e.g. `'Flat'` (exact search, the
+        default), `'IVF1024,Flat'`, `'IVF1024,PQ32'`, `'HNSW32'` or
+        `'OPQ32,IVF1024,PQ32,RFlat'` (IVF-PQ re-ranked with exact distances
+        through `IndexRefineFlat`).
+    nprobe : int, optional
+        Number of inverted lists visited per query by IVF indexes.
+    ef_search : int, optional
+        Size of the candidate queue used by HNSW indexes.
+    k_factor : int, optional
+        Candidates re-ranked per result by `RFlat` refinement.
+    train_size : int, optional
+        Maximum number of vectors sampled to train the index. Defaults to
+        enough points for the coarse quantizer and PQ codebooks.
+    seed : int
+        Seed used to sample the training vectors.
+    metric : str
+        `'l2'` (the default), `'ip'` (inner product) or `'cosine'`. With
+        `'cosine'` vectors and queries are L2-normalized before they reach
+        an inner-product index. Scores are always "higher is better": the
+        similarity for `'ip'` and `'cosine'`, and the negated squared
+        distance for `'l2'`.
+    dtype : str
+        How vectors are stored: `'float32'` (the default), `'float16'` or
+        `'int8'`, through faiss scalar quantizers. int8 maps every
+        dimension to 256 levels between its minimum and maximum, calibrated
+        on the training sample.
+    on_disk : str or Path, optional
+        Keep the inverted lists of an `'IVF<n>,Flat'` index in a file next
+        to this path instead of in memory; only the coarse centroids stay
+        resident. Searches read the probed lists from the file, and every
+        `embed` writes a new one and deletes the previous one.
+    memory_budget : int
+        Bytes of inverted lists cached in memory with `on_disk`, least
+        recently used first out.
+    """
+
+    def __init__(
+        self,
+        index_factory: str = 'Flat',
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        k_factor: Optional[int] = None,
+        train_size: Optional[int] = None,
+        seed: int = 42,
+        metric: str = 'l2',
+        dtype: str = 'float32',
+        on_disk: Optional[Union[Path, str]] = None,
+        memory_budget: int = 256 * 2**20,
+    ) -> None:
+        if metric not in METRICS:
+            raise ValueError(
+                f"Unknown metric '{metric}'. Options: {list(METRICS)}."
+            )
+        # fail early on factory strings that cannot be quantized
+        quantized_factory(index_factory, dtype)
+        self.index_factory = index_factory
+        self.dtype = dtype
+        self.on_disk = Path(on_disk) if on_disk is not None else None
+        self.memory_budget = memory_budget
+        self._lists: Optional[InvertedListCache] = None
+        self.tuning: Optional[dict[str, Any]] = None
+        self.metric = metric
+        self.train_size = train_size
+        self.seed = seed
+        self.search_params: dict[str, int] = {}
+        self.index = None
+        self.read_only = False
+        self._internal: dict[Union[int, str], int] = {}
+        self._external: dict[int, Union[int, str]] = {}
+        self._deleted: set[int] = set()
+        self._next_id = 0
+        self._metadata = MetadataStore()
+        self._lock = threading.RLock()
+        # vectors added while a compaction builds its index, or None
+        self._journal: Optional[list[tuple[Any, Any]]] = None
+        self.set_search_params(
+            nprobe=nprobe, ef_search=ef_search, k_factor=k_factor
+        )
+
+    def _create_index(self, dimension: int) -> Any:
+        """Create an empty index from the configured factory string."""
+        return faiss.index_factory(
+            dimension,
+            quantized_factory(self.index_factory, self.dtype),
+            METRICS[self.metric],
+        )
+
+    def _prepare(self, vectors: Any) -> Any:
+        """Return vectors as a float32 matrix, normalized for cosine."""
+        converted = np.ascontiguousarray(vectors, dtype=np.float32)
+        if converted.ndim == 1:
+            converted = converted.reshape(1, -1)
+        if self.metric != 'cosine':
+            return converted
+        if np.may_share_memory(converted, vectors):
+            # normalize a copy so the caller's array is left untouched
+            converted = converted.copy()
+        faiss.normalize_L2(converted)
+        return converted
+
+    def _default_train_size(self, index: Any) -> int:
+        try:
+            nlist = faiss.extract_index_ivf(index).nlist
+        except RuntimeError:
+            nlist = 0
+        return max(256 * nlist, PQ_TRAIN_SIZE)
+
+    def _training_sample(self, index: Any, vectors: Any) -> Any:
+        """Select a random subset of the vectors to train the index."""
+        size = self.train_size or self._default_train_size(index)
+        if len(vectors) <= size:
+            return vectors
+        rng = np.random.default_rng(self.seed)
+        rows = np.sort(rng.choice(len(vectors), size=size, replace=False))
+        return vectors[rows]
+
+    def _build(self, vectors: Any, ids: Any) -> Any:
+        """Create, train and fill a new index with the given vectors."""
+        index = self._create_index(vectors.shape[1])
+        if not isinstance(index, faiss.IndexIVF):
+            # IVF indexes store ids natively, the others need an id map
+            index = faiss.IndexIDMap(index)
+        if not index.is_trained:
+            index.train(self._training_sample(index, vectors))
+        if self.on_disk is None:
+            index.add_with_ids(vectors, ids)
+        else:
+            self._add_on_disk(index, vectors, ids)
+        self._apply_search_params(index)
+        return index
+
+    def _add_on_disk(self, index: Any, vectors: Any, ids: Any) -> None:
+        """Fill a new index whose inverted lists live in `on_disk`."""
+        if not isinstance(index, faiss.IndexIVFFlat):
+            raise ValueError(
+                "on_disk needs an 'IVF<n>,Flat' index, not "
+                f"'{self.index_factory}'."
+            )
+        path = cast(Path, self.on_disk)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # every build gets its own file, so the served one is never touched
+        building = path.with_name(f'{path.name}.{time.time_ns():x}')
+        invlists = faiss.OnDiskInvertedLists(
+            index.nlist, index.code_size, str(building)
+        )
+        index.replace_invlists(invlists, True)
+        # the index owns the lists now
+        invlists.this.disown()  # type: ignore[attr-defined]
+        index.add_with_ids(vectors, ids)
+
+    def _list_file(self, index: Any) -> Optional[Path]:
+        """Return the file holding the on-disk lists of `index`, if any."""
+        if self.on_disk is None or index is None:
+            return None
+        invlists: Any = faiss.downcast_InvertedLists(index.invlists)
+        return Path(invlists.filename)
+
+    def _list_cache(self, index: Any) -> Optional[InvertedListCache]:
+        """Return a reader for the on-disk lists of `index`, if any."""
+        if self.on_disk is None or index is None:
+            return None
+        invlists = faiss.downcast_InvertedLists(index.invlists)
+        return InvertedListCache(invlists, index.d, self.memory_budget)
+
+    def _apply_search_params(self, index: Any) -> None:
+        parameter_space = faiss.ParameterSpace()
+        for name, value in self.search_params.items():
+            try:
+                parameter_space.set_index_parameter(
+                    index, SEARCH_PARAMS[name], value
+                )
+            except RuntimeError as exc:
+                raise ValueError(
+                    f"Search parameter '{name}' is not supported by the "
+                    f"'{self.index_factory}' index."
+                ) from exc
+
+    def set_search_params(self, **params: Optional[int]) -> None:
+        """Set search-time knobs such as `nprobe` or `ef_search`."""
+        for name, value in params.items():
+            if name not in SEARCH_PARAMS:
+                raise ValueError(
+                    f"Unknown search parameter '{name}'. "
+                    f'Options: {list(SEARCH_PARAMS)}.'
+                )
+            if value is not None:
+                self.search_params[name] = value
+        if self.index is not None:
+            self._apply_search_params(self.index)
+
+    def _search_param_grid(
+        self, top_k: int
+    ) -> tuple[str, list[int], list[dict[str, int]]]:
+        """
+        Return the search knobs of the index, for `tune`.
+
+        That is the name and candidate values of the knob trading recall
+        for speed (`nprobe` or `ef_search`, empty for exact indexes), and
+        the combinations of the other knobs to try it with.
+        """
+        nested = []
+        index = self.index
+        while index is not None:
+            index = faiss.downcast_index(index)
+            nested.append(index)
+            if isinstance(index, faiss.IndexRefine):
+                index = index.base_index
+            elif isinstance(
+                index, (faiss.IndexIDMap, faiss.IndexPreTransform)
+            ):
+                index = index.index
+            else:
+                index = None
+
+        name, values = '', []
+        if any(isinstance(index, faiss.IndexIVF) for index in nested):
+            nlist = faiss.extract_index_ivf(self.index).nlist
+            name = 'nprobe'
+            values = [2**i for i in range(nlist.bit_length()) if 2**i < nlist]
+            values.append(nlist)
+        elif any(isinstance(index, faiss.IndexHNSW) for index in nested):
+            name = 'ef_search'
+            values = [value for value in EF_SEARCH_GRID if value >= top_k]
+        others: list[dict[str, int]] = [{}]
+        if any(isinstance(index, faiss.IndexRefine) for index in nested):
+            others = [{'k_factor': value} for value in K_FACTOR_GRID]
+        return name, values, others
+
+    def tune(
+        self,
+        vectors: Any,
+        ids: Optional[Sequence[Union[int, str]]] = None,
+        target_recall: float = 0.95,
+        top_k: int = 10,
+        num_queries: int = 100,
+        repeat: int = 3,
+    ) -> dict[str, Any]:
+        """
+        Pick the fastest search parameters that reach a recall target.
+
+        Held-out queries are sampled from `vectors`, the indexed corpus,
+        and their exact neighbours (themselves excluded) are computed with
+        a flat index. Each combination of the index's search knobs is then
+        timed on those queries; for every combination of the secondary
+        knobs (`k_factor`), `nprobe` or `ef_search` grows until recall@k
+        reaches `target_recall`.
+
+        The chosen parameters are applied, so `save` stores them with the
+        index and `load` restores them. When no combination reaches the
+        target, the one with the best recall is kept.
+
+        Parameters
+        ----------
+        vectors : Any
+            The vectors in the database.
+        ids : sequence, optional
+            Their ids, by default 0..n-1 as assigned by `embed`.
+        target_recall : float
+            Wanted share of the exact top-k found.
+        top_k : int
+            The k of recall@k.
+        num_queries : int
+            Number of held-out queries.
+        repeat : int
+            Timing runs per combination; the fastest counts.
+
+        Returns
+        -------
+        dict
+            The chosen `params`, with the `recall` and `latency_ms` (per
+            query batch) they reached, also kept in `tuning`.
+        """
+        if self.index is None:
+            raise ValueError('There is no index to tune.')
+        vectors = self._prepare(vectors)
+        ids = list(range(len(vectors))) if ids is None else list(ids)
+        if len(ids) != len(vectors):
+            raise ValueError('The number of ids and vectors must match.')
+        rng = np.random.default_rng(self.seed)
+        rows = rng.choice(
+            len(vectors), size=min(num_queries, len(vectors)), replace=False
+        )
+        queries = vectors[rows]
+
+        flat = faiss.IndexFlat(vectors.shape[1], METRICS[self.metric])
+        flat.add(vectors)
+        _, neighbours = flat.search(queries, top_k + 1)
+        truth = [
+            set(
+                [ids[found] for found in row if found not in (-1, own)][:top_k]
+            )
+            for own, row in zip(rows.tolist(), neighbours.tolist())
+        ]
+
+        def evaluate(params: dict[str, int]) -> tuple[float, float]:
+            self.set_search_params(**params)
+            latency = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                results = self.search_many(queries, top_k=top_k + 1)
+                latency = min(latency, time.perf_counter() - start)
+            hits = 0
+            for own, expected, (_, found) in zip(rows, truth, results):
+                found = [id_ for id_ in found if id_ != ids[own]][:top_k]
+                hits += len(expected.intersection(found))
+            return hits / max(sum(map(len, truth)), 1), 1000 * latency
+
+        name, values, others = self._search_param_grid(top_k)
+        best: Optional[tuple[float, float, dict[str, int]]] = None
+        fallback: Optional[tuple[float, float, dict[str, int]]] = None
+        for extra in others:
+            for primary in [{name: value} for value in values] or [{}]:
+                params = {**primary, **extra}
+                recall, latency = evaluate(params)
+                if fallback is None or recall > fallback[0]:
+                    fallback = (recall, latency, params)
+                if recall >= target_recall:
+                    if best is None or latency < best[1]:
+                        best = (recall, latency, params)
+                    break
+
+        recall, latency, params = best or cast(
+            tuple[float, float, dict[str, int]], fallback
+        )
+        self.set_search_params(**params)
+        self.tuning = {
+            'params': params,
+            'recall': recall,
+            'latency_ms': latency,
+            'target_recall': target_recall,
+            'top_k': top_k,
+        }
+        return self.tuning
+
+    def _allocate(
+        self,
+        ids: Sequence[Union[int, str]],
+        metadata: Optional[Sequence[MetadataType]] = None,
+    ) -> Any:
+        """Map new external ids onto fresh internal ids."""
+        if len(set(ids)) != len(ids):
+            raise ValueError('Duplicated ids in the same batch.')
+        existing = [id_ for id_ in ids if id_ in self._internal]
+        if existing:
+            raise ValueError(
+                f'Ids already in the database: {existing[:5]}. '
+                'Use update() to replace them.'
+            )
+        internal = np.arange(
+            self._next_id, self._next_id + len(ids), dtype=np.int64
+        )
+        self._next_id += len(ids)
+        for external_id, internal_id in zip(ids, internal.tolist()):
+            self._internal[external_id] = internal_id
+            self._external[internal_id] = external_id
+        self._metadata.resize(self._next_id)
+        if metadata is not None:
+            self._metadata.set(internal.tolist(), metadata)
+        return internal
+
+    def embed(
+        self,
+        documents: Any,
+        metadata: Optional[Sequence[MetadataType]] = None,
+    ) -> None:
+        """
+        Replace the contents with the given vectors, ids 0..n-1.
+
+        The new index is built without holding the lock, so concurrent
+        searches keep using the previous index until it is swapped in.
+        """
+        size = len(documents)
+        store = MetadataStore()
+        store.resize(size)
+        if metadata is not None:
+            store.set(list(range(size)), metadata)
+        index = self._build(
+            self._prepare(documents), np.arange(size, dtype=np.int64)
+        )
+        with self._lock:
+            replaced = self._list_file(self.index)
+            self.index = index
+            self._lists = self._list_cache(index)
+            self._internal = {id_: id_ for id_ in range(size)}
+            self._external = {id_: id_ for id_ in range(size)}
+            self._deleted = set()
+            self._next_id = size
+            self._metadata = store
+            self.read_only = False
+            if replaced is not None:
+                # searches only reach the lists under the lock
+                replaced.unlink(missing_ok=True)
 
-    def embed(self, documents: Any) -> None:
-        """Embed the documents into the database."""
-        self.index = faiss.IndexFlatL2(documents.shape[1])
-        self.index.add(documents)
+    def add(
+        self,
+        ids: Sequence[Union[int, str]],
+        vectors: Any,
+        metadata: Optional[Sequence[MetadataType]] = None,
+    ) -> None:
+        """Add vectors, and optionally their metadata, under stable ids."""
+        if self.read_only:
+            raise ValueError('Cannot add vectors to a memory-mapped index.')
+        if len(ids) != len(vectors):
+            raise ValueError('The number of ids and vectors must match.')
+        vectors = self._prepare(vectors)
+        with self._lock:
+            internal = self._allocate(list(ids), metadata)
+            if self.index is None:
+                self.index = self._build(vectors, internal)
+                self._lists = self._list_cache(self.index)
+            else:
+                self.index.add_with_ids(vectors, internal)
+                if self._lists is not None:
+                    self._lists.clear()
+                if self._journal is not None:
+                    self._journal.append((vectors, internal))
+
+    def remove(self, ids: Sequence[Union[int, str]]) -> None:
+        """
+        Remove vectors by external id.
+
+        Removed vectors are hidden from searches right away and physically
+        dropped from the index by `compact()`.
+        """
+        if self.read_only:
+            raise ValueError(
+                'Cannot remove vectors from a memory-mapped index.'
+            )
+        with self._lock:
+            for external_id in ids:
+                internal_id = self._internal.pop(external_id, None)
+                if internal_id is None:
+                    continue
+                del self._external[internal_id]
+                self._deleted.add(internal_id)
+
+    def _compact(self) -> None:
+        """
+        Drop removed vectors from the index.
+
+        The compacted index is built from a copy without holding the lock,
+        so searches keep using the current index meanwhile. Vectors added
+        in the meantime are replayed onto the copy before it is swapped in;
+        vectors removed in the meantime stay hidden until the next call.
+        """
+        with self._lock:
+            if self.index is None or not self._deleted:
+                return
+            deleted = set(self._deleted)
+            if self.on_disk is not None:
+                # the lists live in one file shared with the served index,
+                # so they are compacted in place
+                self.index = self._without(
+                    self.index, np.fromiter(deleted, dtype=np.int64)
+                )
+                self._deleted -= deleted
+                self._lists = self._list_cache(self.index)
+                return
+            source = self.index
+            index = faiss.clone_index(source)
+            self._journal = []
+        try:
+            index = self._without(index, np.fromiter(deleted, dtype=np.int64))
+            self._apply_search_params(index)
+            with self._lock:
+                if self.index is not source:
+                    # replaced by `embed` meanwhile
+                    return
+                for vectors, internal in self._journal or []:
+                    index.add_with_ids(vectors, internal)
+                self.index = index
+                self._deleted -= deleted
+        finally:
+            with self._lock:
+                self._journal = None
+
+    def _without(self, index: Any, deleted: Any) -> Any:
+        """Return `index` without the given internal ids."""
+        try:
+            index.remove_ids(deleted)
+            return index
+        except RuntimeError:
+            # HNSW and refined indexes cannot drop vectors in place
+            return self._rebuild_without(index, deleted)
+
+    def _rebuild_without(self, index: Any, deleted: Any) -> Any:
+        """Rebuild an id-mapped index from its reconstructed live vectors."""
+        inner = faiss.downcast_index(index.index)
+        vectors = inner.reconstruct_n(0, inner.ntotal)
+        ids = faiss.vector_to_array(index.id_map)
+        keep = ~np.isin(ids, deleted)
+        return self._build(
+            np.ascontiguousarray(vectors[keep]),
+            np.ascontiguousarray(ids[keep]),
+        )
+
+    def get_metadata(
+        self, ids: Sequence[Union[int, str]]
+    ) -> list[MetadataType]:
+        """Return the metadata stored with the given external ids."""
+        with self._lock:
+            return self._metadata.get(self._internal[id_] for id_ in ids)
+
+    def _filter_mask(self, filter: MetadataType) -> Any:
+        """Return the internal ids matching a filter, as a boolean mask."""
+        mask = self._metadata.mask(filter)
+        if self._deleted:
+            mask[np.fromiter(self._deleted, dtype=np.int64)] = False
+        return mask
+
+    def _selector(self, filter: MetadataType) -> tuple[Any, int, Any]:
+        """
+        Compile a metadata filter into a faiss bitmap selector.
+
+        Returns the selector, the number of selected vectors and the bitmap,
+        which must stay alive for as long as the selector is used.
+        """
+        mask = self._filter_mask(filter)
+        bitmap = np.packbits(mask, bitorder='little')
+        selector = faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bitmap))
+        return selector, int(mask.sum()), bitmap
+
+    @staticmethod
+    def _search_parameters(index: Any, selector: Any) -> Any:
+        """Build search parameters carrying `selector` down to the index."""
+        index = faiss.downcast_index(index)
+        if isinstance(index, faiss.IndexIDMap):
+            # the id map translates the selector to its own internal ids
+            return FaissDB._search_parameters(index.index, selector)
+        params: Any
+        if isinstance(index, faiss.IndexPreTransform):
+            params = faiss.SearchParametersPreTransform()
+            params.index_params = FaissDB._search_parameters(
+                index.index, selector
+            )
+        elif isinstance(index, faiss.IndexRefine):
+            params = faiss.IndexRefineSearchParameters()
+            params.k_factor = index.k_factor
+            params.base_index_params = FaissDB._search_parameters(
+                index.base_index, selector
+            )
+        elif isinstance(index, faiss.IndexIVF):
+            params = faiss.SearchParametersIVF()
+            params.nprobe = index.nprobe
+        elif isinstance(index, faiss.IndexHNSW):
+            params = faiss.SearchParametersHNSW()  # type: ignore[attr-defined]
+            params.efSearch = index.hnsw.efSearch
+        else:
+            params = faiss.SearchParameters()
+        params.sel = selector
+        return params
 
     def search(
-        self, query_encoded: Any, top_k: int = 2
-    ) -> tuple[Iterable[float], Iterable[int]]:
+        self,
+        query_encoded: Any,
+        top_k: int = 2,
+        filter: Optional[MetadataType] = None,
+        min_score: Optional[float] = None,
+        max_results: Optional[int] = None,
+        adaptive: bool = False,
+    ) -> tuple[Iterable[float], Iterable[Union[int, str]]]:
         """Search an encoded query into vector database."""
-        distances, indices = self.index.search(query_encoded, top_k)
-        return distances, indices[0]
+        return self.search_many(
+            query_encoded,
+            top_k=top_k,
+            filter=filter,
+            min_score=min_score,
+            max_results=max_results,
+            adaptive=adaptive,
+        )[0]
+
+    def search_many(
+        self,
+        queries_encoded: Any,
+        top_k: int = 2,
+        filter: Optional[MetadataType] = None,
+        min_score: Optional[float] = None,
+        max_results: Optional[int] = None,
+        adaptive: bool = False,
+    ) -> list[tuple[Iterable[float], Iterable[Union[int, str]]]]:
+        """
+        Search all query rows with a single faiss call.
+
+        A `filter` is compiled into a bitmap `IDSelector`, so faiss only
+        scores the vectors whose metadata matches. With `min_score` the
+        search runs as a faiss range search where the index supports it.
+        """
+        queries = self._prepare(queries_encoded)
+        limit = self._result_limit(top_k, min_score, max_results)
+        with self._lock:
+            if self.index is None:
+                return [(np.empty(0, np.float32), []) for _ in queries]
+            params = None
+            mask = None
+            available = self.index.ntotal - len(self._deleted)
+            if filter is not None and self._lists is not None:
+                mask = self._filter_mask(filter)
+                available = int(mask.sum())
+            elif filter is not None:
+                # `_bitmap` backs the selector until the search is done
+                selector, available, _bitmap = self._selector(filter)
+                params = self._search_parameters(self.index, selector)
+            if not available:
+                return [(np.empty(0, np.float32), []) for _ in queries]
+
+            k = available if limit is None else min(limit, available)
+            rows = None
+            if self._lists is not None:
+                # on-disk lists are ranked in full and cut afterwards
+                rows = self._disk_search(queries, k, mask)
+            elif min_score is not None:
+                rows = self._range_search(queries, min_score, params)
+            if rows is None:
+                rows = self._knn_search(queries, k, params)
+            return [
+                self._cutoff(scores, ids, min_score, limit, adaptive)
+                for scores, ids in rows
+            ]
+
+    def _disk_search(
+        self, queries: Any, k: int, mask: Optional[Any]
+    ) -> list[tuple[Any, list[Union[int, str]]]]:
+        """
+        Probe the nearest on-disk lists of every query.
+
+        Each probed list is read once per batch, through the list cache,
+        and scored against all the queries that probe it.
+        """
+        lists = cast(InvertedListCache, self._lists)
+        ivf = faiss.extract_index_ivf(self.index)
+        _, assigned = ivf.quantizer.search(queries, ivf.nprobe)
+        deleted = np.fromiter(self._deleted, dtype=np.int64)
+        found_scores: list[list[Any]] = [[] for _ in queries]
+        found_ids: list[list[Any]] = [[] for _ in queries]
+        for list_no in np.unique(assigned[assigned >= 0]).tolist():
+            vectors, ids = lists.get(list_no)
+            keep = ~np.isin(ids, deleted)
+            if mask is not None:
+                keep &= mask[ids]
+            if not keep.all():
+                vectors, ids = vectors[keep], ids[keep]
+            if not len(ids):
+                continue
+            rows = np.flatnonzero((assigned == list_no).any(axis=1))
+            scores = queries[rows] @ vectors.T
+            if self.metric == 'l2':
+                # -|q - x|^2 = 2 q.x - |x|^2 - |q|^2
+                scores *= 2
+                scores -= np.einsum('ij,ij->i', vectors, vectors)
+                scores -= np.einsum('ij,ij->i', queries[rows], queries[rows])[
+                    :, None
+                ]
+            for row, row_scores in zip(rows.tolist(), scores):
+                found_scores[row].append(row_scores)
+                found_ids[row].append(ids)
+
+        results = []
+        for row_scores, row_ids in zip(found_scores, found_ids):
+            scores = np.concatenate(row_scores or [np.empty(0, np.float32)])
+            ids = np.concatenate(row_ids or [np.empty(0, np.int64)])
+            if k < len(scores):
+                best = np.argpartition(-scores, k - 1)[:k]
+                scores, ids = scores[best], ids[best]
+            order = np.argsort(-scores, kind='stable')
+            results.append(
+                (
+                    scores[order],
+                    [self._external[id_] for id_ in ids[order].tolist()],
+                )
+            )
+        return results
+
+    def _knn_search(
+        self, queries: Any, k: int, params: Any
+    ) -> list[tuple[Any, list[Union[int, str]]]]:
+        """Run a k-nearest-neighbour search and translate the ids."""
+        fetch_k = k
+        if params is None:
+            # over-fetch so removed-but-not-compacted vectors are skipped
+            fetch_k = min(k + len(self._deleted), self.index.ntotal)
+        scores, indices = self.index.search(queries, fetch_k, params=params)
+        if self.metric == 'l2':
+            scores = -scores
+        return [
+            self._translate(row_scores, row_indices, k)
+            for row_scores, row_indices in zip(scores, indices)
+        ]
+
+    def _range_search(
+        self, queries: Any, min_score: float, params: Any
+    ) -> Optional[list[tuple[Any, list[Union[int, str]]]]]:
+        """
+        Return every hit scoring at least `min_score`, best first.
+
+        Returns None when the index does not implement range search.
+        """
+        # faiss radii are squared distances for L2, similarities otherwise
+        radius = -min_score if self.metric == 'l2' else min_score
+        if self.metric == 'l2' and radius <= 0:
+            return [(np.empty(0, np.float32), []) for _ in queries]
+        try:
+            limits, scores, indices = self.index.range_search(
+                queries, radius, params=params
+            )
+        except RuntimeError:
+            return None
+        if self.metric == 'l2':
+            scores = -scores
+
+        rows = []
+        for start, stop in zip(limits[:-1], limits[1:]):
+            order = np.argsort(-scores[start:stop], kind='stable')
+            rows.append(
+                self._translate(
+                    scores[start:stop][order],
+                    indices[start:stop][order],
+                    len(order),
+                )
+            )
+        return rows
+
+    def _translate(
+        self, scores: Any, indices: Any, top_k: int
+    ) -> tuple[Any, list[Union[int, str]]]:
+        """Map one row of internal ids to external ids, skipping removals."""
+        result_ids: list[Union[int, str]] = []
+        keep: list[int] = []
+        for position, internal_id in enumerate(indices.tolist()):
+            external_id = self._external.get(internal_id)
+            if external_id is None:
+                continue
+            result_ids.append(external_id)
+            keep.append(position)
+            if len(result_ids) == top_k:
+                break
+        return scores[keep], result_ids
+
+    def _settings(self) -> dict[str, Any]:
+        """Return the constructor arguments needed to restore this DB."""
+        return {
+            'index_factory': self.index_factory,
+            'train_size': self.train_size,
+            'seed': self.seed,
+            'metric': self.metric,
+            'dtype': self.dtype,
+            'on_disk': str(self.on_disk) if self.on_disk else None,
+            'memory_budget': self.memory_budget,
+            **self.search_params,
+        }
+
+    @staticmethod
+    def _settings_path(path: Path) -> Path:
+        return path.with_name(f'{path.name}.json')
+
+    @staticmethod
+    def _metadata_path(path: Path) -> Path:
+        return path.with_name(f'{path.name}.metadata.json')
+
+    def save(self, path: Union[Path, str]) -> None:
+        """
+        Write the index to `path` and its settings and ids to `<path>.json`.
+
+        Chunk metadata goes column by column to `<path>.metadata.json`.
+
+        Both files are written to a temporary name first and renamed, so
+        readers never see a partially written index.
+        """
+        if self.index is None:
+            raise ValueError('There is no index to save.')
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            tmp_path = path.with_name(f'{path.name}.tmp')
+            faiss.write_index(self.index, str(tmp_path))
+            os.replace(tmp_path, path)
+
+            state = {
+                'settings': self._settings(),
+                'ids': list(self._internal.items()),
+                'deleted': sorted(self._deleted),
+                'next_id': self._next_id,
+                'tuning': self.tuning,
+            }
+            settings_path = self._settings_path(path)
+            tmp_path = settings_path.with_name(f'{settings_path.name}.tmp')
+            tmp_path.write_text(json.dumps(state))
+            os.replace(tmp_path, settings_path)
+
+            metadata_path = self._metadata_path(path)
+            tmp_path = metadata_path.with_name(f'{metadata_path.name}.tmp')
+            tmp_path.write_text(json.dumps(self._metadata.columns))
+            os.replace(tmp_path, metadata_path)
+
+    @staticmethod
+    def _read_index(path: Path, mmap: bool) -> Any:
+        if not mmap:
+            return faiss.read_index(str(path))
+        try:
+            return faiss.read_index(str(path), MMAP_FLAGS | MMAP_FLAT_FLAGS)
+        except RuntimeError:
+            # inverted-list indexes reject the flat-codes mapping
+            return faiss.read_index(str(path), MMAP_FLAGS)
+
+    @classmethod
+    def load(cls, path: Union[Path, str], mmap: bool = True) -> FaissDB:
+        """
+        Load an index written by `save`.
+
+        With `mmap=True` the index data is memory-mapped read-only, so
+        several processes loading the same file share it through the page
+        cache and start without reading it into memory.
+
+        An `on_disk` index refers to its list file, which `save` does not
+        copy; it is loaded writable whatever `mmap` says.
+        """
+        path = Path(path)
+        state = json.loads(cls._settings_path(path).read_text())
+
+        db = cls(**state['settings'])
+        if db.on_disk is None:
+            db.index = cls._read_index(path, mmap)
+            db.read_only = mmap
+        else:
+            # the lists stay in their own file, which faiss maps itself
+            db.index = faiss.read_index(str(path))
+            db._lists = db._list_cache(db.index)
+        db._internal = {
+            external_id: internal_id
+            for external_id, internal_id in state['ids']
+        }
+        db._external = {
+            internal_id: external_id
+            for external_id, internal_id in state['ids']
+        }
+        db._deleted = set(state['deleted'])
+        db._next_id = state['next_id']
+        db.tuning = state.get('tuning')
+        metadata_path = cls._metadata_path(path)
+        if metadata_path.exists():
+            db._metadata = MetadataStore(json.loads(metadata_path.read_text()))
+        db._metadata.resize(db._next_id)
+        db._apply_search_params(db.index)
+        return db
@@ -0,0 +1,217 @@
+"""Columnar per-chunk metadata and filter compilation for vector DBs."""
+
+from __future__ import annotations
+
+import sys
+
+from typing import Any, Iterable, Optional, Sequence
+
+import numpy as np
+
+from typeguard import typechecked
+from typing_extensions import TypeAlias
+
+MetadataType: TypeAlias = dict[str, Any]
+
+# comparison operators of the filter language, shared with chroma `where`
+OPERATORS = {
+    '$eq': np.equal,
+    '$ne': np.not_equal,
+    '$gt': np.greater,
+    '$gte': np.greater_equal,
+    '$lt': np.less,
+    '$lte': np.less_equal,
+}
+
+
+def _value_nbytes(value: Any) -> int:
+    """Return the size of a stored metadata value, 0 for a missing one."""
+    return 0 if value is None else sys.getsizeof(value)
+
+
+def to_chroma_where(filter: MetadataType) -> MetadataType:
+    """
+    Rewrite a filter for chroma, which wants one key per level.
+
+    Several fields, or several operators on one field such as
+    `{'page': {'$gte': 1, '$lte': 5}}`, become clauses of an `$and`.
+    """
+    clauses: list[MetadataType] = []
+    for key, condition in filter.items():
+        if key in ('$and', '$or'):
+            clauses.append(
+                {key: [to_chroma_where(clause) for clause in condition]}
+            )
+        elif isinstance(condition, dict) and len(condition) > 1:
+            clauses.extend(
+                {key: {operator: value}}
+                for operator, value in condition.items()
+            )
+        else:
+            clauses.append({key: condition})
+    return clauses[0] if len(clauses) == 1 else {'$and': clauses}
+
+
+@typechecked
+class MetadataStore:
+    """
+    Per-chunk metadata kept column by column, one row per chunk.
+
+    Every column is a list aligned with the row numbers of the owning
+    database and is turned into a NumPy array the first time a filter
+    reads it, so filters are evaluated as vectorized comparisons over the
+    whole column. Filters use chroma's `where` syntax::
+
+        {'tenant': 'acme', 'page': {'$gte': 3}}
+        {'$or': [{'source': {'$in': ['a.pdf', 'b.pdf']}}, {'page': 1}]}
+
+    Rows without a value for a field never match a condition on it.
+
+    `nbytes` estimates the memory held by the values, kept as a running
+    total as rows are written, so reading it costs nothing.
+    """
+
+    def __init__(self, columns: Optional[dict[str, list[Any]]] = None) -> None:
+        self.columns: dict[str, list[Any]] = columns or {}
+        self.size = 0
+        self._arrays: dict[str, Any] = {}
+        self._value_nbytes = sum(
+            _value_nbytes(value)
+            for column in self.columns.values()
+            for value in column
+        )
+        self.resize(
+            max((len(col) for col in self.columns.values()), default=0)
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Estimated bytes held by the columns and their values."""
+        return 8 * self.size * len(self.columns) + self._value_nbytes
+
+    def resize(self, size: int) -> None:
+        """Grow every column to `size` rows, padding with missing values."""
+        if size <= self.size:
+            return
+        for column in self.columns.values():
+            column.extend([None] * (size - len(column)))
+        self.size = size
+        self._arrays = {}
+
+    def set(
+        self, rows: Sequence[int], metadata: Sequence[MetadataType]
+    ) -> None:
+        """Store the metadata of the given rows, growing the columns."""
+        if len(rows) != len(metadata):
+            raise ValueError('The number of rows and metadata must match.')
+        self.resize(max(rows, default=-1) + 1)
+        for row, fields in zip(rows, metadata):
+            for column in self.columns.values():
+                self._value_nbytes -= _value_nbytes(column[row])
+                column[row] = None
+            for name, value in fields.items():
+                if name not in self.columns:
+                    self.columns[name] = [None] * self.size
+                self.columns[name][row] = value
+                self._value_nbytes += _value_nbytes(value)
+        self._arrays = {}
+
+    def move(self, source: int, target: int) -> None:
+        """Copy the metadata of row `source` into row `target`."""
+        for column in self.columns.values():
+            self._value_nbytes += _value_nbytes(column[source])
+            self._value_nbytes -= _value_nbytes(column[target])
+            column[target] = column[source]
+        self._arrays = {}
+
+    def truncate(self, size: int) -> None:
+        """Drop every row from `size` onwards."""
+        for column in self.columns.values():
+            self._value_nbytes -= sum(map(_value_nbytes, column[size:]))
+            del column[size:]
+        self.size = min(self.size, size)
+        self._arrays = {}
+
+    def get(self, rows: Iterable[int]) -> list[MetadataType]:
+        """Return the metadata of the given rows as dictionaries."""
+        return [
+            {
+                name: column[row]
+                for name, column in self.columns.items()
+                if row < len(column) and column[row] is not None
+            }
+            for row in rows
+        ]
+
+    def _array(self, name: str) -> Any:
+        """Return a column as a NumPy array, float64 when it is numeric."""
+        if name not in self._arrays:
+            column = self.columns.get(name, [None] * self.size)
+            values = [value for value in column if value is not None]
+            numeric = all(
+                isinstance(value, (int, float)) and not isinstance(value, bool)
+                for value in values
+            )
+            if numeric:
+                array = np.array(
+                    [np.nan if value is None else value for value in column],
+                    dtype=np.float64,
+                )
+            else:
+                array = np.empty(len(column), dtype=object)
+                array[:] = column
+            self._arrays[name] = array
+        return self._arrays[name]
+
+    def _compare(self, name: str, operator: str, value: Any) -> Any:
+        """Evaluate one condition on a column, only for rows that have it."""
+        column = self._array(name)
+        if column.dtype == np.float64:
+            present = ~np.isnan(column)
+        else:
+            present = np.fromiter(
+                (item is not None for item in column), bool, len(column)
+            )
+        values = column[present]
+        if operator in ('$in', '$nin'):
+            matches = np.isin(values, list(value))
+            if operator == '$nin':
+                matches = ~matches
+        elif operator in OPERATORS and not (
+            column.dtype == np.float64 and isinstance(value, str)
+        ):
+            matches = OPERATORS[operator](values, value)
+        elif operator in OPERATORS:
+            # a string never equals a number, nor is ordered against one
+            matches = np.full(len(values), operator == '$ne')
+        else:
+            raise ValueError(
+                f"Unknown filter operator '{operator}'. Options: "
+                f'{[*OPERATORS, "$in", "$nin"]}.'
+            )
+        result = np.zeros(len(column), dtype=bool)
+        result[present] = np.asarray(matches, dtype=bool)
+        return result
+
+    def mask(self, filter: MetadataType) -> Any:
+        """Compile a filter into a boolean mask over all the rows."""
+        result = np.ones(self.size, dtype=bool)
+        for key, condition in filter.items():
+            if key == '$and':
+                for clause in condition:
+                    result &= self.mask(clause)
+            elif key == '$or':
+                matches = np.zeros(self.size, dtype=bool)
+                for clause in condition:
+                    matches |= self.mask(clause)
+                result &= matches
+            elif isinstance(condition, dict):
+                for operator, value in condition.items():
+                    result &= self._compare(key, operator, value)
+            else:
+                result &= self._compare(key, '$eq', condition)
+        return result
+
+    def __len__(self) -> int:
+        """Return the number of rows."""
+        return self.size
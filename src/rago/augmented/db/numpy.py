@@ -0,0 +1,442 @@
+"""Brute-force vector database on top of a NumPy matrix."""
+
+from __future__ import annotations
+
+import threading
+
+from pathlib import Path
+from typing import (
+    Any,
+    Iterable,
+    Iterator,
+    Optional,
+    Sequence,
+    Union,
+    cast,
+)
+
+import numpy as np
+
+from typeguard import typechecked
+
+from rago.augmented.db.base import DBBase
+from rago.augmented.db.metadata import MetadataStore, MetadataType
+
+METRICS = ('l2', 'ip', 'cosine')
+DTYPES = {'float32': np.float32, 'float16': np.float16, 'int8': np.int8}
+
+# int8 codes span -127..127, so the scale is symmetric around zero
+INT8_MAX = 127
+
+# rows allocated up front, doubled whenever the matrix is full
+INITIAL_CAPACITY = 1024
+
+
+@typechecked
+class NumpyDB(DBBase):
+    """
+    Exact search over a contiguous NumPy matrix, without native dependencies.
+
+    Queries are scored block by block with a matrix product and the best
+    rows are picked with `np.argpartition`, so memory stays bounded by
+    `block_size` rows whatever the corpus size. It is meant for small and
+    mid-size corpora and as a baseline for the approximate backends.
+
+    Parameters
+    ----------
+    metric : str
+        `'l2'` (the default), `'ip'` (inner product) or `'cosine'`. Scores
+        are "higher is better", as in `FaissDB`.
+    dtype : str
+        Storage type: `'float32'`, `'float16'` or `'int8'`. With `'int8'`
+        every dimension is scaled by its largest absolute value, calibrated
+        over the vectors given to `embed` (or the first `add`); later
+        values outside that range are clipped. Scores are always computed
+        in float32.
+    path : str or Path, optional
+        Keep the matrix in a `np.memmap` file at this path instead of in
+        memory. The file is scratch storage and is recreated on start.
+    block_size : int
+        Number of stored rows scored per matrix product.
+    """
+
+    def __init__(
+        self,
+        metric: str = 'l2',
+        dtype: str = 'float32',
+        path: Optional[Union[Path, str]] = None,
+        block_size: int = 16_384,
+    ) -> None:
+        if metric not in METRICS:
+            raise ValueError(
+                f"Unknown metric '{metric}'. Options: {list(METRICS)}."
+            )
+        if dtype not in DTYPES:
+            raise ValueError(
+                f"Unsupported dtype '{dtype}'. Options: {list(DTYPES)}."
+            )
+        if block_size < 1:
+            raise ValueError('block_size must be a positive integer.')
+        self.metric = metric
+        self.dtype = dtype
+        self.path = Path(path) if path is not None else None
+        self.block_size = block_size
+        self.index = None
+        self._vectors: Any = None
+        self._sq_norms = np.empty(0, dtype=np.float32)
+        self._scale: Any = None
+        self._size = 0
+        self._ids: list[Union[int, str]] = []
+        self._positions: dict[Union[int, str], int] = {}
+        self._metadata = MetadataStore()
+        self._lock = threading.RLock()
+
+    def _prepare(self, vectors: Any) -> Any:
+        """Return vectors as a float32 matrix, normalized for cosine."""
+        converted = np.asarray(vectors, dtype=np.float32)
+        if converted.ndim == 1:
+            converted = converted.reshape(1, -1)
+        if self.metric != 'cosine':
+            return np.ascontiguousarray(converted)
+        norms = np.linalg.norm(converted, axis=1, keepdims=True)
+        np.maximum(norms, np.finfo(np.float32).tiny, out=norms)
+        if np.may_share_memory(converted, vectors):
+            # leave the caller's array untouched
+            return converted / norms
+        converted /= norms
+        return converted
+
+    def _calibrate(self, vectors: Any) -> None:
+        """Set the per-dimension int8 scale from the largest values."""
+        max_abs = np.zeros(vectors.shape[1], dtype=np.float32)
+        for start in range(0, len(vectors), self.block_size):
+            block = self._prepare(vectors[start : start + self.block_size])
+            np.maximum(max_abs, np.abs(block).max(axis=0), out=max_abs)
+        self._scale = np.maximum(
+            max_abs / INT8_MAX, np.finfo(np.float32).tiny
+        ).astype(np.float32)
+
+    def _store(self, start: int, vectors: Any) -> None:
+        """
+        Write vectors into the matrix from row `start`, block by block.
+
+        Each block is converted straight to the storage type, so a float64
+        batch never goes through a full float32 copy on its way to float16
+        or int8.
+        """
+        for offset in range(0, len(vectors), self.block_size):
+            block = self._prepare(vectors[offset : offset + self.block_size])
+            rows = slice(start + offset, start + offset + len(block))
+            if self.dtype == 'int8':
+                codes = block / self._scale
+                np.rint(codes, out=codes)
+                np.clip(codes, -INT8_MAX, INT8_MAX, out=codes)
+                self._vectors[rows] = codes
+            else:
+                self._vectors[rows] = block
+            # norms of the stored values, so rounding is included
+            stored = self._dequantize(self._vectors[rows])
+            self._sq_norms[rows] = np.einsum('ij,ij->i', stored, stored)
+
+    def _dequantize(self, block: Any) -> Any:
+        """Return stored rows as float32 values."""
+        block = np.asarray(block, dtype=np.float32)
+        if self.dtype == 'int8':
+            block *= self._scale
+        return block
+
+    def _allocate(self, capacity: int, dimension: int) -> Any:
+        """Create an empty matrix in memory or in the memmap file."""
+        dtype = DTYPES[self.dtype]
+        if self.path is None:
+            return np.empty((capacity, dimension), dtype=dtype)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        return np.memmap(
+            self.path, dtype=dtype, mode='w+', shape=(capacity, dimension)
+        )
+
+    def _reserve(self, rows: int, dimension: int) -> None:
+        """Make room for `rows` more vectors, doubling the capacity."""
+        if self._vectors is not None and self._vectors.shape[1] != dimension:
+            raise ValueError(
+                f'Expected vectors of dimension {self._vectors.shape[1]}, '
+                f'got {dimension}.'
+            )
+        needed = self._size + rows
+        capacity = 0 if self._vectors is None else len(self._vectors)
+        if needed <= capacity:
+            return
+
+        new_capacity = max(needed, 2 * capacity, INITIAL_CAPACITY)
+        if self.path is None:
+            vectors = self._allocate(new_capacity, dimension)
+            if self._size:
+                vectors[: self._size] = self._vectors[: self._size]
+        else:
+            # grow the file in place and map it again with the new shape
+            if self._vectors is None:
+                vectors = self._allocate(new_capacity, dimension)
+            else:
+                self._vectors.flush()
+                self._vectors = None
+                itemsize = np.dtype(DTYPES[self.dtype]).itemsize
+                with open(self.path, 'r+b') as handle:
+                    handle.truncate(new_capacity * dimension * itemsize)
+                vectors = np.memmap(
+                    self.path,
+                    dtype=DTYPES[self.dtype],
+                    mode='r+',
+                    shape=(new_capacity, dimension),
+                )
+        sq_norms = np.empty(new_capacity, dtype=np.float32)
+        sq_norms[: self._size] = self._sq_norms[: self._size]
+        self._vectors = vectors
+        self._sq_norms = sq_norms
+
+    def _refresh_index(self) -> None:
+        self.index = self._vectors[: self._size]
+
+    def embed(
+        self,
+        documents: Any,
+        metadata: Optional[Sequence[MetadataType]] = None,
+    ) -> None:
+        """Replace the contents with the given vectors, ids 0..n-1."""
+        with self._lock:
+            self._size = 0
+            self._ids = []
+            self._positions = {}
+            self._metadata = MetadataStore()
+            self._vectors = None
+            self._scale = None
+            self.add(list(range(len(documents))), documents, metadata)
+
+    def add(
+        self,
+        ids: Sequence[Union[int, str]],
+        vectors: Any,
+        metadata: Optional[Sequence[MetadataType]] = None,
+    ) -> None:
+        """Append vectors, and optionally their metadata, under stable ids."""
+        # converted to the storage type block by block in `_store`
+        vectors = np.asarray(vectors)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        if len(ids) != len(vectors):
+            raise ValueError('The number of ids and vectors must match.')
+        if len(set(ids)) != len(ids):
+            raise ValueError('Duplicated ids in the same batch.')
+        with self._lock:
+            existing = [id_ for id_ in ids if id_ in self._positions]
+            if existing:
+                raise ValueError(
+                    f'Ids already in the database: {existing[:5]}. '
+                    'Use update() to replace them.'
+                )
+            self._reserve(len(ids), vectors.shape[1])
+            if self.dtype == 'int8' and self._scale is None:
+                self._calibrate(vectors)
+            start, stop = self._size, self._size + len(ids)
+            self._store(start, vectors)
+            for position, id_ in enumerate(ids, start):
+                self._positions[id_] = position
+            self._ids.extend(ids)
+            self._size = stop
+            self._metadata.resize(stop)
+            if metadata is not None:
+                self._metadata.set(list(range(start, stop)), metadata)
+            self._refresh_index()
+
+    def remove(self, ids: Sequence[Union[int, str]]) -> None:
+        """Remove vectors by id, moving the last row into each hole."""
+        with self._lock:
+            for id_ in ids:
+                position = self._positions.pop(id_, None)
+                if position is None:
+                    continue
+                last = self._size - 1
+                if position != last:
+                    moved = self._ids[last]
+                    self._vectors[position] = self._vectors[last]
+                    self._sq_norms[position] = self._sq_norms[last]
+                    self._ids[position] = moved
+                    self._positions[moved] = position
+                    self._metadata.move(last, position)
+                self._ids.pop()
+                self._metadata.truncate(last)
+                self._size = last
+            if self._vectors is not None:
+                self._refresh_index()
+
+    @staticmethod
+    def _top_k(scores: Any, rows: Any, k: int) -> tuple[Any, Any]:
+        """Keep the `k` best scores of every row, in no particular order."""
+        if scores.shape[1] <= k:
+            return scores, rows
+        best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        return (
+            np.take_along_axis(scores, best, axis=1),
+            np.take_along_axis(rows, best, axis=1),
+        )
+
+    def get_metadata(
+        self, ids: Sequence[Union[int, str]]
+    ) -> list[MetadataType]:
+        """Return the metadata stored with the given ids."""
+        with self._lock:
+            return self._metadata.get(self._positions[id_] for id_ in ids)
+
+    def _blocks(self, selected: Optional[Any]) -> Iterator[tuple[Any, Any]]:
+        """
+        Yield `(rows, vectors)` blocks of at most `block_size` rows.
+
+        Without a selection the matrix is read in place, block by block;
+        otherwise only the `selected` rows are gathered.
+        """
+        total = self._size if selected is None else len(selected)
+        for start in range(0, total, self.block_size):
+            stop = min(start + self.block_size, total)
+            if selected is None:
+                rows = np.arange(start, stop, dtype=np.int64)
+                block = self._vectors[start:stop]
+            else:
+                rows = selected[start:stop]
+                block = self._vectors[rows]
+            yield rows, np.asarray(block, dtype=np.float32)
+
+    def _scores(
+        self, queries: Any, selected: Optional[Any]
+    ) -> Iterator[tuple[Any, Any]]:
+        """Yield `(rows, scores)` for every block of candidate rows."""
+        if self.metric == 'l2':
+            query_sq_norms = np.einsum('ij,ij->i', queries, queries)
+        if self.dtype == 'int8':
+            # q.(codes * scale) = (q * scale).codes, scale the queries once
+            queries = queries * self._scale
+        for rows, block in self._blocks(selected):
+            scores = queries @ block.T
+            if self.metric == 'l2':
+                # -|q - x|^2 = 2 q.x - |x|^2 - |q|^2
+                scores *= 2
+                scores -= self._sq_norms[rows]
+                scores -= query_sq_norms[:, None]
+            yield rows, scores
+
+    def search(
+        self,
+        query_encoded: Any,
+        top_k: int = 2,
+        filter: Optional[MetadataType] = None,
+        min_score: Optional[float] = None,
+        max_results: Optional[int] = None,
+        adaptive: bool = False,
+    ) -> tuple[Iterable[float], Iterable[Union[int, str]]]:
+        """Search an encoded query into vector database."""
+        return self.search_many(
+            query_encoded,
+            top_k=top_k,
+            filter=filter,
+            min_score=min_score,
+            max_results=max_results,
+            adaptive=adaptive,
+        )[0]
+
+    def search_many(
+        self,
+        queries_encoded: Any,
+        top_k: int = 2,
+        filter: Optional[MetadataType] = None,
+        min_score: Optional[float] = None,
+        max_results: Optional[int] = None,
+        adaptive: bool = False,
+    ) -> list[tuple[Iterable[float], Iterable[Union[int, str]]]]:
+        """
+        Score all the queries against every block of stored vectors.
+
+        With a `filter`, only the rows whose metadata matches are scored.
+        With `min_score`, rows below it are dropped block by block.
+        """
+        queries = self._prepare(queries_encoded)
+        limit = self._result_limit(top_k, min_score, max_results)
+        with self._lock:
+            selected = None
+            if filter is not None:
+                selected = np.flatnonzero(self._metadata.mask(filter))
+            available = self._size if selected is None else len(selected)
+            if not available or limit == 0:
+                return [(np.empty(0, np.float32), []) for _ in queries]
+
+            if limit is None:
+                best_scores, best_rows = self._range(
+                    queries, selected, cast(float, min_score)
+                )
+            else:
+                best_scores, best_rows = self._nearest(
+                    queries, selected, min(limit, available), min_score
+                )
+            return [
+                self._cutoff(
+                    row_scores,
+                    [self._ids[row] for row in row_positions.tolist()],
+                    min_score,
+                    limit,
+                    adaptive,
+                )
+                for row_scores, row_positions in zip(best_scores, best_rows)
+            ]
+
+    def _nearest(
+        self,
+        queries: Any,
+        selected: Optional[Any],
+        k: int,
+        min_score: Optional[float],
+    ) -> tuple[Any, Any]:
+        """Return the `k` best scores and rows of every query, ranked."""
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        for rows, scores in self._scores(queries, selected):
+            if min_score is not None:
+                scores[scores < min_score] = -np.inf
+            scores, rows = self._top_k(
+                scores, np.broadcast_to(rows, scores.shape), k
+            )
+            best_scores, best_rows = self._top_k(
+                np.concatenate([best_scores, scores], axis=1),
+                np.concatenate([best_rows, rows], axis=1),
+                k,
+            )
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        return (
+            np.take_along_axis(best_scores, order, axis=1),
+            np.take_along_axis(best_rows, order, axis=1),
+        )
+
+    def _range(
+        self, queries: Any, selected: Optional[Any], min_score: float
+    ) -> tuple[list[Any], list[Any]]:
+        """Return every score of at least `min_score` per query, ranked."""
+        found_scores: list[list[Any]] = [[] for _ in queries]
+        found_rows: list[list[Any]] = [[] for _ in queries]
+        for rows, scores in self._scores(queries, selected):
+            query_ids, columns = np.nonzero(scores >= min_score)
+            # hits come out grouped by query, split them per query
+            splits = np.cumsum(np.bincount(query_ids, minlength=len(queries)))
+            hit_scores = np.split(scores[query_ids, columns], splits[:-1])
+            hit_rows = np.split(rows[columns], splits[:-1])
+            for query, (block_scores, block_rows) in enumerate(
+                zip(hit_scores, hit_rows)
+            ):
+                found_scores[query].append(block_scores)
+                found_rows[query].append(block_rows)
+
+        ranked_scores, ranked_rows = [], []
+        for query_scores, query_rows in zip(found_scores, found_rows):
+            row_scores = np.concatenate(query_scores or [np.empty(0)])
+            row_rows = np.concatenate(
+                query_rows or [np.empty(0, dtype=np.int64)]
+            )
+            order = np.argsort(-row_scores, kind='stable')
+            ranked_scores.append(row_scores[order].astype(np.float32))
+            ranked_rows.append(row_rows[order])
+        return ranked_scores, ranked_rows
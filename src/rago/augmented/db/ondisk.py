@@ -0,0 +1,84 @@
+"""Memory-bounded reader for the inverted lists of an on-disk IVF index."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any
+
+import numpy as np
+
+from typeguard import typechecked
+
+
+@typechecked
+class InvertedListCache:
+    """
+    Read IVF lists from a faiss list file, caching them within a budget.
+
+    Faiss `OnDiskInvertedLists` keep every list in one file: list `i`
+    starts at `lists[i].offset` with `capacity` codes followed by
+    `capacity` int64 ids. Lists are read with plain file reads rather than
+    through faiss' memory map, so the lists held in memory are exactly the
+    ones cached here, least recently used first out.
+
+    Parameters
+    ----------
+    invlists : faiss.OnDiskInvertedLists
+        The lists of an `IndexIVFFlat`.
+    dimension : int
+        Vector dimension; codes are raw float32 vectors.
+    budget : int
+        Bytes of lists kept in memory. A list larger than the budget is
+        read on every use.
+    """
+
+    def __init__(self, invlists: Any, dimension: int, budget: int) -> None:
+        if budget < 0:
+            raise ValueError('memory_budget must not be negative.')
+        self.invlists = invlists
+        self.dimension = dimension
+        self.budget = budget
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lists: OrderedDict[int, tuple[Any, Any]] = OrderedDict()
+
+    def _read(self, list_no: int) -> tuple[Any, Any]:
+        """Read the vectors and ids of one list from the file."""
+        info = self.invlists.lists.at(list_no)
+        with open(self.invlists.filename, 'rb') as handle:
+            handle.seek(info.offset)
+            vectors = np.fromfile(
+                handle, dtype=np.float32, count=info.size * self.dimension
+            )
+            handle.seek(info.offset + info.capacity * self.invlists.code_size)
+            ids = np.fromfile(handle, dtype=np.int64, count=info.size)
+        return vectors.reshape(-1, self.dimension), ids
+
+    def get(self, list_no: int) -> tuple[Any, Any]:
+        """Return `(vectors, ids)` of a list, from the cache if possible."""
+        cached = self._lists.get(list_no)
+        if cached is not None:
+            self.hits += 1
+            self._lists.move_to_end(list_no)
+            return cached
+
+        self.misses += 1
+        entry = self._read(list_no)
+        size = entry[0].nbytes + entry[1].nbytes
+        if size <= self.budget:
+            self._lists[list_no] = entry
+            self.nbytes += size
+            while self.nbytes > self.budget:
+                _, (vectors, ids) = self._lists.popitem(last=False)
+                self.nbytes -= vectors.nbytes + ids.nbytes
+        return entry
+
+    def clear(self) -> None:
+        """Forget every cached list, e.g. after the lists changed."""
+        self._lists.clear()
+        self.nbytes = 0
+
+    def __len__(self) -> int:
+        """Return the number of cached lists."""
+        return len(self._lists)
@@ -0,0 +1,310 @@
+"""Scatter-gather vector database over several in-process shards."""
+
+from __future__ import annotations
+
+import heapq
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import Any, Callable, Iterable, Optional, Sequence, Union
+
+import numpy as np
+
+from typeguard import typechecked
+
+from rago.augmented.db.base import DBBase
+from rago.augmented.db.metadata import MetadataType
+
+
+def _default_factory() -> DBBase:
+    from rago.augmented.db.faiss import FaissDB
+
+    return FaissDB()
+
+
+@typechecked
+class ShardedDB(DBBase):
+    """
+    Partition vectors across several shards and search them in parallel.
+
+    Each query batch is scattered to every shard on its own thread (faiss
+    and NumPy release the GIL while they search), and the per-shard top-k
+    lists are merged with a heap. Shard scores must be "higher is better",
+    as returned by every rago backend.
+
+    New vectors go to the emptiest shard, so shards stay balanced as they
+    grow and a shard added later fills up first.
+
+    Parameters
+    ----------
+    num_shards : int
+        Number of shards to create with `factory`, when `shards` is not
+        given.
+    factory : callable, optional
+        Create an empty shard. Defaults to an exact `FaissDB`. It is also
+        used to recreate the shards when `embed` replaces the contents.
+    shards : list of DBBase, optional
+        Empty shards to start with, instead of calling `factory`.
+    max_workers : int, optional
+        Threads used to fan out searches and writes. Defaults to one per
+        shard.
+    """
+
+    def __init__(
+        self,
+        num_shards: int = 2,
+        factory: Optional[Callable[[], DBBase]] = None,
+        shards: Optional[list[DBBase]] = None,
+        max_workers: Optional[int] = None,
+    ) -> None:
+        self.factory = factory or _default_factory
+        self.shards: list[DBBase] = (
+            list(shards)
+            if shards is not None
+            else [self.factory() for _ in range(num_shards)]
+        )
+        if not self.shards:
+            raise ValueError('ShardedDB needs at least one shard.')
+        self.max_workers = max_workers
+        self.index = self.shards
+        self._sizes = [0] * len(self.shards)
+        self._owner: dict[Union[int, str], DBBase] = {}
+        self._lock = threading.RLock()
+        self._pool = self._create_pool()
+
+    def _create_pool(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(
+            max_workers=self.max_workers or len(self.shards),
+            thread_name_prefix='rago-shard',
+        )
+
+    def _resize_pool(self) -> None:
+        if self.max_workers is None:
+            # searches in flight keep the old pool, whose threads exit once
+            # it is garbage collected
+            self._pool = self._create_pool()
+
+    def add_shard(self, shard: Optional[DBBase] = None) -> DBBase:
+        """Add an empty shard, created by `factory` unless one is given."""
+        shard = shard or self.factory()
+        with self._lock:
+            self.shards.append(shard)
+            self._sizes.append(0)
+            self._resize_pool()
+        return shard
+
+    def remove_shard(self, shard: DBBase) -> None:
+        """
+        Detach a shard; its vectors are no longer searched.
+
+        The shard itself is left untouched, so its contents can be moved
+        elsewhere by the caller.
+        """
+        with self._lock:
+            if len(self.shards) == 1:
+                raise ValueError('Cannot remove the last shard.')
+            position = self.shards.index(shard)
+            del self.shards[position]
+            del self._sizes[position]
+            self._owner = {
+                id_: owner
+                for id_, owner in self._owner.items()
+                if owner is not shard
+            }
+            self._resize_pool()
+
+    def _assign(self, count: int) -> list[int]:
+        """Return the shard position for each of `count` new vectors."""
+        sizes = list(self._sizes)
+        heap = [(size, position) for position, size in enumerate(sizes)]
+        heapq.heapify(heap)
+        targets = []
+        for _ in range(count):
+            size, position = heapq.heappop(heap)
+            targets.append(position)
+            heapq.heappush(heap, (size + 1, position))
+        return targets
+
+    def embed(
+        self,
+        documents: Any,
+        metadata: Optional[Sequence[MetadataType]] = None,
+    ) -> None:
+        """Replace the contents with new shards holding ids 0..n-1."""
+        with self._lock:
+            self.shards = [self.factory() for _ in self.shards]
+            self.index = self.shards
+            self._sizes = [0] * len(self.shards)
+            self._owner = {}
+            self.add(list(range(len(documents))), documents, metadata)
+
+    def add(
+        self,
+        ids: Sequence[Union[int, str]],
+        vectors: Any,
+        metadata: Optional[Sequence[MetadataType]] = None,
+    ) -> None:
+        """Spread new vectors over the shards, filling the emptiest first."""
+        if len(ids) != len(vectors):
+            raise ValueError('The number of ids and vectors must match.')
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            existing = [id_ for id_ in ids if id_ in self._owner]
+            if existing:
+                raise ValueError(
+                    f'Ids already in the database: {existing[:5]}. '
+                    'Use update() to replace them.'
+                )
+            targets = np.asarray(self._assign(len(ids)))
+            jobs = []
+            for position, shard in enumerate(self.shards):
+                rows = np.flatnonzero(targets == position)
+                if not len(rows):
+                    continue
+                shard_ids = [ids[row] for row in rows.tolist()]
+                shard_metadata = (
+                    None
+                    if metadata is None
+                    else [metadata[row] for row in rows.tolist()]
+                )
+                jobs.append(
+                    self._pool.submit(
+                        shard.add, shard_ids, vectors[rows], shard_metadata
+                    )
+                )
+                self._sizes[position] += len(rows)
+                for id_ in shard_ids:
+                    self._owner[id_] = shard
+            for job in jobs:
+                job.result()
+
+    def _group(
+        self, ids: Sequence[Union[int, str]]
+    ) -> dict[int, list[Union[int, str]]]:
+        """Group known ids by the position of the shard that holds them."""
+        positions = {id(shard): i for i, shard in enumerate(self.shards)}
+        groups: dict[int, list[Union[int, str]]] = {}
+        for id_ in ids:
+            owner = self._owner.get(id_)
+            if owner is not None:
+                groups.setdefault(positions[id(owner)], []).append(id_)
+        return groups
+
+    def remove(self, ids: Sequence[Union[int, str]]) -> None:
+        """Remove vectors by id from the shards that hold them."""
+        with self._lock:
+            groups = self._group(ids)
+            jobs = [
+                self._pool.submit(self.shards[position].remove, group)
+                for position, group in groups.items()
+            ]
+            for job in jobs:
+                job.result()
+            for position, group in groups.items():
+                self._sizes[position] -= len(group)
+                for id_ in group:
+                    del self._owner[id_]
+
+    def _compact(self) -> None:
+        with self._lock:
+            jobs = [self._pool.submit(shard._compact) for shard in self.shards]
+            for job in jobs:
+                job.result()
+
+    def get_metadata(
+        self, ids: Sequence[Union[int, str]]
+    ) -> list[MetadataType]:
+        """Return the metadata stored with the given ids."""
+        with self._lock:
+            found: dict[Union[int, str], MetadataType] = {}
+            for position, group in self._group(ids).items():
+                shard_metadata = self.shards[position].get_metadata(group)
+                found.update(zip(group, shard_metadata))
+            return [found[id_] for id_ in ids]
+
+    def search(
+        self,
+        query_encoded: Any,
+        top_k: int = 2,
+        filter: Optional[MetadataType] = None,
+        min_score: Optional[float] = None,
+        max_results: Optional[int] = None,
+        adaptive: bool = False,
+    ) -> tuple[Iterable[float], Iterable[Union[int, str]]]:
+        """Search an encoded query into vector database."""
+        return self.search_many(
+            query_encoded,
+            top_k=top_k,
+            filter=filter,
+            min_score=min_score,
+            max_results=max_results,
+            adaptive=adaptive,
+        )[0]
+
+    def search_many(
+        self,
+        queries_encoded: Any,
+        top_k: int = 2,
+        filter: Optional[MetadataType] = None,
+        min_score: Optional[float] = None,
+        max_results: Optional[int] = None,
+        adaptive: bool = False,
+    ) -> list[tuple[Iterable[float], Iterable[Union[int, str]]]]:
+        """
+        Scatter the queries to every shard and merge the top-k lists.
+
+        `min_score` and `max_results` are applied by every shard; the
+        adaptive cut needs the merged ranking, so it is applied here.
+        """
+        queries = np.asarray(queries_encoded, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries.reshape(1, -1)
+        with self._lock:
+            # searches run on a snapshot, without holding the lock
+            shards = [
+                shard for shard, size in zip(self.shards, self._sizes) if size
+            ]
+            pool = self._pool
+        options: dict[str, Any] = {
+            name: value
+            for name, value in (
+                ('filter', filter),
+                ('min_score', min_score),
+                ('max_results', max_results),
+            )
+            if value is not None
+        }
+        jobs = [
+            pool.submit(shard.search_many, queries, top_k=top_k, **options)
+            for shard in shards
+        ]
+        per_shard = [job.result() for job in jobs]
+
+        limit = self._result_limit(top_k, min_score, max_results)
+        results: list[tuple[Iterable[float], Iterable[Union[int, str]]]] = []
+        for row in range(len(queries)):
+            candidates = list(
+                chain.from_iterable(
+                    zip(
+                        np.asarray(shard_results[row][0]).tolist(),
+                        shard_results[row][1],
+                    )
+                    for shard_results in per_shard
+                )
+            )
+            best = heapq.nlargest(
+                len(candidates) if limit is None else limit,
+                candidates,
+                key=lambda item: item[0],
+            )
+            results.append(
+                self._cutoff(
+                    np.array([score for score, _ in best], dtype=np.float32),
+                    [id_ for _, id_ in best],
+                    min_score,
+                    limit,
+                    adaptive,
+                )
+            )
+        return results
@@ -0,0 +1,397 @@
+"""Durable single-file vector and chunk store on top of SQLite."""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence, Union
+
+import numpy as np
+
+from typeguard import typechecked
+
+from rago.augmented.db.base import DBBase
+from rago.augmented.db.metadata import MetadataType
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    id TEXT PRIMARY KEY,
+    text TEXT,
+    metadata TEXT,
+    vector BLOB NOT NULL
+)
+"""
+
+
+def _default_factory() -> DBBase:
+    from rago.augmented.db.numpy import NumpyDB
+
+    return NumpyDB()
+
+
+@typechecked
+class SQLiteDB(DBBase):
+    """
+    Keep chunks, metadata and vectors in one SQLite file.
+
+    SQLite is the source of truth: every write is a transaction, so an
+    interrupted ingestion leaves the file as it was before the batch. The
+    search index is built from the file on the first search, cached, and
+    kept in step with later writes, so a restart only costs reading the
+    vectors back.
+
+    Ids keep their type (int or str) across restarts. The index is built
+    with a single `embed` of every stored vector, so indexes that train
+    (IVF) or calibrate (int8) see the whole corpus; its positions are
+    mapped back to the stored ids. The database runs in WAL mode, so
+    readers in other processes are not blocked by writes.
+
+    Parameters
+    ----------
+    path : str or Path
+        The SQLite file, created if missing.
+    factory : callable, optional
+        Create the empty in-memory search index. Defaults to `NumpyDB`.
+    batch_size : int
+        Rows per `executemany` call and per read while building the index.
+    """
+
+    def __init__(
+        self,
+        path: Union[Path, str],
+        factory: Optional[Callable[[], DBBase]] = None,
+        batch_size: int = 1_000,
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError('batch_size must be a positive integer.')
+        self.path = Path(path)
+        self.factory = factory or _default_factory
+        self.batch_size = batch_size
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        # WAL keeps committed transactions durable without a sync per write
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(SCHEMA)
+        self._conn.commit()
+        self._lock = threading.RLock()
+        self._search_db: Optional[DBBase] = None
+        # stored id of each position of the search index, and back
+        self._ids: list[Union[int, str]] = []
+        self._positions: dict[Union[int, str], int] = {}
+
+    @property
+    def index(self) -> Any:
+        """The index of the cached search database, if built."""
+        return None if self._search_db is None else self._search_db.index
+
+    def close(self) -> None:
+        """Close the SQLite connection."""
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        """Return the number of stored chunks."""
+        with self._lock:
+            return int(
+                self._conn.execute('SELECT COUNT(*) FROM chunks').fetchone()[0]
+            )
+
+    def _rows(
+        self,
+        ids: Sequence[Union[int, str]],
+        vectors: Any,
+        metadata: Optional[Sequence[MetadataType]],
+        texts: Optional[Sequence[str]],
+    ) -> Iterator[tuple[str, Optional[str], Optional[str], bytes]]:
+        for position, id_ in enumerate(ids):
+            yield (
+                json.dumps(id_),
+                None if texts is None else texts[position],
+                None if metadata is None else json.dumps(metadata[position]),
+                vectors[position].tobytes(),
+            )
+
+    def _insert(
+        self,
+        ids: Sequence[Union[int, str]],
+        vectors: Any,
+        metadata: Optional[Sequence[MetadataType]],
+        texts: Optional[Sequence[str]],
+    ) -> None:
+        """Insert rows in batches, inside the caller's transaction."""
+        rows = self._rows(ids, vectors, metadata, texts)
+        while batch := list(islice(rows, self.batch_size)):
+            try:
+                self._conn.executemany(
+                    'INSERT INTO chunks (id, text, metadata, vector) '
+                    'VALUES (?, ?, ?, ?)',
+                    batch,
+                )
+            except sqlite3.IntegrityError as exc:
+                raise ValueError(
+                    'Ids already in the database or duplicated in the '
+                    'batch. Use update() to replace them.'
+                ) from exc
+
+    def _delete(self, ids: Sequence[Union[int, str]]) -> None:
+        keys = [json.dumps(id_) for id_ in ids]
+        self._conn.executemany(
+            'DELETE FROM chunks WHERE id = ?', [(key,) for key in keys]
+        )
+
+    @staticmethod
+    def _check(
+        ids: Sequence[Union[int, str]],
+        vectors: Any,
+        texts: Optional[Sequence[str]],
+    ) -> Any:
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        if len(ids) != len(vectors):
+            raise ValueError('The number of ids and vectors must match.')
+        if texts is not None and len(texts) != len(ids):
+            raise ValueError('The number of ids and texts must match.')
+        return vectors
+
+    def embed(
+        self,
+        documents: Any,
+        metadata: Optional[Sequence[MetadataType]] = None,
+        texts: Optional[Sequence[str]] = None,
+    ) -> None:
+        """
+        Replace the contents with the given vectors, ids 0..n-1.
+
+        `texts` are the chunks the vectors were computed from, stored with
+        them and returned by `get_texts`.
+        """
+        ids = list(range(len(documents)))
+        vectors = self._check(ids, documents, texts)
+        with self._lock:
+            with self._conn:
+                self._conn.execute('DELETE FROM chunks')
+                self._insert(ids, vectors, metadata, texts)
+            self._search_db = None
+
+    def embed_texts(
+        self,
+        vectors: Any,
+        texts: Sequence[str],
+        metadata: Optional[Sequence[MetadataType]] = None,
+    ) -> None:
+        """Embed vectors and store the `texts` they were computed from."""
+        self.embed(vectors, metadata, texts=texts)
+
+    def add(
+        self,
+        ids: Sequence[Union[int, str]],
+        vectors: Any,
+        metadata: Optional[Sequence[MetadataType]] = None,
+        texts: Optional[Sequence[str]] = None,
+    ) -> None:
+        """Add vectors in one transaction; a failing batch adds nothing."""
+        vectors = self._check(ids, vectors, texts)
+        with self._lock:
+            with self._conn:
+                self._insert(ids, vectors, metadata, texts)
+            if self._search_db is not None:
+                self._search_db.add(self._append(ids), vectors, metadata)
+
+    def add_texts(
+        self,
+        ids: Sequence[Union[int, str]],
+        vectors: Any,
+        texts: Sequence[str],
+        metadata: Optional[Sequence[MetadataType]] = None,
+    ) -> None:
+        """Add vectors and the `texts` they were computed from."""
+        self.add(ids, vectors, metadata, texts=texts)
+
+    def remove(self, ids: Sequence[Union[int, str]]) -> None:
+        """Remove vectors by id."""
+        with self._lock:
+            with self._conn:
+                self._delete(ids)
+            if self._search_db is not None:
+                self._search_db.remove(self._forget(ids))
+
+    def update(
+        self,
+        ids: Sequence[Union[int, str]],
+        vectors: Any,
+        metadata: Optional[Sequence[MetadataType]] = None,
+        texts: Optional[Sequence[str]] = None,
+    ) -> None:
+        """Replace the rows stored under the given ids in one transaction."""
+        vectors = self._check(ids, vectors, texts)
+        with self._lock:
+            with self._conn:
+                self._delete(ids)
+                self._insert(ids, vectors, metadata, texts)
+            if self._search_db is not None:
+                self._search_db.remove(self._forget(ids))
+                self._search_db.add(self._append(ids), vectors, metadata)
+
+    def _append(self, ids: Sequence[Union[int, str]]) -> list[int]:
+        """Give new ids the next positions of the search index."""
+        positions = list(range(len(self._ids), len(self._ids) + len(ids)))
+        self._ids.extend(ids)
+        self._positions.update(zip(ids, positions))
+        return positions
+
+    def _forget(self, ids: Sequence[Union[int, str]]) -> list[int]:
+        """Return the positions of the ids, dropping them from the map."""
+        return [
+            self._positions.pop(id_) for id_ in ids if id_ in self._positions
+        ]
+
+    def _compact(self) -> None:
+        with self._lock:
+            if self._search_db is not None:
+                self._search_db._compact()
+            self._conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    def _select(
+        self, column: str, ids: Sequence[Union[int, str]]
+    ) -> list[Any]:
+        """Return one column for the given ids, in the order given."""
+        keys = [json.dumps(id_) for id_ in ids]
+        found: dict[str, Any] = {}
+        with self._lock:
+            for start in range(0, len(keys), self.batch_size):
+                batch = keys[start : start + self.batch_size]
+                placeholders = ', '.join('?' * len(batch))
+                found.update(
+                    self._conn.execute(
+                        f'SELECT id, {column} FROM chunks '
+                        f'WHERE id IN ({placeholders})',
+                        batch,
+                    ).fetchall()
+                )
+        missing = [id_ for id_, key in zip(ids, keys) if key not in found]
+        if missing:
+            raise KeyError(f'Ids not in the database: {missing[:5]}.')
+        return [found[key] for key in keys]
+
+    def get_metadata(
+        self, ids: Sequence[Union[int, str]]
+    ) -> list[MetadataType]:
+        """Return the metadata stored with the given ids."""
+        return [
+            json.loads(value) if value else {}
+            for value in self._select('metadata', ids)
+        ]
+
+    def get_texts(self, ids: Sequence[Union[int, str]]) -> list[str]:
+        """Return the chunk texts stored with the given ids."""
+        return [value or '' for value in self._select('text', ids)]
+
+    def texts(self) -> list[str]:
+        """
+        Return every chunk text ordered by id.
+
+        Integer ids come first, in numeric order, then string ids, so after
+        `embed` this is the order of ids 0..n-1 even once rows have been
+        updated, e.g. to restore an augmentation step with
+        `attach_index(db.texts())` after a restart.
+        """
+        with self._lock:
+            rows = self._conn.execute('SELECT id, text FROM chunks').fetchall()
+        keyed = [(json.loads(key), text) for key, text in rows]
+        keyed.sort(key=lambda row: (isinstance(row[0], str), row[0]))
+        return [text or '' for _, text in keyed]
+
+    def _load(self) -> tuple[DBBase, list[Union[int, str]]]:
+        """
+        Return the search database and the id of each of its positions.
+
+        The database is built from the file once, then kept in step with
+        later writes.
+        """
+        with self._lock:
+            if self._search_db is not None:
+                return self._search_db, self._ids
+            size = len(self)
+            cursor = self._conn.execute(
+                'SELECT id, metadata, vector FROM chunks ORDER BY rowid'
+            )
+            ids: list[Union[int, str]] = []
+            metadata: list[MetadataType] = []
+            vectors: Any = None
+            while rows := cursor.fetchmany(self.batch_size):
+                block = np.frombuffer(
+                    b''.join(blob for _, _, blob in rows), dtype=np.float32
+                ).reshape(len(rows), -1)
+                if vectors is None:
+                    vectors = np.empty((size, block.shape[1]), np.float32)
+                vectors[len(ids) : len(ids) + len(rows)] = block
+                ids.extend(json.loads(key) for key, _, _ in rows)
+                metadata.extend(
+                    json.loads(value) if value else {} for _, value, _ in rows
+                )
+            search_db = self.factory()
+            if ids:
+                search_db.embed(vectors, metadata)
+            self._ids = ids
+            self._positions = {
+                id_: position for position, id_ in enumerate(ids)
+            }
+            self._search_db = search_db
+            return search_db, ids
+
+    @staticmethod
+    def _to_ids(
+        result: tuple[Iterable[float], Iterable[Any]],
+        ids: list[Union[int, str]],
+    ) -> tuple[Iterable[float], Iterable[Union[int, str]]]:
+        """Map the positions of a search result back to stored ids."""
+        scores, positions = result
+        return scores, [ids[int(position)] for position in positions]
+
+    def search(
+        self,
+        query_encoded: Any,
+        top_k: int = 2,
+        filter: Optional[MetadataType] = None,
+        min_score: Optional[float] = None,
+        max_results: Optional[int] = None,
+        adaptive: bool = False,
+    ) -> tuple[Iterable[float], Iterable[Union[int, str]]]:
+        """Search the cached index, building it first if needed."""
+        search_db, ids = self._load()
+        result = search_db.search(
+            query_encoded,
+            top_k=top_k,
+            filter=filter,
+            min_score=min_score,
+            max_results=max_results,
+            adaptive=adaptive,
+        )
+        return self._to_ids(result, ids)
+
+    def search_many(
+        self,
+        queries_encoded: Any,
+        top_k: int = 2,
+        filter: Optional[MetadataType] = None,
+        min_score: Optional[float] = None,
+        max_results: Optional[int] = None,
+        adaptive: bool = False,
+    ) -> list[tuple[Iterable[float], Iterable[Union[int, str]]]]:
+        """Search several queries on the cached index."""
+        search_db, ids = self._load()
+        results = search_db.search_many(
+            queries_encoded,
+            top_k=top_k,
+            filter=filter,
+            min_score=min_score,
+            max_results=max_results,
+            adaptive=adaptive,
+        )
+        return [self._to_ids(result, ids) for result in results]
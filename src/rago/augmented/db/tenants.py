@@ -0,0 +1,363 @@
+"""Per-tenant vector databases within a shared memory budget."""
+
+from __future__ import annotations
+
+import sys
+import threading
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional, Sequence, Union
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+from typeguard import typechecked
+
+from rago.augmented.db.base import DBBase
+from rago.augmented.db.metadata import MetadataStore, MetadataType
+
+
+def _default_factory() -> DBBase:
+    from rago.augmented.db.faiss import FaissDB
+
+    return FaissDB()
+
+
+def _default_loader(path: Path) -> DBBase:
+    from rago.augmented.db.faiss import FaissDB
+
+    # tenants keep taking writes after a reload, so no read-only mapping
+    return FaissDB.load(path, mmap=False)
+
+
+def _faiss_nbytes(faiss: Any, index: Any) -> int:
+    """
+    Estimate the bytes held by a faiss index from its size and layout.
+
+    Codes take `ntotal * code_size`; id maps, inverted lists and HNSW
+    links add their ids, and wrapped indexes are counted recursively.
+    """
+    index = faiss.downcast_index(index)
+    ntotal = int(index.ntotal)
+    if isinstance(index, faiss.IndexIDMap):
+        # IndexIDMap2 also keeps a reverse hash map
+        per_id = 40 if isinstance(index, faiss.IndexIDMap2) else 8
+        return per_id * ntotal + _faiss_nbytes(faiss, index.index)
+    if isinstance(index, faiss.IndexPreTransform):
+        return _faiss_nbytes(faiss, index.index)
+    if isinstance(index, faiss.IndexRefine):
+        return _faiss_nbytes(faiss, index.base_index) + _faiss_nbytes(
+            faiss, index.refine_index
+        )
+    if isinstance(index, faiss.IndexHNSW):
+        links = 4 * int(index.hnsw.neighbors.size())
+        return links + 8 * ntotal + _faiss_nbytes(faiss, index.storage)
+    nbytes = ntotal * int(getattr(index, 'code_size', 0))
+    if isinstance(index, faiss.IndexIVF):
+        nbytes += 8 * ntotal + _faiss_nbytes(faiss, index.quantizer)
+    return nbytes
+
+
+def index_nbytes(db: DBBase) -> int:
+    """
+    Estimate the bytes held by the index and metadata of `db`.
+
+    NumPy indexes report the buffer they view, spare capacity included;
+    faiss indexes are estimated from `ntotal` and their code size,
+    without copying them. The id maps and the metadata of the database
+    are added, so both count towards a tenant's quota. The estimate costs
+    the same whatever the index size, so it can run after every write.
+    """
+    index = db.index
+    if index is None:
+        return 0
+    if isinstance(index, np.ndarray):
+        # NumpyDB serves a view of a buffer grown ahead of its size
+        buffer = index.base if isinstance(index.base, np.ndarray) else index
+        nbytes = int(buffer.nbytes)
+    else:
+        faiss = sys.modules.get('faiss')
+        if faiss is None or not isinstance(index, faiss.Index):
+            raise TypeError(
+                f'Cannot measure the index of {db.__class__.__name__}.'
+            )
+        nbytes = _faiss_nbytes(faiss, index)
+    for name in ('_internal', '_external', '_ids', '_positions'):
+        ids = getattr(db, name, None)
+        if isinstance(ids, (dict, list)):
+            nbytes += sys.getsizeof(ids)
+    metadata = getattr(db, '_metadata', None)
+    if isinstance(metadata, MetadataStore):
+        nbytes += metadata.nbytes
+    return nbytes
+
+
+@typechecked
+class TenantManager:
+    """
+    Keep one database per tenant, evicting cold tenants to disk.
+
+    `get` returns a `TenantDB` bound to a tenant id; it can be passed to an
+    augmentation step like any other database. The tenant's database is
+    created on first use, written to `directory` when evicted and loaded
+    back on its next read or write.
+
+    The index size of every tenant is measured after each write. When the
+    loaded tenants exceed `memory_budget`, the tenants over
+    `tenant_quota` are evicted first, then the least recently used ones,
+    so a single large or busy tenant pays for its own reloads instead of
+    pushing everyone else out. A tenant over the quota is not evicted by
+    its own reads, only by its writes or the next use of another tenant.
+    Tenants are only saved on eviction when written since they were
+    loaded. A search or write in progress keeps the database it started
+    with, even if its tenant is evicted meanwhile.
+
+    Parameters
+    ----------
+    directory : str or Path
+        Where evicted tenants are saved.
+    memory_budget : int
+        Bytes of tenant indexes kept in memory.
+    tenant_quota : int, optional
+        Bytes one tenant may hold before it is evicted ahead of the others.
+        Defaults to a quarter of `memory_budget`.
+    factory : callable, optional
+        Create an empty tenant database. Defaults to an exact `FaissDB`.
+    loader : callable, optional
+        Load a database saved with its `save(path)` method. Defaults to
+        `FaissDB.load`.
+    """
+
+    def __init__(
+        self,
+        directory: Union[Path, str],
+        memory_budget: int = 1024 * 2**20,
+        tenant_quota: Optional[int] = None,
+        factory: Optional[Callable[[], DBBase]] = None,
+        loader: Optional[Callable[[Path], DBBase]] = None,
+    ) -> None:
+        if memory_budget < 0:
+            raise ValueError('memory_budget must not be negative.')
+        self.directory = Path(directory)
+        self.memory_budget = memory_budget
+        self.tenant_quota = (
+            tenant_quota if tenant_quota is not None else memory_budget // 4
+        )
+        self.factory = factory or _default_factory
+        self.loader = loader or _default_loader
+        self.evictions = 0
+        self.loads = 0
+        self._lock = threading.RLock()
+        # loaded tenants, least recently used first
+        self._loaded: OrderedDict[str, DBBase] = OrderedDict()
+        self._nbytes: dict[str, int] = {}
+        # loaded tenants written since they were loaded or saved
+        self._dirty: set[str] = set()
+        self._saved: set[str] = {
+            path.stem for path in self.directory.glob('*.tenant')
+        }
+
+    def _path(self, tenant: str) -> Path:
+        return self.directory / f'{quote(tenant, safe="")}.tenant'
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the loaded tenants."""
+        return sum(self._nbytes.values())
+
+    @property
+    def tenants(self) -> list[str]:
+        """Every known tenant, loaded or on disk."""
+        with self._lock:
+            saved = {unquote(stem) for stem in self._saved}
+            return sorted(saved | set(self._loaded))
+
+    def loaded(self) -> dict[str, int]:
+        """Return the bytes held by each loaded tenant, coldest first."""
+        with self._lock:
+            return {tenant: self._nbytes[tenant] for tenant in self._loaded}
+
+    def get(self, tenant: str) -> TenantDB:
+        """Return the database of `tenant`, creating it if needed."""
+        return TenantDB(self, tenant)
+
+    def _load(self, tenant: str) -> DBBase:
+        db = self._loaded.get(tenant)
+        if db is not None:
+            self._loaded.move_to_end(tenant)
+            return db
+        path = self._path(tenant)
+        if path.stem in self._saved:
+            db = self.loader(path)
+            self.loads += 1
+        else:
+            db = self.factory()
+        self._loaded[tenant] = db
+        self._nbytes[tenant] = index_nbytes(db)
+        self._dirty.discard(tenant)
+        return db
+
+    def acquire(self, tenant: str) -> DBBase:
+        """Return the loaded database of `tenant`, reloading it if needed."""
+        with self._lock:
+            db = self._load(tenant)
+            self._enforce(keep=tenant, read=True)
+            return db
+
+    def write(self, tenant: str, method: str, *args: Any) -> None:
+        """Apply a write to a tenant, then account for its new size."""
+        with self._lock:
+            db = self._load(tenant)
+            getattr(db, method)(*args)
+            self._dirty.add(tenant)
+            self._nbytes[tenant] = index_nbytes(db)
+            self._enforce(keep=tenant)
+
+    def evict(self, tenant: str) -> None:
+        """Save a changed tenant to disk and release its memory."""
+        with self._lock:
+            db = self._loaded.pop(tenant, None)
+            if db is None:
+                return
+            self._nbytes.pop(tenant)
+            path = self._path(tenant)
+            dirty = tenant in self._dirty
+            self._dirty.discard(tenant)
+            if db.index is None:
+                # nothing indexed yet: recreate it from the factory
+                self._saved.discard(path.stem)
+            elif dirty or path.stem not in self._saved:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                db.save(path)  # type: ignore[attr-defined]
+                self._saved.add(path.stem)
+            self.evictions += 1
+
+    def evict_all(self) -> None:
+        """Save every loaded tenant, e.g. before shutting down."""
+        with self._lock:
+            for tenant in list(self._loaded):
+                self.evict(tenant)
+
+    def drop(self, tenant: str) -> None:
+        """Forget a tenant and delete its saved files."""
+        with self._lock:
+            self._loaded.pop(tenant, None)
+            self._nbytes.pop(tenant, None)
+            self._dirty.discard(tenant)
+            path = self._path(tenant)
+            self._saved.discard(path.stem)
+            for saved in self.directory.glob(f'{path.name}*'):
+                saved.unlink()
+
+    def _enforce(self, keep: str, read: bool = False) -> None:
+        """
+        Evict tenants until the loaded ones fit in the budget.
+
+        Tenants over the quota go first, then the coldest ones. `keep`, the
+        tenant in use, is spared unless a write took it over the quota; on
+        a read its bytes over the quota do not push others out either.
+        """
+        spared = self._nbytes[keep]
+        if not read or spared <= self.tenant_quota:
+            spared = 0
+        while self.nbytes - spared > self.memory_budget:
+            # _loaded is ordered coldest first
+            victims = [
+                tenant
+                for tenant in self._loaded
+                if self._nbytes[tenant] > self.tenant_quota
+                and not (read and tenant == keep)
+            ] or [tenant for tenant in self._loaded if tenant != keep]
+            if not victims:
+                return
+            self.evict(victims[0])
+
+
+@typechecked
+class TenantDB(DBBase):
+    """
+    Database of one tenant of a `TenantManager`.
+
+    Every call goes through the manager, which loads the tenant when it
+    was evicted and accounts for its size after writes. A search holds on
+    to the database it started with, so evicting the tenant meanwhile does
+    not disturb it.
+    """
+
+    def __init__(self, manager: TenantManager, tenant: str) -> None:
+        self.manager = manager
+        self.tenant = tenant
+
+    @property
+    def index(self) -> Any:
+        """The index of the tenant's database, loading it if needed."""
+        return self.manager.acquire(self.tenant).index
+
+    def embed(
+        self,
+        documents: Any,
+        metadata: Optional[Sequence[MetadataType]] = None,
+    ) -> None:
+        """Replace the tenant's contents with ids 0..n-1."""
+        self.manager.write(self.tenant, 'embed', documents, metadata)
+
+    def add(
+        self,
+        ids: Sequence[Union[int, str]],
+        vectors: Any,
+        metadata: Optional[Sequence[MetadataType]] = None,
+    ) -> None:
+        """Add vectors to the tenant's database."""
+        self.manager.write(self.tenant, 'add', ids, vectors, metadata)
+
+    def remove(self, ids: Sequence[Union[int, str]]) -> None:
+        """Remove vectors from the tenant's database."""
+        self.manager.write(self.tenant, 'remove', ids)
+
+    def _compact(self) -> None:
+        self.manager.write(self.tenant, '_compact')
+
+    def get_metadata(
+        self, ids: Sequence[Union[int, str]]
+    ) -> list[MetadataType]:
+        """Return the metadata stored with the given ids."""
+        return self.manager.acquire(self.tenant).get_metadata(ids)
+
+    def search(
+        self,
+        query_encoded: Any,
+        top_k: int = 2,
+        filter: Optional[MetadataType] = None,
+        min_score: Optional[float] = None,
+        max_results: Optional[int] = None,
+        adaptive: bool = False,
+    ) -> tuple[Iterable[float], Iterable[Union[int, str]]]:
+        """Search the tenant's database."""
+        return self.manager.acquire(self.tenant).search(
+            query_encoded,
+            top_k=top_k,
+            filter=filter,
+            min_score=min_score,
+            max_results=max_results,
+            adaptive=adaptive,
+        )
+
+    def search_many(
+        self,
+        queries_encoded: Any,
+        top_k: int = 2,
+        filter: Optional[MetadataType] = None,
+        min_score: Optional[float] = None,
+        max_results: Optional[int] = None,
+        adaptive: bool = False,
+    ) -> list[tuple[Iterable[float], Iterable[Union[int, str]]]]:
+        """Search several queries on the tenant's database."""
+        return self.manager.acquire(self.tenant).search_many(
+            queries_encoded,
+            top_k=top_k,
+            filter=filter,
+            min_score=min_score,
+            max_results=max_results,
+            adaptive=adaptive,
+        )
@@ -0,0 +1,317 @@
+"""Versioned vector database that rebuilds without blocking searches."""
+
+from __future__ import annotations
+
+import threading
+import weakref
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Optional, Sequence, Union
+
+from typeguard import typechecked
+
+from rago.augmented.db.base import DBBase
+from rago.augmented.db.metadata import MetadataType
+
+
+def _default_factory() -> DBBase:
+    from rago.augmented.db.faiss import FaissDB
+
+    return FaissDB()
+
+
+@typechecked
+class VersionedDB(DBBase):
+    """
+    Serve searches from one snapshot while the next one is built.
+
+    `rebuild` fills a fresh database from `factory` next to the one being
+    served and swaps the reference once it is complete, so searches never
+    see a half-built index. A search reads the current snapshot once and
+    runs on it to the end; a snapshot replaced mid-search is freed when
+    its last reader returns.
+
+    Writes (`add`, `remove`, `update`) made while a rebuild is in flight
+    go to the served snapshot and are replayed onto the new one before
+    the swap, so nothing added meanwhile is lost. The rebuilt snapshot
+    holds ids 0..n-1, so integer ids added meanwhile that fall in that
+    range are given fresh ids after it; `remapped` maps them, and later
+    replayed writes follow the new ids. Removals and updates of ids that
+    were not added meanwhile are dropped, since the rebuild replaced those
+    vectors.
+
+    `rebuild` and `swap` take an optional `corpus`, e.g. the texts the
+    vectors were computed from, which is published together with the new
+    snapshot: `snapshot` returns the database and its corpus as one
+    reference, so a reader never pairs a database with another corpus.
+
+    Background rebuilds run on a worker thread, stopped by `close` or by
+    leaving a `with` block.
+
+    Parameters
+    ----------
+    factory : callable, optional
+        Create an empty database for each rebuild. Defaults to an exact
+        `FaissDB`.
+    db : DBBase, optional
+        Snapshot to serve first. Defaults to an empty one from `factory`.
+    """
+
+    def __init__(
+        self,
+        factory: Optional[Callable[[], DBBase]] = None,
+        db: Optional[DBBase] = None,
+    ) -> None:
+        self.factory = factory or _default_factory
+        self._snapshot: tuple[int, DBBase, Any] = (
+            0,
+            db or self.factory(),
+            None,
+        )
+        # serializes writes, replays and swaps; searches never take it
+        self._write_lock = threading.RLock()
+        self._journal: Optional[list[tuple[str, tuple[Any, ...]]]] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self.remapped: dict[Union[int, str], Union[int, str]] = {}
+
+    @property
+    def version(self) -> int:
+        """Number of swaps so far."""
+        return self._snapshot[0]
+
+    @property
+    def current(self) -> DBBase:
+        """The snapshot that new searches run on."""
+        return self._snapshot[1]
+
+    @property
+    def snapshot(self) -> tuple[int, DBBase, Any]:
+        """The current `(version, database, corpus)`, read at once."""
+        return self._snapshot
+
+    @property
+    def index(self) -> Any:
+        """The index of the current snapshot."""
+        return self.current.index
+
+    def swap(self, db: DBBase, corpus: Any = None) -> int:
+        """Serve `db` and its `corpus` from now on; return its version."""
+        with self._write_lock:
+            version = self._snapshot[0] + 1
+            self._snapshot = (version, db, corpus)
+            return version
+
+    def _replay(
+        self,
+        db: DBBase,
+        size: int,
+        journal: list[tuple[str, tuple[Any, ...]]],
+    ) -> dict[Union[int, str], Union[int, str]]:
+        """
+        Apply the writes made during a rebuild to the rebuilt `db`.
+
+        `db` holds ids 0..size-1. Added integer ids in that range move to
+        fresh ids past every id in use, and later writes follow them;
+        updates are applied in place under the same ids.
+        """
+        added = [
+            id_
+            for method, args in journal
+            if method == 'add'
+            for id_ in args[0]
+            if isinstance(id_, int)
+        ]
+        next_id = max([size - 1, *added]) + 1
+        remapped: dict[Union[int, str], Union[int, str]] = {}
+        live: set[Union[int, str]] = set()
+        for method, args in journal:
+            if method == 'add':
+                ids, vectors, metadata = args
+                new_ids: list[Union[int, str]] = []
+                for id_ in ids:
+                    if isinstance(id_, int) and 0 <= id_ < size:
+                        remapped[id_] = next_id
+                        next_id += 1
+                    new_ids.append(remapped.get(id_, id_))
+                live.update(ids)
+                db.add(new_ids, vectors, metadata)
+            elif method == 'remove':
+                # ids not added meanwhile belong to the replaced contents
+                ids = [id_ for id_ in args[0] if id_ in live]
+                live.difference_update(ids)
+                if ids:
+                    db.remove([remapped.get(id_, id_) for id_ in ids])
+            elif method == 'update':
+                ids, vectors, metadata = args
+                rows = [row for row, id_ in enumerate(ids) if id_ in live]
+                if rows:
+                    db.update(
+                        [remapped.get(ids[row], ids[row]) for row in rows],
+                        [vectors[row] for row in rows],
+                        None
+                        if metadata is None
+                        else [metadata[row] for row in rows],
+                    )
+            else:
+                getattr(db, method)(*args)
+        return remapped
+
+    def _build_and_swap(
+        self,
+        documents: Any,
+        metadata: Optional[Sequence[MetadataType]],
+        corpus: Any,
+    ) -> int:
+        db = self.factory()
+        with self._write_lock:
+            if self._journal is not None:
+                raise RuntimeError('A rebuild is already in progress.')
+            self._journal = []
+        try:
+            db.embed(documents, metadata)
+            with self._write_lock:
+                self.remapped = self._replay(db, len(documents), self._journal)
+                return self.swap(db, corpus)
+        finally:
+            with self._write_lock:
+                self._journal = None
+
+    def rebuild(
+        self,
+        documents: Any,
+        metadata: Optional[Sequence[MetadataType]] = None,
+        background: bool = False,
+        corpus: Any = None,
+    ) -> Optional[Future[int]]:
+        """
+        Build a new snapshot from the documents and swap it in.
+
+        `corpus` is published with the new snapshot, see `snapshot`. With
+        `background=True` the build runs on a worker thread and a future
+        resolving to the new version is returned.
+        """
+        if not background:
+            self._build_and_swap(documents, metadata, corpus)
+            return None
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix='rago-rebuild'
+            )
+            weakref.finalize(self, self._pool.shutdown, wait=False)
+        return self._pool.submit(
+            self._build_and_swap, documents, metadata, corpus
+        )
+
+    def close(self) -> None:
+        """Wait for a background rebuild and stop its worker thread."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self) -> VersionedDB:
+        """Return the database, to close it at the end of a `with` block."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Close the database."""
+        self.close()
+
+    def embed(
+        self,
+        documents: Any,
+        metadata: Optional[Sequence[MetadataType]] = None,
+    ) -> None:
+        """Rebuild from the documents; searches continue meanwhile."""
+        self.rebuild(documents, metadata)
+
+    def embed_texts(
+        self,
+        vectors: Any,
+        texts: Sequence[str],
+        metadata: Optional[Sequence[MetadataType]] = None,
+    ) -> None:
+        """Rebuild from the vectors and publish `texts` as the corpus."""
+        self.rebuild(vectors, metadata, corpus=list(texts))
+
+    def searchable(self, texts: list[str]) -> tuple[DBBase, list[str]]:
+        """Return the current snapshot and its corpus, read at once."""
+        _, current, corpus = self._snapshot
+        if corpus is None:
+            return current, texts
+        return current, corpus
+
+    def _write(self, method: str, *args: Any) -> None:
+        with self._write_lock:
+            getattr(self.current, method)(*args)
+            if self._journal is not None:
+                self._journal.append((method, args))
+
+    def add(
+        self,
+        ids: Sequence[Union[int, str]],
+        vectors: Any,
+        metadata: Optional[Sequence[MetadataType]] = None,
+    ) -> None:
+        """Add vectors to the served snapshot."""
+        self._write('add', ids, vectors, metadata)
+
+    def remove(self, ids: Sequence[Union[int, str]]) -> None:
+        """Remove vectors from the served snapshot."""
+        self._write('remove', ids)
+
+    def update(
+        self,
+        ids: Sequence[Union[int, str]],
+        vectors: Any,
+        metadata: Optional[Sequence[MetadataType]] = None,
+    ) -> None:
+        """Replace vectors in the served snapshot."""
+        self._write('update', ids, vectors, metadata)
+
+    def _compact(self) -> None:
+        with self._write_lock:
+            self.current._compact()
+
+    def get_metadata(
+        self, ids: Sequence[Union[int, str]]
+    ) -> list[MetadataType]:
+        """Return the metadata stored with the given ids."""
+        return self.current.get_metadata(ids)
+
+    def search(
+        self,
+        query_encoded: Any,
+        top_k: int = 2,
+        filter: Optional[MetadataType] = None,
+        min_score: Optional[float] = None,
+        max_results: Optional[int] = None,
+        adaptive: bool = False,
+    ) -> tuple[Iterable[float], Iterable[Union[int, str]]]:
+        """Search the current snapshot."""
+        return self.current.search(
+            query_encoded,
+            top_k=top_k,
+            filter=filter,
+            min_score=min_score,
+            max_results=max_results,
+            adaptive=adaptive,
+        )
+
+    def search_many(
+        self,
+        queries_encoded: Any,
+        top_k: int = 2,
+        filter: Optional[MetadataType] = None,
+        min_score: Optional[float] = None,
+        max_results: Optional[int] = None,
+        adaptive: bool = False,
+    ) -> list[tuple[Iterable[float], Iterable[Union[int, str]]]]:
+        """Search several queries on the current snapshot."""
+        return self.current.search_many(
+            queries_encoded,
+            top_k=top_k,
+            filter=filter,
+            min_score=min_score,
+            max_results=max_results,
+            adaptive=adaptive,
+        )
@@ -0,0 +1,181 @@
+"""Process pool that encodes texts with a model on every CPU core."""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Optional
+
+import numpy as np
+import numpy.typing as npt
+
+from typeguard import typechecked
+
+# the model of the current worker process, set by `_init_worker`
+_model: Any = None
+
+
+def _init_worker(model: Any, threads: int, cores: Any) -> None:
+    """Keep the model and set up the threads of a new worker."""
+    global _model
+    _model = model
+    if cores is not None:
+        os.sched_setaffinity(0, cores.get())
+
+    import torch
+
+    torch.set_num_threads(threads)
+
+
+def _ready() -> int:
+    """Return at once, to start a worker."""
+    return os.getpid()
+
+
+def _encode(texts: list[str], batch_size: int) -> npt.NDArray[np.float32]:
+    """Encode one chunk in a worker."""
+    vectors = _model.encode(
+        texts, batch_size=batch_size, convert_to_numpy=True
+    )
+    return np.ascontiguousarray(vectors, dtype=np.float32)
+
+
+@typechecked
+class EncoderPool:
+    """
+    Encode texts with a copy of a model in each of several processes.
+
+    Where `fork` is available (Linux), workers are forked after the model
+    is loaded and share its weights with the parent instead of loading
+    them again. They are all started when the pool is created, so create
+    it right after loading the model: forking a process that has already
+    run inference on torch's thread pools can leave the workers stuck.
+    With `start_method='spawn'` or `'forkserver'` each worker receives a
+    pickled copy of the model instead. Each worker runs torch with
+    `threads_per_worker` intra-op threads, so the workers do not
+    oversubscribe the cores.
+
+    Texts are sent in chunks of `chunk_size`, with at most two chunks per
+    worker in flight, and the results are written in order into one
+    float32 matrix.
+
+    Parameters
+    ----------
+    model : Any
+        An object with a sentence-transformers style `encode` method.
+    workers : int, optional
+        Worker processes. Defaults to one per available core.
+    batch_size : int
+        Batch size of `model.encode` within a worker.
+    chunk_size : int, optional
+        Texts sent to a worker at a time. Defaults to `4 * batch_size`.
+    threads_per_worker : int, optional
+        Torch threads of each worker. Defaults to the available cores
+        divided among the workers.
+    pin_threads : bool
+        Pin each worker to its own cores (Linux only), so workers never
+        compete for a core.
+    start_method : str, optional
+        Multiprocessing start method, `fork` when available by default.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        workers: Optional[int] = None,
+        batch_size: int = 32,
+        chunk_size: Optional[int] = None,
+        threads_per_worker: Optional[int] = None,
+        pin_threads: bool = False,
+        start_method: Optional[str] = None,
+    ) -> None:
+        cores = sorted(
+            os.sched_getaffinity(0)
+            if hasattr(os, 'sched_getaffinity')
+            else range(os.cpu_count() or 1)
+        )
+        self.workers = workers or len(cores)
+        if self.workers < 1 or batch_size < 1:
+            raise ValueError('workers and batch_size must be positive.')
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size or 4 * batch_size
+        self.threads_per_worker = threads_per_worker or max(
+            1, len(cores) // self.workers
+        )
+        if start_method is None:
+            methods = multiprocessing.get_all_start_methods()
+            start_method = 'fork' if 'fork' in methods else 'spawn'
+        context = multiprocessing.get_context(start_method)
+
+        core_sets = None
+        if pin_threads:
+            if not hasattr(os, 'sched_setaffinity'):
+                raise ValueError('pin_threads is only supported on Linux.')
+            core_sets = context.Queue()
+            for worker in range(self.workers):
+                first = worker * self.threads_per_worker % len(cores)
+                core_sets.put(
+                    {
+                        cores[(first + offset) % len(cores)]
+                        for offset in range(self.threads_per_worker)
+                    }
+                )
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(model, self.threads_per_worker, core_sets),
+        )
+        # start every worker now rather than on the first `encode`, which
+        # may come after the parent has run the model
+        for future in [
+            self._executor.submit(_ready) for _ in range(self.workers)
+        ]:
+            future.result()
+
+    def encode(self, texts: list[str]) -> npt.NDArray[np.float32]:
+        """Encode the texts on the workers and return one float32 matrix."""
+        result: Optional[npt.NDArray[np.float32]] = None
+        pending: deque[tuple[int, Future[npt.NDArray[np.float32]]]] = deque()
+        starts = iter(range(0, len(texts), self.chunk_size))
+
+        def submit() -> None:
+            start = next(starts, None)
+            if start is not None:
+                chunk = texts[start : start + self.chunk_size]
+                pending.append(
+                    (
+                        start,
+                        self._executor.submit(_encode, chunk, self.batch_size),
+                    )
+                )
+
+        for _ in range(2 * self.workers):
+            submit()
+        while pending:
+            start, future = pending.popleft()
+            vectors = future.result()
+            if result is None:
+                result = np.empty(
+                    (len(texts), vectors.shape[1]), dtype=np.float32
+                )
+            result[start : start + len(vectors)] = vectors
+            submit()
+        if result is None:
+            return np.empty((0, 0), dtype=np.float32)
+        return result
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        self._executor.shutdown(cancel_futures=True)
+
+    def __enter__(self) -> EncoderPool:
+        """Return the pool, to close it at the end of a `with` block."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Close the pool."""
+        self.close()
@@ -2,12 +2,15 @@
 
 from __future__ import annotations
 
+from typing import Optional
+
 import numpy as np
 import openai
 
 from typeguard import typechecked
 
 from rago.augmented.base import AugmentedBase, EmbeddingType
+from rago.augmented.db.metadata import MetadataType
 
 
 @typechecked
@@ -16,6 +19,7 @@ class FireworksAug(AugmentedBase):
 
     default_model_name = 'nomic-ai/nomic-embed-text-v1.5'  # embedding model
     default_top_k = 3
+    default_batch_size = 256
 
     def _setup(self) -> None:
         """Set up the object with initial parameters."""
@@ -25,9 +29,17 @@ class FireworksAug(AugmentedBase):
             base_url='https://api.fireworks.ai/inference/v1',
             api_key=self.api_key,
         )
+        self.async_openai_client = openai.AsyncOpenAI(
+            base_url='https://api.fireworks.ai/inference/v1',
+            api_key=self.api_key,
+        )
 
     def get_embedding(self, content: list[str]) -> EmbeddingType:
         """Retrieve the embedding for given texts using the OpenAI client."""
+        return self._embed_batched(content, self._request_embedding)
+
+    def _request_embedding(self, content: list[str]) -> EmbeddingType:
+        """Embed one batch of texts with a single API request."""
         # Using the OpenAI embeddings API call for fireworks
         response = self.openai_client.embeddings.create(
             model=self.model_name,
@@ -38,19 +50,38 @@ class FireworksAug(AugmentedBase):
         )
         return result
 
+    async def aget_embedding(self, content: list[str]) -> EmbeddingType:
+        """Retrieve the embedding with the async OpenAI client."""
+        return await self._aembed_batched(content, self._arequest_embedding)
+
+    async def _arequest_embedding(self, content: list[str]) -> EmbeddingType:
+        """Embed one batch of texts with a single async API request."""
+        response = await self.async_openai_client.embeddings.create(
+            model=self.model_name,
+            input=content,
+        )
+        return np.array(
+            [data.embedding for data in response.data], dtype=np.float32
+        )
+
     def search(
-        self, query: str, documents: list[str], top_k: int = 0
+        self,
+        query: str,
+        documents: list[str],
+        top_k: int = 0,
+        filter: Optional[MetadataType] = None,
     ) -> list[str]:
         """Search an encoded query into vector database."""
         if not hasattr(self, 'db') or not self.db:
             raise Exception('Vector database (db) is not initialized.')
 
-        document_encoded = self.get_embedding(documents)
+        self._ensure_indexed(documents)
         query_encoded = self.get_embedding([query])
         top_k = top_k or self.top_k or self.default_top_k or 1
 
-        self.db.embed(document_encoded)
-        _, indices = self.db.search(query_encoded, top_k=top_k)
+        retrieved, self._last_scores = self._search_db(
+            query_encoded, top_k, filter
+        )
 
         # self.logs['indices'] = indices
         # self.logs['scores'] = scores
@@ -59,4 +90,4 @@ class FireworksAug(AugmentedBase):
         #     'top_k': top_k,
         # }
 
-        return self._resolve_retrieved_docs(documents, indices)
+        return retrieved
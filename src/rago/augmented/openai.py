@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import cast
+from typing import Optional, cast
 
 import numpy as np
 import openai
@@ -10,6 +10,7 @@ import openai
 from typeguard import typechecked
 
 from rago.augmented.base import AugmentedBase, EmbeddingType
+from rago.augmented.db.metadata import MetadataType
 
 
 @typechecked
@@ -18,6 +19,9 @@ class OpenAIAug(AugmentedBase):
 
     default_model_name = 'text-embedding-3-small'
     default_top_k = 3
+    # per-request input limits of the embeddings endpoint
+    default_batch_size = 2048
+    default_batch_tokens = 300_000
 
     def _setup(self) -> None:
         """Set up the object with initial parameters."""
@@ -25,9 +29,14 @@ class OpenAIAug(AugmentedBase):
             raise ValueError('API key for OpenAI is required.')
         openai.api_key = self.api_key
         self.model = openai.OpenAI(api_key=self.api_key)
+        self.async_model = openai.AsyncOpenAI(api_key=self.api_key)
 
     def get_embedding(self, content: list[str]) -> EmbeddingType:
         """Retrieve the embedding for a given text using OpenAI API."""
+        return self._embed_batched(content, self._request_embedding)
+
+    def _request_embedding(self, content: list[str]) -> EmbeddingType:
+        """Embed one batch of texts with a single API request."""
         model = cast(openai.OpenAI, self.model)
         response = model.embeddings.create(
             input=content, model=self.model_name
@@ -38,20 +47,37 @@ class OpenAIAug(AugmentedBase):
 
         return result
 
+    async def aget_embedding(self, content: list[str]) -> EmbeddingType:
+        """Retrieve the embedding with OpenAI's async client."""
+        return await self._aembed_batched(content, self._arequest_embedding)
+
+    async def _arequest_embedding(self, content: list[str]) -> EmbeddingType:
+        """Embed one batch of texts with a single async API request."""
+        response = await self.async_model.embeddings.create(
+            input=content, model=self.model_name
+        )
+        return np.array(
+            [data.embedding for data in response.data], dtype=np.float32
+        )
+
     def search(
-        self, query: str, documents: list[str], top_k: int = 0
+        self,
+        query: str,
+        documents: list[str],
+        top_k: int = 0,
+        filter: Optional[MetadataType] = None,
     ) -> list[str]:
         """Search an encoded query into vector database."""
         if not hasattr(self, 'db') or not self.db:
             raise Exception('Vector database (db) is not initialized.')
 
-        # Encode the documents and query
-        document_encoded = self.get_embedding(documents)
+        self._ensure_indexed(documents)
         query_encoded = self.get_embedding([query])
         top_k = top_k or self.top_k or self.default_top_k or 1
 
-        self.db.embed(document_encoded)
-        _, indices = self.db.search(query_encoded, top_k=top_k)
+        retrieved, self._last_scores = self._search_db(
+            query_encoded, top_k, filter
+        )
 
         # self.logs['indices'] = indices
         # self.logs['scores'] = scores
@@ -60,4 +86,4 @@ class OpenAIAug(AugmentedBase):
         #     'top_k': top_k,
         # }
 
-        return self._resolve_retrieved_docs(documents, indices)
+        return retrieved
@@ -2,12 +2,18 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any, cast
+import platform
+import weakref
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional, Union, cast
 
 from typeguard import typechecked
 
 from rago._optional import require_dependency
 from rago.augmented.base import AugmentedBase, EmbeddingType
+from rago.augmented.db.metadata import MetadataType
+from rago.augmented.encoder_pool import EncoderPool
 
 if TYPE_CHECKING:
     from sentence_transformer import SentenceTransformer
@@ -19,8 +25,62 @@ class SentenceTransformerAug(AugmentedBase):
 
     default_model_name = 'paraphrase-MiniLM-L12-v2'
     default_top_k = 3
+    runtimes = ('torch', 'onnx')
+
+    def __init__(
+        self,
+        *args: Any,
+        workers: int = 0,
+        batch_size: int = 32,
+        threads_per_worker: Optional[int] = None,
+        pin_threads: bool = False,
+        runtime: str = 'torch',
+        quantize: bool = False,
+        onnx_cache_dir: Union[Path, str] = '.rago-onnx',
+        **kwargs: Any,
+    ) -> None:
+        """
+        Create the augmenter; see `AugmentedBase` for the shared options.
+
+        With `workers` set (-1 for one per core), bulk encodes run on an
+        `EncoderPool` of that many processes, each with
+        `threads_per_worker` torch threads, optionally pinned to their own
+        cores. Inputs of at most `batch_size` texts, like search queries,
+        are still encoded in this process.
+
+        `runtime='onnx'` runs the model on ONNX Runtime instead of PyTorch.
+        The model is exported once into `onnx_cache_dir` and loaded from
+        there afterwards; `quantize=True` also exports and uses a dynamic
+        int8 quantized graph for the current CPU.
+        """
+        self.workers = workers
+        self.batch_size = batch_size
+        self.threads_per_worker = threads_per_worker
+        self.pin_threads = pin_threads
+        self.runtime = runtime.lower()
+        self.quantize = quantize
+        self.onnx_cache_dir = Path(onnx_cache_dir)
+        self.pool: Optional[EncoderPool] = None
+        super().__init__(*args, **kwargs)
+
+    def _validate(self) -> None:
+        """Check the requested runtime."""
+        if self.runtime not in self.runtimes:
+            raise ValueError(
+                f'Unsupported runtime: {self.runtime}. '
+                f'Use one of {", ".join(self.runtimes)}.'
+            )
+        if self.quantize and self.runtime != 'onnx':
+            raise ValueError("quantize requires runtime='onnx'.")
 
     def _load_optional_modules(self) -> None:
+        if self.runtime == 'onnx':
+            # the ONNX backend of sentence-transformers runs on optimum
+            require_dependency(
+                'optimum.onnxruntime',
+                extra='onnx',
+                context='ONNX Runtime embeddings',
+            )
         self._sentence_transformers = require_dependency(
             'sentence_transformers',
             extra='sentence_transformers',
@@ -31,29 +91,89 @@ class SentenceTransformerAug(AugmentedBase):
             self._sentence_transformers.SentenceTransformer
         )
 
+    @staticmethod
+    def _quantization_config() -> str:
+        """Return the dynamic quantization target of this CPU."""
+        machine = platform.machine().lower()
+        return 'arm64' if machine in ('arm64', 'aarch64') else 'avx2'
+
+    def _load_onnx(self) -> Any:
+        """
+        Load the ONNX export of the model, exporting it on first use.
+
+        The export lives in `onnx_cache_dir/<model name>`, so later runs
+        and other processes load the graph without exporting it again.
+        """
+        cache = self.onnx_cache_dir / self.model_name.replace('/', '--')
+        quantized = f'model_qint8_{self._quantization_config()}.onnx'
+        if not any(cache.glob('**/*.onnx')):
+            model = self._SentenceTransformer(self.model_name, backend='onnx')
+            model.save_pretrained(str(cache))
+        if self.quantize and not any(cache.glob(f'**/{quantized}')):
+            self._sentence_transformers.export_dynamic_quantized_onnx_model(
+                self._SentenceTransformer(str(cache), backend='onnx'),
+                self._quantization_config(),
+                str(cache),
+            )
+
+        if self.quantize:
+            graphs = sorted(cache.glob(f'**/{quantized}'))
+        else:
+            graphs = sorted(
+                path
+                for path in cache.glob('**/*.onnx')
+                if 'qint8' not in path.name
+            )
+        return self._SentenceTransformer(
+            str(cache),
+            backend='onnx',
+            model_kwargs={'file_name': str(graphs[0].relative_to(cache))},
+        )
+
     def _setup(self) -> None:
         """Set up the object with the initial parameters."""
-        self.model = self._SentenceTransformer(self.model_name)
+        if self.runtime == 'onnx':
+            self.model = self._load_onnx()
+        else:
+            self.model = self._SentenceTransformer(self.model_name)
+        if self.workers:
+            # before anything runs the model, see `EncoderPool`
+            self.pool = EncoderPool(
+                self.model,
+                workers=self.workers if self.workers > 0 else None,
+                batch_size=self.batch_size,
+                threads_per_worker=self.threads_per_worker,
+                pin_threads=self.pin_threads,
+            )
+            weakref.finalize(self, self.pool.close)
 
     def get_embedding(self, content: list[str]) -> EmbeddingType:
         """Retrieve the embedding for a given text using OpenAI API."""
+        if self.pool is not None and len(content) > self.batch_size:
+            return self.pool.encode(content)
         model = cast('SentenceTransformer', self.model)
-        return cast(EmbeddingType, model.encode(content))
+        return cast(
+            EmbeddingType, model.encode(content, batch_size=self.batch_size)
+        )
 
-    def search(self, query: str, documents: Any, top_k: int = 0) -> list[str]:
+    def search(
+        self,
+        query: str,
+        documents: Any,
+        top_k: int = 0,
+        filter: Optional[MetadataType] = None,
+    ) -> list[str]:
         """Search an encoded query into vector database."""
         if not self.model:
             raise Exception('The model was not created.')
 
-        document_encoded = self.get_embedding(documents)
+        self._ensure_indexed(documents)
         query_encoded = self.get_embedding([query])
         top_k = top_k or self.top_k or self.default_top_k or 1
 
-        self.db.embed(document_encoded)
-
-        _, indices = self.db.search(query_encoded, top_k=top_k)
-
-        retrieved_docs = [documents[i] for i in indices]
+        retrieved_docs, self._last_scores = self._search_db(
+            query_encoded, top_k, filter
+        )
 
         # self.logs['indices'] = indices
         # self.logs['scores'] = scores
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, List, cast
+from typing import TYPE_CHECKING, Any, List, Optional, cast
 
 import numpy as np
 
@@ -10,6 +10,7 @@ from typeguard import typechecked
 
 from rago._optional import require_dependency
 from rago.augmented.base import AugmentedBase, EmbeddingType
+from rago.augmented.db.metadata import MetadataType
 
 if TYPE_CHECKING:
     import spacy
@@ -22,6 +23,27 @@ class SpaCyAug(AugmentedBase):
     default_model_name = 'en_core_web_md'
     default_top_k = 3
 
+    def __init__(
+        self,
+        *args: Any,
+        batch_size: int = 256,
+        n_process: int = 1,
+        **kwargs: Any,
+    ) -> None:
+        """
+        Create the augmenter; see `AugmentedBase` for the shared options.
+
+        `batch_size` texts are sent to `nlp.pipe` at a time, spread over
+        `n_process` processes (-1 for one per CPU) when there is more than
+        one batch; a single batch, such as a query, stays in this process
+        instead of paying for starting the workers.
+        """
+        if batch_size < 1:
+            raise ValueError('batch_size must be a positive integer.')
+        self.batch_size = batch_size
+        self.n_process = n_process
+        super().__init__(*args, **kwargs)
+
     def _load_optional_modules(self) -> None:
         self._spacy = require_dependency(
             'spacy',
@@ -31,44 +53,57 @@ class SpaCyAug(AugmentedBase):
 
     def _setup(self) -> None:
         """Set up the object with initial parameters."""
-        self.model = self._spacy.load(self.model_name)
+        model = self._spacy.load(self.model_name)
+        # `doc.vector` averages the static word vectors when the model has
+        # them, and the tok2vec tensor otherwise; every other component
+        # (tagger, parser, NER, ...) only slows the embedding down
+        needed = () if len(model.vocab.vectors) else ('tok2vec', 'transformer')
+        model.select_pipes(
+            disable=[name for name in model.pipe_names if name not in needed]
+        )
+        self.model = model
 
     def get_embedding(self, content: List[str]) -> EmbeddingType:
         """Retrieve the embedding for a given text using SpaCy."""
         model = cast('spacy.language.Language', self.model)
-        embeddings = []
-
-        for text in content:
-            doc = model(text)
-
+        result = np.empty(
+            (len(content), model.vocab.vectors_length), dtype=np.float32
+        )
+        n_process = self.n_process if len(content) > self.batch_size else 1
+        docs = model.pipe(
+            content, batch_size=self.batch_size, n_process=n_process
+        )
+        for row, (text, doc) in enumerate(zip(content, docs)):
             # Ensure the model has proper vectors
             if not doc.has_vector:
                 raise ValueError(f"Text: '{text}' has no valid word vectors!")
-
-            embeddings.append(doc.vector)
-
-        result = np.array(embeddings, dtype=np.float32)
-
-        # Ensure 2D shape (num_texts, embedding_dim)
-        if result.ndim == 1:
-            result = result.reshape(1, -1)
+            if row == 0 and doc.vector.shape[0] != result.shape[1]:
+                # tensor-based vectors are not the width of the vocab's
+                result = np.empty(
+                    (len(content), doc.vector.shape[0]), dtype=np.float32
+                )
+            result[row] = doc.vector
 
         return result
 
     def search(
-        self, query: str, documents: list[str], top_k: int = 0
+        self,
+        query: str,
+        documents: list[str],
+        top_k: int = 0,
+        filter: Optional[MetadataType] = None,
     ) -> list[str]:
         """Search an encoded query into vector database."""
         if not hasattr(self, 'db') or not self.db:
             raise Exception('Vector database (db) is not initialized.')
 
-        # Encode the documents and query
-        document_encoded = self.get_embedding(documents)
+        self._ensure_indexed(documents)
         query_encoded = self.get_embedding([query])
         top_k = top_k or self.top_k or self.default_top_k or 1
 
-        self.db.embed(document_encoded)
-        _, indices = self.db.search(query_encoded, top_k=top_k)
+        retrieved, self._last_scores = self._search_db(
+            query_encoded, top_k, filter
+        )
 
         # self.logs['indices'] = indices
         # self.logs['scores'] = scores
@@ -77,4 +112,4 @@ class SpaCyAug(AugmentedBase):
         #     'top_k': top_k,
         # }
 
-        return self._resolve_retrieved_docs(documents, indices)
+        return retrieved
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, cast
+from typing import TYPE_CHECKING, Optional, cast
 
 import numpy as np
 
@@ -10,9 +10,10 @@ from typeguard import typechecked
 
 from rago._optional import require_dependency
 from rago.augmented.base import AugmentedBase, EmbeddingType
+from rago.augmented.db.metadata import MetadataType
 
 if TYPE_CHECKING:
-    from together import Together
+    from together import AsyncTogether, Together
 
 
 @typechecked
@@ -24,6 +25,7 @@ class TogetherAug(AugmentedBase):
         # Together embedding model
     )
     default_top_k = 3
+    default_batch_size = 128
 
     def _load_optional_modules(self) -> None:
         self._together = require_dependency(
@@ -38,32 +40,54 @@ class TogetherAug(AugmentedBase):
         if not self.api_key:
             raise ValueError('API key for Together is required.')
         self.model = self._Together(api_key=self.api_key)
+        self.async_model = self._together.AsyncTogether(api_key=self.api_key)
 
     def get_embedding(self, content: list[str]) -> EmbeddingType:
         """Retrieve the embedding for given texts using Together API."""
+        return self._embed_batched(content, self._request_embedding)
+
+    def _request_embedding(self, content: list[str]) -> EmbeddingType:
+        """Embed one batch of texts with a single API request."""
         client = cast('Together', self.model)
-        all_embeddings = []
-        for text in content:
-            response = client.embeddings.create(
-                model=self.model_name, input=text
-            )
-            embedding = response.data[0].embedding
-            all_embeddings.append(embedding)
-        result = np.array(all_embeddings, dtype=np.float32)
+        response = client.embeddings.create(
+            model=self.model_name, input=content
+        )
+        result = np.array(
+            [data.embedding for data in response.data], dtype=np.float32
+        )
         return result
 
+    async def aget_embedding(self, content: list[str]) -> EmbeddingType:
+        """Retrieve the embedding with Together's async client."""
+        return await self._aembed_batched(content, self._arequest_embedding)
+
+    async def _arequest_embedding(self, content: list[str]) -> EmbeddingType:
+        """Embed one batch of texts with a single async API request."""
+        client = cast('AsyncTogether', self.async_model)
+        response = await client.embeddings.create(
+            model=self.model_name, input=content
+        )
+        return np.array(
+            [data.embedding for data in response.data], dtype=np.float32
+        )
+
     def search(
-        self, query: str, documents: list[str], top_k: int = 0
+        self,
+        query: str,
+        documents: list[str],
+        top_k: int = 0,
+        filter: Optional[MetadataType] = None,
     ) -> list[str]:
         """Search an encoded query into vector database."""
         if not hasattr(self, 'db') or not self.db:
             raise Exception('Vector database (db) is not initialized.')
-        document_encoded = self.get_embedding(documents)
+        self._ensure_indexed(documents)
         query_encoded = self.get_embedding([query])
         top_k = top_k or self.top_k or self.default_top_k or 1
 
-        self.db.embed(document_encoded)
-        _, indices = self.db.search(query_encoded, top_k=top_k)
+        retrieved, self._last_scores = self._search_db(
+            query_encoded, top_k, filter
+        )
 
         # self.logs['indices'] = indices
         # self.logs['scores'] = scores
@@ -72,4 +96,4 @@ class TogetherAug(AugmentedBase):
         #     'top_k': top_k,
         # }
 
-        return self._resolve_retrieved_docs(documents, indices)
+        return retrieved
@@ -5,6 +5,7 @@ from __future__ import annotations
 from abc import ABC, abstractmethod
 from collections import UserDict
 from collections.abc import Iterable, Mapping
+from hashlib import sha256
 from typing import Any
 
 try:
@@ -40,6 +41,23 @@ def config_to_dict(parameters: Any) -> dict[str, Any]:
     return {}
 
 
+def config_snapshot(value: Any) -> Any:
+    """
+    Copy the containers of a configuration value, recursively.
+
+    Dicts, lists, tuples and sets are copied, so a later in-place change
+    to a nested value compares unequal; other objects are kept as they
+    are and compare as themselves.
+    """
+    if isinstance(value, Mapping):
+        return {key: config_snapshot(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [config_snapshot(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    return value
+
+
 def ensure_list(value: Any) -> list[Any]:
     """Normalize scalar or iterable values into a list."""
     if value is None:
@@ -55,6 +73,11 @@ def ensure_list(value: Any) -> list[Any]:
     return [value]
 
 
+def content_hash(text: str) -> str:
+    """Return a stable content hash used to identify a text chunk."""
+    return sha256(text.encode('utf-8')).hexdigest()
+
+
 @typechecked
 class ParametersBase(UserDict[str, Any]):
     """Base class for declarative step configuration."""
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from functools import partial
 from pathlib import Path
 from typing import Any
 
@@ -10,6 +11,7 @@ from typeguard import typechecked
 from rago.augmented.db import DBBase
 from rago.base import ParametersBase
 from rago.extensions.cache import CacheFile
+from rago.extensions.embedding_cache import EmbeddingCacheFile
 from rago.extensions.logs import Logs as LogsConfig
 
 
@@ -31,25 +33,90 @@ class Cache(ParametersBase):
 
 
 @typechecked
-class DB(ParametersBase):
-    """Resolve a vector database backend into step configuration."""
+class EmbeddingCache(ParametersBase):
+    """Resolve a per-chunk embedding cache into step configuration."""
 
-    def __init__(self, backend: str = 'faiss', **kwargs: Any) -> None:
+    def __init__(
+        self,
+        backend: str = 'file',
+        target_dir: Path | str = '.rago-embeddings',
+    ) -> None:
         backend_name = backend.lower()
-        db: DBBase
-
-        if backend_name == 'faiss':
-            from rago.augmented.db.faiss import FaissDB
+        if backend_name != 'file':
+            raise ValueError(f'Unsupported embedding cache backend: {backend}')
+
+        embedding_cache = EmbeddingCacheFile(target_dir=target_dir)
+        super().__init__(embedding_cache=embedding_cache)
+
+
+def _create_db(backend: str, **kwargs: Any) -> DBBase:
+    """Create a vector database backend by name."""
+    backend_name = backend.lower()
+
+    if backend_name == 'faiss':
+        from rago.augmented.db.faiss import FaissDB
+
+        return FaissDB(**kwargs)
+    if backend_name == 'chroma':
+        from rago.augmented.db.chroma import ChromaDB
+
+        return ChromaDB(**kwargs)
+    if backend_name == 'numpy':
+        from rago.augmented.db.numpy import NumpyDB
+
+        return NumpyDB(**kwargs)
+    if backend_name == 'binary':
+        from rago.augmented.db.binary import BinaryDB
+
+        return BinaryDB(**kwargs)
+    if backend_name == 'sharded':
+        from rago.augmented.db.sharded import ShardedDB
+
+        num_shards = kwargs.pop('num_shards', 2)
+        max_workers = kwargs.pop('max_workers', None)
+        shard_backend = kwargs.pop('shard_backend', 'faiss')
+        return ShardedDB(
+            num_shards=num_shards,
+            factory=partial(_create_db, shard_backend, **kwargs),
+            max_workers=max_workers,
+        )
+    if backend_name == 'sqlite':
+        from rago.augmented.db.sqlite import SQLiteDB
+
+        path = kwargs.pop('path', 'rago.sqlite3')
+        batch_size = kwargs.pop('batch_size', 1_000)
+        index_backend = kwargs.pop('index_backend', 'numpy')
+        return SQLiteDB(
+            path=path,
+            factory=partial(_create_db, index_backend, **kwargs),
+            batch_size=batch_size,
+        )
+    if backend_name == 'versioned':
+        from rago.augmented.db.versioned import VersionedDB
+
+        snapshot_backend = kwargs.pop('snapshot_backend', 'faiss')
+        return VersionedDB(
+            factory=partial(_create_db, snapshot_backend, **kwargs)
+        )
+    raise ValueError(f'Unsupported DB backend: {backend}')
 
-            db = FaissDB()
-        elif backend_name == 'chroma':
-            from rago.augmented.db.chroma import ChromaDB
 
-            db = ChromaDB(**kwargs)
-        else:
-            raise ValueError(f'Unsupported DB backend: {backend}')
+@typechecked
+class DB(ParametersBase):
+    """
+    Resolve a vector database backend into step configuration.
+
+    `backend='sharded'` spreads vectors over `num_shards` shards of
+    `shard_backend` (faiss by default); the remaining keyword arguments
+    configure each shard. `backend='versioned'` serves snapshots of
+    `snapshot_backend` (faiss by default) that are rebuilt and swapped
+    without blocking searches. `backend='sqlite'` keeps chunks, metadata
+    and vectors in the SQLite file at `path` and searches an in-memory
+    `index_backend` (numpy by default) built from it.
+    """
 
-        super().__init__(db=db)
+    def __init__(self, backend: str = 'faiss', **kwargs: Any) -> None:
+        super().__init__(db=_create_db(backend, **kwargs))
 
 
 @typechecked
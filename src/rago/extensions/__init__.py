@@ -1,6 +1,13 @@
 """Extra tools for supporting Rago."""
 
 from rago.extensions.cache import Cache, CacheFile
+from rago.extensions.embedding_cache import EmbeddingCache, EmbeddingCacheFile
 from rago.extensions.logs import Logs
 
-__all__ = ['Cache', 'CacheFile', 'Logs']
+__all__ = [
+    'Cache',
+    'CacheFile',
+    'EmbeddingCache',
+    'EmbeddingCacheFile',
+    'Logs',
+]
@@ -0,0 +1,266 @@
+"""Content-addressed embedding caches for augmentation steps."""
+
+from __future__ import annotations
+
+import json
+import threading
+
+from abc import abstractmethod
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+from typeguard import typechecked
+
+from rago.base import content_hash
+
+HASH_SIZE = 32
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+
+@typechecked
+class EmbeddingCache:
+    """Abstract per-chunk embedding cache keyed by content hash."""
+
+    @abstractmethod
+    def lookup(
+        self, namespace: str, keys: list[str]
+    ) -> tuple[npt.NDArray[np.float32] | None, npt.NDArray[np.bool_]]:
+        """
+        Return cached vectors for the given content hashes.
+
+        Returns
+        -------
+        tuple
+            A `(len(keys), dim)` float32 matrix, or None when nothing is
+            cached, and a boolean mask of the rows that were found.
+        """
+
+    @abstractmethod
+    def store(
+        self,
+        namespace: str,
+        keys: list[str],
+        vectors: npt.NDArray[np.float32],
+    ) -> None:
+        """Persist vectors for the given content hashes."""
+
+    def get_or_embed(
+        self,
+        namespace: str,
+        content: list[str],
+        encode: Callable[[list[str]], npt.NDArray[np.float32]],
+    ) -> npt.NDArray[np.float32]:
+        """
+        Embed `content`, sending only uncached chunks to `encode`.
+
+        Parameters
+        ----------
+        namespace : str
+            Identify the embedding model, so vectors from different models
+            never mix.
+        content : list[str]
+            Text chunks to embed.
+        encode : Callable
+            Function that embeds a list of texts into a float32 matrix.
+        """
+        if not content:
+            return np.empty((0, 0), dtype=np.float32)
+
+        keys = [content_hash(text) for text in content]
+        result, found = self.lookup(namespace, keys)
+        if found.all() and result is not None:
+            return result
+
+        missing: dict[str, int] = {}
+        for position in np.flatnonzero(~found):
+            missing.setdefault(keys[position], int(position))
+
+        missing_keys = list(missing)
+        encoded = encode([content[missing[key]] for key in missing_keys])
+        self.store(namespace, missing_keys, encoded)
+
+        if result is None:
+            result = np.empty((len(keys), encoded.shape[1]), dtype=np.float32)
+        row_of = {key: row for row, key in enumerate(missing_keys)}
+        for position in np.flatnonzero(~found):
+            result[position] = encoded[row_of[keys[position]]]
+        return result
+
+
+class _EmbeddingStore:
+    """Append-only vector file plus hash index for one namespace."""
+
+    def __init__(self, target_dir: Path, namespace: str) -> None:
+        self.target_dir = target_dir
+        self.target_dir.mkdir(parents=True, exist_ok=True)
+        self.meta_path = target_dir / 'meta.json'
+        self.keys_path = target_dir / 'keys.bin'
+        self.vectors_path = target_dir / 'vectors.f32'
+        self.lock_path = target_dir / 'lock'
+        self.namespace = namespace
+        self.dim = 0
+        self.rows: dict[bytes, int] = {}
+        self.vectors: npt.NDArray[np.float32] | None = None
+        with self._locked():
+            self._load()
+
+    def _load(self) -> None:
+        if not self.meta_path.exists():
+            return
+        meta = json.loads(self.meta_path.read_text())
+        self.dim = int(meta['dim'])
+
+        keys = self.keys_path.read_bytes() if self.keys_path.exists() else b''
+        vector_bytes = (
+            self.vectors_path.stat().st_size
+            if self.vectors_path.exists()
+            else 0
+        )
+        # a crash between the two appends leaves one file longer; keep only
+        # the rows that are complete in both
+        size = min(len(keys) // HASH_SIZE, vector_bytes // (4 * self.dim))
+        if len(keys) != size * HASH_SIZE:
+            with open(self.keys_path, 'r+b') as f:
+                f.truncate(size * HASH_SIZE)
+        if vector_bytes != size * 4 * self.dim:
+            with open(self.vectors_path, 'r+b') as f:
+                f.truncate(size * 4 * self.dim)
+
+        self.rows = {
+            keys[i * HASH_SIZE : (i + 1) * HASH_SIZE]: i for i in range(size)
+        }
+        self._remap()
+
+    def _remap(self) -> None:
+        if not self.rows:
+            self.vectors = None
+            return
+        self.vectors = np.memmap(
+            self.vectors_path,
+            dtype=np.float32,
+            mode='r',
+            shape=(
+                self.vectors_path.stat().st_size // (4 * self.dim),
+                self.dim,
+            ),
+        )
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold an exclusive lock on the folder, across processes."""
+        with open(self.lock_path, 'a') as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def append(self, keys: list[bytes], vectors: npt.NDArray[Any]) -> None:
+        # other instances or processes may have appended rows since this
+        # one loaded; re-read the files under the lock so the new rows land
+        # after theirs
+        with self._locked():
+            self._load()
+            self._append(keys, vectors)
+
+    def _append(self, keys: list[bytes], vectors: npt.NDArray[Any]) -> None:
+        if not self.dim:
+            self.dim = int(vectors.shape[1])
+            self.meta_path.write_text(
+                json.dumps({'namespace': self.namespace, 'dim': self.dim})
+            )
+        if vectors.shape[1] != self.dim:
+            raise ValueError(
+                f'Embedding dimension {vectors.shape[1]} does not match the '
+                f'cached dimension {self.dim} for {self.namespace!r}.'
+            )
+
+        new = [
+            (key, row) for row, key in enumerate(keys) if key not in self.rows
+        ]
+        if not new:
+            return
+        rows = np.fromiter((row for _, row in new), dtype=np.intp)
+        block = np.ascontiguousarray(vectors[rows], dtype=np.float32)
+
+        start = (
+            self.vectors_path.stat().st_size // (4 * self.dim)
+            if self.vectors_path.exists()
+            else 0
+        )
+        with open(self.vectors_path, 'ab') as f:
+            f.write(block.tobytes())
+        with open(self.keys_path, 'ab') as f:
+            f.write(b''.join(key for key, _ in new))
+
+        for offset, (key, _) in enumerate(new):
+            self.rows[key] = start + offset
+        self._remap()
+
+
+@typechecked
+class EmbeddingCacheFile(EmbeddingCache):
+    """
+    Disk-backed embedding cache.
+
+    Each namespace gets its own folder holding a raw float32 matrix, read
+    through `np.memmap`, and an append-only file with the SHA-256 digest of
+    every row, so only chunks never seen before reach the embedding model.
+    """
+
+    target_dir: Path
+
+    def __init__(self, target_dir: Path | str) -> None:
+        self.target_dir = Path(target_dir)
+        self.target_dir.mkdir(parents=True, exist_ok=True)
+        self._stores: dict[str, _EmbeddingStore] = {}
+        self._lock = threading.Lock()
+
+    def _get_store(self, namespace: str) -> _EmbeddingStore:
+        store = self._stores.get(namespace)
+        if store is None:
+            folder = content_hash(namespace)[:16]
+            store = _EmbeddingStore(self.target_dir / folder, namespace)
+            self._stores[namespace] = store
+        return store
+
+    def lookup(
+        self, namespace: str, keys: list[str]
+    ) -> tuple[npt.NDArray[np.float32] | None, npt.NDArray[np.bool_]]:
+        """Return cached vectors for the given content hashes."""
+        with self._lock:
+            store = self._get_store(namespace)
+            rows = np.fromiter(
+                (store.rows.get(bytes.fromhex(key), -1) for key in keys),
+                dtype=np.intp,
+                count=len(keys),
+            )
+            found = rows >= 0
+            if store.vectors is None:
+                return None, found
+
+            result = np.empty((len(keys), store.dim), dtype=np.float32)
+            result[found] = store.vectors[rows[found]]
+            return result, found
+
+    def store(
+        self,
+        namespace: str,
+        keys: list[str],
+        vectors: npt.NDArray[np.float32],
+    ) -> None:
+        """Append vectors for content hashes not cached yet."""
+        with self._lock:
+            store = self._get_store(namespace)
+            store.append([bytes.fromhex(key) for key in keys], vectors)
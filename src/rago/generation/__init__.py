@@ -8,7 +8,13 @@ from typing import Any, Type
 from pydantic import BaseModel
 from typeguard import typechecked
 
-from rago.base import ParametersBase, StepBase, config_to_dict, ensure_list
+from rago.base import (
+    ParametersBase,
+    StepBase,
+    config_snapshot,
+    config_to_dict,
+    ensure_list,
+)
 from rago.generation.base import GenerationBase
 from rago.io import Input, Output
 
@@ -75,6 +81,9 @@ class Generation(StepBase):
         )
         self.cache = cache
         self.logs = logs if logs is not None else {}
+        self._instance: GenerationBase | None = None
+        # settings the instance was built with
+        self._instance_state: tuple[Any, ...] = ()
 
     def __call__(self, **kwargs: Any) -> Generation:
         """Update this wrapper with additional generation parameters."""
@@ -91,8 +100,27 @@ class Generation(StepBase):
                 self.engine = value.lower()
             else:
                 self.params.params[key] = value
+        if self._config_state() != self._instance_state:
+            self._instance = None
+
+    def _config_state(self) -> tuple[Any, ...]:
+        """Return a snapshot of the settings used to build the backend."""
+        return (
+            self.backend,
+            self.engine,
+            config_snapshot(self.params.params),
+            id(self.cache),
+            id(self.logs),
+        )
 
     def _resolve(self) -> GenerationBase:
+        """Return the concrete generator, building it on first use."""
+        if self._instance is None:
+            self._instance = self._build()
+            self._instance_state = self._config_state()
+        return self._instance
+
+    def _build(self) -> GenerationBase:
         config = deepcopy(self.params.params)
         if self.cache is not None:
             config['cache'] = self.cache
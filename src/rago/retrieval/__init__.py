@@ -7,7 +7,12 @@ from typing import Any
 
 from typeguard import typechecked
 
-from rago.base import ParametersBase, StepBase, config_to_dict
+from rago.base import (
+    ParametersBase,
+    StepBase,
+    config_snapshot,
+    config_to_dict,
+)
 from rago.io import Input, Output
 from rago.retrieval.base import RetrievalBase
 from rago.retrieval.text_splitter import LangChainTextSplitter
@@ -54,6 +59,10 @@ class Retrieval(StepBase):
         )
         self.cache = cache
         self.logs = logs if logs is not None else {}
+        self._instance: RetrievalBase | None = None
+        # settings the instance was built with
+        self._instance_state: tuple[Any, ...] = ()
+        self._instance_source: Any = None
 
     def __call__(self, **kwargs: Any) -> Retrieval:
         """Update this wrapper with additional retrieval parameters."""
@@ -70,8 +79,34 @@ class Retrieval(StepBase):
                 self.splitter = value
             else:
                 self.params.params[key] = value
+        if self._config_state() != self._instance_state:
+            self._instance = None
+
+    def _config_state(self) -> tuple[Any, ...]:
+        """Return a snapshot of the settings used to build the backend."""
+        return (
+            self.backend,
+            config_snapshot(self.params.params),
+            id(self.splitter),
+            id(self.cache),
+            id(self.logs),
+        )
 
     def _resolve(self, source: Any = None) -> RetrievalBase:
+        """Return the concrete retriever, building it on first use.
+
+        When no source is configured, the call-time source is validated by
+        the backend, so the instance is rebuilt whenever that source changes.
+        """
+        if self.params.params.get('source') is not None:
+            source = None
+        if self._instance is None or self._instance_source != source:
+            self._instance = self._build(source)
+            self._instance_source = source
+            self._instance_state = self._config_state()
+        return self._instance
+
+    def _build(self, source: Any = None) -> RetrievalBase:
         config = deepcopy(self.params.params)
         if config.get('source') is None and source is not None:
             config['source'] = source
@@ -2,9 +2,14 @@
 
 from __future__ import annotations
 
-from typing import Literal
+import zlib
+
+from typing import Any, Literal, Optional
+
+import numpy as np
 
 from pydantic import BaseModel, Field
+from rago.augmented.base import AugmentedBase, EmbeddingType
 
 
 class AnimalModel(BaseModel):
@@ -26,3 +31,41 @@ class AnimalModel(BaseModel):
         ...,
         description='The predicted class label.',
     )
+
+
+class KeywordAug(AugmentedBase):
+    """Offline augmenter embedding texts as hashed bags of words."""
+
+    default_model_name = 'keyword'
+    dimension = 64
+
+    def _setup(self) -> None:
+        """Track every batch of texts sent to the embedding model."""
+        self.model = self
+        self.embedded: list[list[str]] = []
+
+    def get_embedding(self, content: list[str]) -> EmbeddingType:
+        """Embed each text as normalized hashed word counts."""
+        self.embedded.append(list(content))
+        result = np.zeros((len(content), self.dimension), dtype=np.float32)
+        for row, text in enumerate(content):
+            for word in text.lower().split():
+                word = word.strip('.,?!')
+                result[row, zlib.crc32(word.encode()) % self.dimension] += 1
+        norms = np.linalg.norm(result, axis=1, keepdims=True)
+        return result / np.maximum(norms, 1e-12)
+
+    def search(
+        self,
+        query: str,
+        documents: Any,
+        top_k: int = 0,
+        filter: Optional[dict[str, Any]] = None,
+    ) -> list[str]:
+        """Search an encoded query into vector database."""
+        self._ensure_indexed(documents)
+        query_encoded = self.get_embedding([query])
+        retrieved, self._last_scores = self._search_db(
+            query_encoded, top_k, filter
+        )
+        return retrieved
@@ -0,0 +1,117 @@
+"""Tests for Rago package: async embedding and search."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+
+from types import SimpleNamespace
+from typing import Any
+
+import numpy as np
+
+from rago.augmented.batching import EmbeddingBatcher
+from rago.augmented.openai import OpenAIAug
+
+from .models import KeywordAug
+
+
+class ThreadKeywordAug(KeywordAug):
+    """KeywordAug recording the thread each embedding runs on."""
+
+    def get_embedding(self, content: list[str]) -> Any:
+        """Record the current thread, then embed."""
+        self.threads = [*getattr(self, 'threads', []), threading.get_ident()]
+        return super().get_embedding(content)
+
+
+def test_asearch_matches_search(animals_data: list[str]) -> None:
+    """Test that `asearch` finds what `search` finds, off the loop."""
+    aug = ThreadKeywordAug(top_k=1)
+
+    async def run() -> list[list[str]]:
+        return await asyncio.gather(
+            aug.asearch('peregrine falcon', animals_data),
+            aug.asearch('honey bee', animals_data),
+        )
+
+    falcon, bee = asyncio.run(run())
+    assert 'Peregrine Falcon' in falcon[0]
+    assert 'Honey Bee' in bee[0]
+    assert threading.get_ident() not in aug.threads
+    assert aug.search('honey bee', animals_data) == bee
+    assert aug.last_scores
+
+
+class SlowKeywordAug(KeywordAug):
+    """KeywordAug whose async embeddings yield to the loop first."""
+
+    async def aget_embedding(self, content: list[str]) -> Any:
+        """Let other searches run, then embed."""
+        await asyncio.sleep(0.01)
+        return self.get_embedding(content)
+
+
+def test_concurrent_asearch_on_different_corpora(
+    animals_data: list[str],
+) -> None:
+    """Test that each search answers from its own corpus."""
+    aug = SlowKeywordAug(top_k=1)
+    corpora = [animals_data[:5], animals_data[5:]]
+    queries = ['blue whale', 'honey bee']
+
+    async def run() -> list[list[str]]:
+        return await asyncio.gather(
+            *(
+                aug.asearch(queries[turn % 2], corpora[turn % 2])
+                for turn in range(8)
+            )
+        )
+
+    results = asyncio.run(run())
+    for turn, result in enumerate(results):
+        assert result[0] in corpora[turn % 2]
+    assert 'Blue Whale' in results[0][0]
+    assert 'Honey Bee' in results[1][0]
+    assert aug.last_scores == []
+
+
+def test_async_requests_are_limited() -> None:
+    """Test that concurrent calls share one bound on requests in flight."""
+    state = {'active': 0, 'peak': 0, 'calls': 0}
+
+    async def create(input: list[str], model: str) -> Any:
+        state['active'] += 1
+        state['calls'] += 1
+        state['peak'] = max(state['peak'], state['active'])
+        await asyncio.sleep(0.01)
+        state['active'] -= 1
+        return SimpleNamespace(
+            data=[
+                SimpleNamespace(embedding=[float(text), 0.0]) for text in input
+            ]
+        )
+
+    aug = OpenAIAug(
+        api_key='test',
+        batcher=EmbeddingBatcher(max_items=2, max_workers=3, backoff=0),
+    )
+    aug.async_model = SimpleNamespace(
+        embeddings=SimpleNamespace(create=create)
+    )
+
+    async def run() -> list[Any]:
+        return await asyncio.gather(
+            *(
+                aug.aget_embedding([str(i) for i in range(start, start + 6)])
+                for start in range(0, 30, 6)
+            )
+        )
+
+    results = asyncio.run(run())
+    for start, result in zip(range(0, 30, 6), results):
+        np.testing.assert_array_equal(
+            result[:, 0], np.arange(start, start + 6)
+        )
+    assert state['calls'] == 15
+    assert state['peak'] == 3
@@ -0,0 +1,127 @@
+"""Tests for Rago package: batched and concurrent embedding requests."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+from types import SimpleNamespace
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+import pytest
+
+from rago.augmented.batching import EmbeddingBatcher, is_transient
+from rago.augmented.openai import OpenAIAug
+
+
+def _fake_embed(batch: list[str]) -> npt.NDArray[np.float32]:
+    # later batches finish first, so the output order is not the call order
+    time.sleep(0.01 / (1 + int(batch[0])))
+    return np.array([[float(text), 1.0] for text in batch], dtype=np.float32)
+
+
+def test_batches_by_items_and_tokens() -> None:
+    """Test that batches respect both the item and the token limits."""
+    batcher = EmbeddingBatcher(max_items=3)
+    assert batcher.batches(['a'] * 7) == [(0, 3), (3, 6), (6, 7)]
+
+    # 40 characters are about 11 tokens
+    batcher = EmbeddingBatcher(max_items=10, max_tokens=25)
+    texts = ['x' * 40, 'x' * 40, 'x' * 40, 'x' * 400, 'x']
+    assert batcher.batches(texts) == [(0, 2), (2, 3), (3, 4), (4, 5)]
+    assert EmbeddingBatcher().batches(texts) == [(0, 5)]
+
+
+def test_embed_keeps_order() -> None:
+    """Test that concurrent batches are reassembled in input order."""
+    texts = [str(i) for i in range(20)]
+    result = EmbeddingBatcher(max_items=3, max_workers=4).embed(
+        texts, _fake_embed
+    )
+    assert result.dtype == np.float32
+    assert result.flags.c_contiguous
+    np.testing.assert_array_equal(result[:, 0], np.arange(20))
+
+
+def test_embed_retries_only_failed_batches() -> None:
+    """Test that a failing batch is retried alone until it succeeds."""
+    calls: list[str] = []
+    failures = {'4': 2}
+    lock = threading.Lock()
+
+    def flaky(batch: list[str]) -> npt.NDArray[np.float32]:
+        with lock:
+            calls.append(batch[0])
+            if failures.get(batch[0], 0):
+                failures[batch[0]] -= 1
+                raise ConnectionError('rate limited')
+        return _fake_embed(batch)
+
+    batcher = EmbeddingBatcher(max_items=2, retries=2, backoff=0)
+    result = batcher.embed([str(i) for i in range(6)], flaky)
+    np.testing.assert_array_equal(result[:, 0], np.arange(6))
+    assert sorted(calls) == ['0', '2', '4', '4', '4']
+
+    failures['0'] = 3
+    with pytest.raises(ConnectionError):
+        batcher.embed([str(i) for i in range(6)], flaky)
+
+
+def test_embed_raises_permanent_errors_at_once() -> None:
+    """Test that only transient errors are retried."""
+    calls: list[str] = []
+
+    def invalid(batch: list[str]) -> npt.NDArray[np.float32]:
+        calls.append(batch[0])
+        raise ValueError('invalid input')
+
+    batcher = EmbeddingBatcher(retries=3, backoff=0)
+    with pytest.raises(ValueError, match='invalid input'):
+        batcher.embed(['0', '1'], invalid)
+    assert calls == ['0']
+
+
+def test_is_transient() -> None:
+    """Test the errors recognized as worth retrying."""
+    import httpx
+    import openai
+
+    request = httpx.Request('POST', 'https://api.example.com')
+
+    def status_error(status: int) -> openai.APIStatusError:
+        response = httpx.Response(status, request=request)
+        return openai.APIStatusError('error', response=response, body=None)
+
+    assert is_transient(TimeoutError())
+    assert is_transient(ConnectionResetError())
+    assert is_transient(openai.APIConnectionError(request=request))
+    assert is_transient(openai.APITimeoutError(request=request))
+    assert is_transient(status_error(429))
+    assert is_transient(status_error(503))
+    assert not is_transient(status_error(400))
+    assert not is_transient(status_error(401))
+    assert not is_transient(ValueError('invalid input'))
+
+
+def test_openai_get_embedding_is_batched() -> None:
+    """Test that OpenAIAug sends one request per batch."""
+    requests: list[list[str]] = []
+
+    def create(input: list[str], model: str) -> Any:
+        requests.append(input)
+        return SimpleNamespace(
+            data=[
+                SimpleNamespace(embedding=[float(text), 0.0]) for text in input
+            ]
+        )
+
+    aug = OpenAIAug(
+        api_key='test', batcher=EmbeddingBatcher(max_items=4, backoff=0)
+    )
+    aug.model = SimpleNamespace(embeddings=SimpleNamespace(create=create))
+    result = aug.get_embedding([str(i) for i in range(10)])
+    assert [len(batch) for batch in requests] == [4, 4, 2]
+    np.testing.assert_array_equal(result[:, 0], np.arange(10))
+    assert OpenAIAug(api_key='test').batcher.max_items == 2048
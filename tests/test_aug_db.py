@@ -4,9 +4,10 @@ import sys
 import tempfile
 
 from functools import partial
-from typing import Generator, Optional
+from typing import Any, Generator, Optional
 
 import chromadb
+import numpy as np
 import pytest
 
 from chromadb.config import Settings
@@ -120,3 +121,126 @@ def test_aug_chromadb(
     assert len(ids) == 2
     assert ids[0] == question_id
     assert expected_answer.lower() in documents[int(ids[0])].lower()
+
+
+@pytest.mark.skipif(
+    sys.platform == 'win32',
+    reason='Skipping test on Windows due to file locking issues.',
+)
+def test_chromadb_add_remove_update(temp_dir: str) -> None:
+    """Change single vectors without rebuilding the collection."""
+    try:
+        db = ChromaDB(client=create_chroma_client(temp_dir))
+        db.add(['a', 'b', 'c'], [[0.0, 1.0], [1.0, 0.0], [1.0, 1.0]])
+        db.remove(['a'])
+        db.update(['b'], [[0.0, 1.0]])
+        _, ids = db.search(query_encoded=[0.0, 1.0], top_k=2)
+    except Exception as exc:
+        skip_if_runtime_unavailable('chroma', exc)
+        raise
+
+    assert ids == ['b', 'c']
+
+
+def test_chromadb_search_many(temp_dir: str) -> None:
+    """Answer several queries with a single collection query."""
+    try:
+        db = ChromaDB(client=create_chroma_client(temp_dir))
+        db.add(['a', 'b'], [[0.0, 1.0], [1.0, 0.0]])
+        results = db.search_many([[0.0, 1.0], [1.0, 0.0]], top_k=1)
+    except Exception as exc:
+        skip_if_runtime_unavailable('chroma', exc)
+        raise
+
+    assert [list(ids) for _, ids in results] == [['a'], ['b']]
+
+
+def test_chromadb_cosine_scores(temp_dir: str) -> None:
+    """Return cosine similarities rather than distances."""
+    try:
+        db = ChromaDB(
+            client=create_chroma_client(temp_dir),
+            collection_name='cosine',
+            metric='cosine',
+        )
+        db.add(['a', 'b'], [[0.0, 2.0], [1.0, 1.0]])
+        scores, ids = db.search(query_encoded=[0.0, 1.0], top_k=2)
+    except Exception as exc:
+        skip_if_runtime_unavailable('chroma', exc)
+        raise
+
+    assert list(ids) == ['a', 'b']
+    np.testing.assert_allclose(scores, [1.0, 0.5**0.5], rtol=1e-4)
+
+
+class CountingCollection:
+    """Proxy recording the size of every upsert sent to a collection."""
+
+    def __init__(self, collection: Any) -> None:
+        self.collection = collection
+        self.upserts: list[int] = []
+
+    def upsert(self, **kwargs: Any) -> None:
+        """Record the batch size and forward the call."""
+        self.upserts.append(len(kwargs['ids']))
+        self.collection.upsert(**kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        """Forward everything else to the wrapped collection."""
+        return getattr(self.collection, name)
+
+
+def test_chromadb_embed_in_batches_with_positional_ids(temp_dir: str) -> None:
+    """Stream chunks in batches and skip the ones already stored."""
+    texts = [f'chunk {i}' for i in range(5)]
+    try:
+        db = ChromaDB(client=create_chroma_client(temp_dir), batch_size=2)
+        collection = CountingCollection(db.collection)
+        db.collection = collection
+        db.embed((iter(texts[:3]), ([float(i), 1.0] for i in range(3))))
+        db.embed((texts, [[float(i), 1.0] for i in range(5)]))
+        _, ids = db.search(query_encoded=[4.0, 1.0], top_k=1)
+    except Exception as exc:
+        skip_if_runtime_unavailable('chroma', exc)
+        raise
+
+    assert collection.upserts == [2, 1, 1, 1]
+    assert collection.count() == 5
+    assert ids == ['4']
+
+
+def test_chromadb_embed_rewrites_changed_vectors(temp_dir: str) -> None:
+    """Replace the vectors of unchanged texts, e.g. after a model change."""
+    texts = ['a', 'b', 'c']
+    try:
+        db = ChromaDB(client=create_chroma_client(temp_dir))
+        db.embed((texts, [[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]]))
+        db.embed((texts, [[0.0, 1.0], [1.0, 0.0], [-1.0, -1.0]]))
+        _, ids = db.search(query_encoded=[0.0, 1.0], top_k=1)
+    except Exception as exc:
+        skip_if_runtime_unavailable('chroma', exc)
+        raise
+
+    assert ids == ['0']
+
+
+def test_chromadb_embed_replaces_a_larger_corpus(temp_dir: str) -> None:
+    """Drop the positions a shorter corpus no longer uses."""
+    try:
+        db = ChromaDB(client=create_chroma_client(temp_dir), batch_size=2)
+        db.embed(
+            (
+                [f'old {i}' for i in range(5)],
+                [[float(i), 1.0] for i in range(5)],
+            )
+        )
+        db.embed((['new 0', 'new 1'], [[0.0, 1.0], [1.0, 0.0]]))
+        stored = db.collection.get(include=['documents'])
+    except Exception as exc:
+        skip_if_runtime_unavailable('chroma', exc)
+        raise
+
+    assert sorted(zip(stored['ids'], stored['documents'])) == [
+        ('0', 'new 0'),
+        ('1', 'new 1'),
+    ]
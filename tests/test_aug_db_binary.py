@@ -0,0 +1,108 @@
+"""Tests for Rago package: binary-quantized vector database."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from rago import DB
+from rago.augmented.db import BinaryDB, FaissDB
+from rago.augmented.db.binary import binarize
+
+
+@pytest.fixture
+def vectors() -> np.ndarray:
+    """Return clustered float32 vectors, like real embeddings."""
+    rng = np.random.default_rng(0)
+    centres = rng.standard_normal((50, 64), dtype=np.float32)
+    labels = rng.integers(50, size=2_000)
+    noise = rng.standard_normal((2_000, 64), dtype=np.float32)
+    return centres[labels] + 0.5 * noise
+
+
+def test_binarize_packs_sign_bits() -> None:
+    """Keep one bit per dimension, padded to whole bytes."""
+    codes = binarize(np.array([[1.0, -1.0, 0.5] + [-1.0] * 7]))
+
+    assert codes.dtype == np.uint8
+    assert codes.tolist() == [[0b10100000, 0]]
+
+
+def test_binary_matches_exact_search(
+    vectors: np.ndarray, tmp_path: Path
+) -> None:
+    """Rescore Hamming candidates with the float vectors on disk."""
+    db = BinaryDB(path=tmp_path / 'vectors.f32')
+    db.embed(vectors)
+    exact = FaissDB(metric='cosine')
+    exact.embed(vectors)
+
+    results = db.search_many(vectors[:20], top_k=5)
+    expected = exact.search_many(vectors[:20], top_k=5)
+
+    assert (tmp_path / 'vectors.f32').exists()
+    assert db.index.code_size == 8
+    for (scores, ids), (expected_scores, expected_ids) in zip(
+        results, expected
+    ):
+        assert list(ids)[:1] == list(expected_ids)[:1]
+        assert np.all(np.diff(np.asarray(scores)) <= 0)
+    assert db.recall(vectors[:20], top_k=5) >= 0.9
+
+
+@pytest.mark.parametrize('metric', ['cosine', 'ip', 'l2'])
+def test_binary_rescores_in_blocks(
+    vectors: np.ndarray, metric: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Give the same results whatever the rescoring block size."""
+    db = BinaryDB(metric=metric)
+    db.embed(vectors)
+    expected = db.search_many(vectors[:8], top_k=5)
+
+    monkeypatch.setattr(
+        'rago.augmented.db.binary.RESCORE_BLOCK', 7 * vectors.shape[1]
+    )
+    results = db.search_many(vectors[:8], top_k=5)
+
+    for (scores, ids), (expected_scores, expected_ids) in zip(
+        results, expected
+    ):
+        assert list(ids) == list(expected_ids)
+        np.testing.assert_allclose(scores, expected_scores, rtol=1e-5)
+
+
+def test_binary_tune_reaches_recall(vectors: np.ndarray) -> None:
+    """Pick the smallest rescore factor meeting the recall target."""
+    db = BinaryDB()
+    db.embed(vectors)
+
+    reached = db.tune(vectors[:20], top_k=10, target_recall=0.95)
+
+    assert reached >= 0.95
+    assert db.rescore_factor < 256
+
+
+@pytest.mark.parametrize('index_factory', ['BFlat', 'BHNSW16'])
+def test_binary_remove_filter_and_threshold(
+    vectors: np.ndarray, index_factory: str
+) -> None:
+    """Hide removed vectors and honour filters and score thresholds."""
+    db = DB(backend='binary', index_factory=index_factory).db
+    db.add(
+        [f'chunk-{i}' for i in range(2_000)],
+        vectors,
+        [{'even': i % 2 == 0} for i in range(2_000)],
+    )
+    db.remove(['chunk-0'])
+
+    _, ids = db.search(vectors[0], top_k=5)
+    _, odd_ids = db.search(vectors[1], top_k=5, filter={'even': False})
+    scores, _ = db.search(vectors[1], top_k=5, min_score=0.99)
+
+    assert isinstance(db, BinaryDB)
+    assert 'chunk-0' not in ids
+    assert list(odd_ids)[:1] == ['chunk-1']
+    assert all(int(id_.split('-')[1]) % 2 for id_ in odd_ids)
+    assert list(scores) == [pytest.approx(1.0)]
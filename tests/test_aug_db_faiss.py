@@ -0,0 +1,393 @@
+"""Tests for Rago package: FaissDB index types."""
+
+from __future__ import annotations
+
+import threading
+
+from pathlib import Path
+from typing import Any
+
+import faiss
+import numpy as np
+import pytest
+
+from rago import DB
+from rago.augmented.db import FaissDB
+from rago.augmented.db.faiss import quantized_factory
+
+from .models import KeywordAug
+
+TOP_K = 5
+
+
+@pytest.fixture
+def vectors() -> np.ndarray:
+    """Return a small clustered corpus of float32 vectors."""
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((16, 16), dtype=np.float32)
+    labels = rng.integers(0, len(centers), 2_000)
+    noise = rng.standard_normal((2_000, 16), dtype=np.float32)
+    return np.ascontiguousarray(centers[labels] + 0.3 * noise)
+
+
+def _neighbours(db: FaissDB, queries: np.ndarray) -> np.ndarray:
+    return np.stack(
+        [np.asarray(db.search(query[None, :], TOP_K)[1]) for query in queries]
+    )
+
+
+def test_db_config_builds_faiss_index_factory() -> None:
+    """Forward faiss options from the declarative DB helper."""
+    db = DB(backend='faiss', index_factory='HNSW16', ef_search=32).db
+
+    assert isinstance(db, FaissDB)
+    assert db.search_params == {'ef_search': 32}
+
+
+@pytest.mark.parametrize(
+    'index_factory,params,index_type',
+    [
+        ('IVF16,Flat', {'nprobe': 16}, faiss.IndexIVFFlat),
+        ('HNSW16', {'ef_search': 64}, faiss.IndexHNSWFlat),
+        ('IVF16,PQ4,RFlat', {'nprobe': 16, 'k_factor': 8}, faiss.IndexRefine),
+    ],
+)
+def test_faiss_ann_recall_against_flat(
+    vectors: np.ndarray,
+    index_factory: str,
+    params: dict[str, int],
+    index_type: type,
+) -> None:
+    """Match the exact baseline when the search knobs are generous."""
+    flat = FaissDB()
+    flat.embed(vectors)
+    ann = FaissDB(index_factory=index_factory, **params)
+    ann.embed(vectors)
+
+    queries = vectors[:20]
+    truth = _neighbours(flat, queries)
+    found = _neighbours(ann, queries)
+    hits = sum(len(np.intersect1d(a, b)) for a, b in zip(found, truth))
+
+    index = ann.index
+    if isinstance(index, faiss.IndexIDMap):
+        index = faiss.downcast_index(index.index)
+    assert isinstance(index, index_type)
+    assert hits / truth.size >= 0.9
+
+
+def test_faiss_trains_on_a_sample(
+    vectors: np.ndarray, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Train on at most `train_size` vectors sampled from the corpus."""
+    sizes: list[int] = []
+    original = FaissDB._training_sample
+
+    def spy(self: FaissDB, index: object, data: np.ndarray) -> np.ndarray:
+        sample = original(self, index, data)
+        sizes.append(len(sample))
+        return sample
+
+    monkeypatch.setattr(FaissDB, '_training_sample', spy)
+    db = FaissDB(index_factory='IVF8,Flat', train_size=500)
+    db.embed(vectors)
+
+    assert sizes == [500]
+    assert db.index.ntotal == len(vectors)
+
+
+def test_faiss_rejects_unsupported_search_params(vectors: np.ndarray) -> None:
+    """Fail clearly when a knob does not apply to the index type."""
+    db = FaissDB(index_factory='HNSW16')
+    db.embed(vectors)
+
+    with pytest.raises(ValueError, match='nprobe'):
+        db.set_search_params(nprobe=4)
+
+
+@pytest.mark.parametrize('mmap', [True, False])
+def test_faiss_save_and_load(
+    vectors: np.ndarray, tmp_path: Path, mmap: bool
+) -> None:
+    """Restore an index and its search settings from disk."""
+    db = FaissDB(index_factory='IVF8,Flat', nprobe=8)
+    db.embed(vectors)
+    db.save(tmp_path / 'index.faiss')
+
+    loaded = FaissDB.load(tmp_path / 'index.faiss', mmap=mmap)
+
+    assert loaded.index_factory == 'IVF8,Flat'
+    assert loaded.search_params == {'nprobe': 8}
+    assert loaded.read_only is mmap
+    np.testing.assert_array_equal(
+        _neighbours(loaded, vectors[:5]), _neighbours(db, vectors[:5])
+    )
+    if mmap:
+        with pytest.raises(ValueError, match='memory-mapped'):
+            loaded.add([len(vectors)], vectors[:1])
+
+
+def test_attach_loaded_index_skips_embedding(
+    animals_data: list[str], tmp_path: Path
+) -> None:
+    """Search a restored index without embedding the corpus again."""
+    aug = KeywordAug(top_k=1)
+    aug.index(animals_data)
+    aug.db.save(tmp_path / 'index.faiss')
+
+    restored = KeywordAug(db=FaissDB.load(tmp_path / 'index.faiss'), top_k=1)
+    restored.attach_index(animals_data)
+    result = restored.search('honey bee', animals_data)
+
+    assert 'Honey Bee' in result[0]
+    assert restored.embedded == [['honey bee']]
+
+
+@pytest.mark.parametrize(
+    'index_factory,params',
+    [('Flat', {}), ('IVF8,Flat', {'nprobe': 8}), ('HNSW16', {})],
+)
+def test_faiss_incremental_add_remove_update(
+    vectors: np.ndarray, index_factory: str, params: dict[str, int]
+) -> None:
+    """Keep stable external ids across add, remove, update and compact."""
+    db = FaissDB(index_factory=index_factory, **params)
+    ids = [f'chunk-{i}' for i in range(len(vectors))]
+    db.add(ids, vectors)
+
+    assert list(db.search(vectors[:1], 1)[1]) == ['chunk-0']
+
+    db.remove(['chunk-0'])
+    assert 'chunk-0' not in db.search(vectors[:1], TOP_K)[1]
+
+    db.update(['chunk-1'], vectors[:1])
+    assert list(db.search(vectors[:1], 1)[1]) == ['chunk-1']
+
+    with pytest.raises(ValueError, match='already in the database'):
+        db.add(['chunk-2'], vectors[:1])
+
+    thread = db.compact(background=True)
+    assert thread is not None
+    thread.join()
+
+    assert db.index.ntotal == len(vectors) - 1
+    assert list(db.search(vectors[:1], 1)[1]) == ['chunk-1']
+    assert list(db.search(vectors[2:3], 1)[1]) == ['chunk-2']
+
+
+@pytest.mark.parametrize('index_factory', ['Flat', 'HNSW16'])
+def test_faiss_compact_does_not_block_searches(
+    vectors: np.ndarray, index_factory: str
+) -> None:
+    """Search and add while a background compaction builds its index."""
+    db = FaissDB(index_factory=index_factory)
+    db.add(list(range(len(vectors))), vectors)
+    db.remove(list(range(100)))
+
+    started, release = threading.Event(), threading.Event()
+    without = db._without
+
+    def slow_without(index: Any, deleted: Any) -> Any:
+        started.set()
+        assert release.wait(10)
+        return without(index, deleted)
+
+    db._without = slow_without  # type: ignore[method-assign]
+    thread = db.compact(background=True)
+    assert thread is not None
+    assert started.wait(10)
+
+    # the lock is free: searches and writes go through meanwhile
+    assert list(db.search(vectors[500], 1)[1]) == [500]
+    db.add(['new'], vectors[:1] * 3)
+    db.remove([200])
+    release.set()
+    thread.join()
+
+    assert db.index.ntotal == len(vectors) - 100 + 1
+    assert list(db.search(vectors[0] * 3, 1)[1]) == ['new']
+    assert 200 not in list(db.search(vectors[200], TOP_K)[1])
+    assert len(db._deleted) == 1
+
+
+def test_faiss_save_and_load_keeps_ids(
+    vectors: np.ndarray, tmp_path: Path
+) -> None:
+    """Restore external ids and pending removals from disk."""
+    db = FaissDB()
+    db.add([f'chunk-{i}' for i in range(len(vectors))], vectors)
+    db.remove(['chunk-0'])
+    db.save(tmp_path / 'index.faiss')
+
+    loaded = FaissDB.load(tmp_path / 'index.faiss', mmap=False)
+
+    assert list(loaded.search(vectors[:1], 1)[1]) != ['chunk-0']
+    assert list(loaded.search(vectors[3:4], 1)[1]) == ['chunk-3']
+
+
+def test_faiss_search_many_matches_single_searches(
+    vectors: np.ndarray,
+) -> None:
+    """Return the same neighbours as one search per query."""
+    db = FaissDB()
+    db.add([f'chunk-{i}' for i in range(len(vectors))], vectors)
+    db.remove(['chunk-0'])
+
+    results = db.search_many(vectors[:10], TOP_K)
+
+    assert len(results) == 10
+    for query, (distances, ids) in zip(vectors[:10], results):
+        expected_distances, expected_ids = db.search(query[None, :], TOP_K)
+        assert list(ids) == list(expected_ids)
+        np.testing.assert_allclose(distances, expected_distances)
+        assert 'chunk-0' not in ids
+
+
+def test_faiss_search_before_embedding() -> None:
+    """Return empty results from a database that holds no index yet."""
+    db = FaissDB()
+
+    scores, ids = db.search(np.ones(16, dtype=np.float32), top_k=3)
+
+    assert len(scores) == 0
+    assert list(ids) == []
+    assert db.search_many(np.ones((2, 16)), top_k=3)[1][1] == []
+
+
+@pytest.mark.parametrize('index_factory', ['Flat', 'IVF8,Flat', 'HNSW16'])
+def test_faiss_cosine_metric(vectors: np.ndarray, index_factory: str) -> None:
+    """Normalize at insert time and return cosine similarities."""
+    db = FaissDB(index_factory=index_factory, metric='cosine')
+    original = vectors.copy()
+    db.embed(vectors)
+    scores, ids = db.search(3 * vectors[7], top_k=TOP_K)
+
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = normalized[list(ids)] @ normalized[7]
+
+    np.testing.assert_array_equal(vectors, original)
+    assert list(ids)[:1] == [7]
+    np.testing.assert_allclose(scores, expected, rtol=1e-5)
+    assert list(scores) == sorted(scores, reverse=True)
+
+
+def test_faiss_scores_are_higher_is_better(vectors: np.ndarray) -> None:
+    """Negate L2 distances so the best match has the highest score."""
+    db = FaissDB()
+    db.embed(vectors)
+    scores, ids = db.search(vectors[3], top_k=TOP_K)
+
+    assert list(ids)[:1] == [3]
+    assert np.asarray(scores)[0] == pytest.approx(0.0, abs=1e-4)
+    assert list(scores) == sorted(scores, reverse=True)
+
+
+def test_faiss_metric_survives_save_and_load(
+    vectors: np.ndarray, tmp_path: Path
+) -> None:
+    """Store the metric with the index settings."""
+    db = FaissDB(metric='cosine')
+    db.embed(vectors)
+    db.save(tmp_path / 'index.faiss')
+
+    loaded = FaissDB.load(tmp_path / 'index.faiss')
+
+    assert loaded.metric == 'cosine'
+    assert DB(backend='faiss', metric='ip').db.metric == 'ip'
+    with pytest.raises(ValueError, match='Unknown metric'):
+        FaissDB(metric='hamming')
+
+
+@pytest.mark.parametrize(
+    'index_factory,dtype,expected',
+    [
+        ('Flat', 'int8', 'SQ8'),
+        ('IVF16,Flat', 'float16', 'IVF16,SQfp16'),
+        ('HNSW16', 'int8', 'HNSW16_SQ8'),
+        ('Flat', 'float32', 'Flat'),
+    ],
+)
+def test_quantized_factory(
+    index_factory: str, dtype: str, expected: str
+) -> None:
+    """Swap flat vector storage for a scalar quantizer."""
+    assert quantized_factory(index_factory, dtype) == expected
+
+
+def test_quantized_factory_rejects_compressed_indexes() -> None:
+    """Refuse indexes whose vectors are already compressed."""
+    with pytest.raises(ValueError, match='Cannot store'):
+        FaissDB(index_factory='IVF16,PQ4', dtype='int8')
+    with pytest.raises(ValueError, match='Unsupported dtype'):
+        FaissDB(dtype='int4')
+
+
+@pytest.mark.parametrize('dtype', ['int8', 'float16'])
+def test_faiss_quantized_storage(
+    vectors: np.ndarray, tmp_path: Path, dtype: str
+) -> None:
+    """Keep recall and scores close to float32 with smaller codes."""
+    flat = FaissDB(metric='cosine')
+    flat.embed(vectors)
+    db = FaissDB(metric='cosine', dtype=dtype)
+    db.embed(vectors[:1_500])
+    db.add(list(range(1_500, 2_000)), vectors[1_500:])
+    db.remove([7])
+
+    queries = vectors[:20]
+    truth = _neighbours(flat, queries)
+    found = _neighbours(db, queries)
+    hits = sum(len(np.intersect1d(a, b)) for a, b in zip(found, truth))
+    scores, _ = db.search(vectors[3], top_k=1)
+    db.save(tmp_path / 'index.faiss')
+
+    assert faiss.downcast_index(db.index.index).code_size == (
+        16 if dtype == 'int8' else 32
+    )
+    assert hits / truth.size >= 0.9
+    assert np.asarray(scores)[0] == pytest.approx(1.0, abs=1e-2)
+    assert FaissDB.load(tmp_path / 'index.faiss').dtype == dtype
+
+
+@pytest.mark.parametrize(
+    'index_factory,knob',
+    [('IVF32,Flat', 'nprobe'), ('HNSW8', 'ef_search')],
+)
+def test_faiss_tune_reaches_recall_and_survives_load(
+    tmp_path: Path, index_factory: str, knob: str
+) -> None:
+    """Store the tuned search parameters with the saved index."""
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((3_000, 16), dtype=np.float32)
+    db = FaissDB(index_factory=index_factory)
+    db.embed(vectors)
+
+    tuning = db.tune(vectors, target_recall=0.9, top_k=5, num_queries=50)
+    db.save(tmp_path / 'index.faiss')
+    loaded = FaissDB.load(tmp_path / 'index.faiss')
+
+    assert tuning['recall'] >= 0.9
+    assert set(tuning['params']) == {knob}
+    assert db.search_params == tuning['params']
+    assert loaded.search_params == tuning['params']
+    assert loaded.tuning == tuning
+
+
+def test_faiss_tune_refined_index(vectors: np.ndarray) -> None:
+    """Tune `k_factor` together with `nprobe` for refined indexes."""
+    ids = [f'chunk-{i}' for i in range(2_000)]
+    db = FaissDB(index_factory='IVF16,PQ4,RFlat')
+    db.add(ids, vectors)
+
+    tuning = db.tune(
+        vectors,
+        ids=ids,
+        target_recall=1.1,
+        top_k=5,
+        num_queries=20,
+        repeat=1,
+    )
+
+    # an unreachable target keeps the combination with the best recall
+    assert set(tuning['params']) == {'nprobe', 'k_factor'}
+    assert 0.5 < tuning['recall'] <= 1.0
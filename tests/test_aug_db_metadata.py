@@ -0,0 +1,222 @@
+"""Tests for per-chunk metadata and filtered vector search."""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+
+from pathlib import Path
+
+import chromadb
+import numpy as np
+import pytest
+
+from chromadb.config import Settings
+from rago.augmented.db import ChromaDB, FaissDB, MetadataStore, NumpyDB
+from rago.augmented.db.metadata import to_chroma_where
+
+from .helpers import skip_if_runtime_unavailable
+from .models import KeywordAug
+
+TENANTS = ('acme', 'globex', 'initech')
+
+
+@pytest.fixture
+def vectors() -> np.ndarray:
+    """Return a small random corpus of float32 vectors."""
+    rng = np.random.default_rng(0)
+    return rng.standard_normal((600, 8), dtype=np.float32)
+
+
+@pytest.fixture
+def metadata() -> list[dict[str, object]]:
+    """Return one metadata record per vector."""
+    return [
+        {
+            'source': f'doc-{i % 10}.pdf',
+            'page': i % 25,
+            'tenant': TENANTS[i % 3],
+        }
+        for i in range(600)
+    ]
+
+
+def test_metadata_store_masks() -> None:
+    """Evaluate equality, comparisons, sets and boolean clauses."""
+    store = MetadataStore()
+    store.set(
+        [0, 1, 3],
+        [
+            {'tenant': 'a', 'page': 1},
+            {'tenant': 'b', 'page': 5},
+            {'tenant': 'a'},
+        ],
+    )
+    store.resize(5)
+
+    def rows(filter: dict[str, object]) -> list[int]:
+        return np.flatnonzero(store.mask(filter)).tolist()
+
+    assert rows({'tenant': 'a'}) == [0, 3]
+    assert rows({'page': {'$gte': 2}}) == [1]
+    assert rows({'page': {'$ne': 1}}) == [1]
+    assert rows({'tenant': {'$in': ['b', 'c']}}) == [1]
+    assert rows({'$or': [{'page': 1}, {'tenant': 'b'}]}) == [0, 1]
+    assert rows({'tenant': 'a', 'page': 1}) == [0]
+    assert rows({'page': 'x'}) == []
+    with pytest.raises(ValueError, match='Unknown filter operator'):
+        rows({'page': {'$near': 1}})
+
+    # the running size follows overwrites and truncation
+    nbytes = store.nbytes
+    store.set([0], [{'tenant': 'a' * 1_000}])
+    assert store.nbytes > nbytes + 900
+    store.truncate(1)
+    store.set([0], [{}])
+    assert store.nbytes == 8 * store.size * len(store.columns)
+
+
+def test_to_chroma_where_splits_operators() -> None:
+    """Give chroma one key per level, including ranges on one field."""
+    assert to_chroma_where({'page': {'$gte': 1}}) == {'page': {'$gte': 1}}
+    assert to_chroma_where({'page': {'$gte': 1, '$lte': 5}}) == {
+        '$and': [{'page': {'$gte': 1}}, {'page': {'$lte': 5}}]
+    }
+    assert to_chroma_where(
+        {'$or': [{'page': {'$gt': 1, '$lt': 3}}, {'tenant': 'a'}]}
+    ) == {
+        '$or': [
+            {'$and': [{'page': {'$gt': 1}}, {'page': {'$lt': 3}}]},
+            {'tenant': 'a'},
+        ]
+    }
+
+
+@pytest.mark.parametrize(
+    'index_factory,params',
+    [
+        ('Flat', {}),
+        ('IVF4,Flat', {'nprobe': 4}),
+        ('HNSW16', {}),
+        ('IVF4,PQ4,RFlat', {'nprobe': 4}),
+    ],
+)
+def test_faiss_filtered_search(
+    vectors: np.ndarray,
+    metadata: list[dict[str, object]],
+    index_factory: str,
+    params: dict[str, int],
+) -> None:
+    """Only return vectors whose metadata matches the filter."""
+    db = FaissDB(index_factory=index_factory, **params)
+    db.embed(vectors, metadata=metadata)
+    db.remove([3])
+
+    filter = {'tenant': 'acme', 'page': {'$lt': 10}}
+    results = db.search_many(vectors[:4], top_k=5, filter=filter)
+
+    for _, ids in results:
+        assert ids
+        for id_ in ids:
+            assert id_ != 3
+            assert metadata[id_]['tenant'] == 'acme'
+            assert metadata[id_]['page'] < 10
+    assert list(results[0][1])[:1] == [0]
+
+
+def test_faiss_filter_without_matches(
+    vectors: np.ndarray, metadata: list[dict[str, object]]
+) -> None:
+    """Return empty results when nothing matches."""
+    db = FaissDB()
+    db.embed(vectors, metadata=metadata)
+
+    scores, ids = db.search(vectors[0], top_k=3, filter={'tenant': 'hooli'})
+
+    assert list(ids) == []
+    assert len(list(scores)) == 0
+
+
+def test_faiss_metadata_survives_save_and_load(
+    vectors: np.ndarray, metadata: list[dict[str, object]], tmp_path: Path
+) -> None:
+    """Store metadata in a columnar sidecar next to the index."""
+    db = FaissDB()
+    db.add([f'chunk-{i}' for i in range(600)], vectors, metadata)
+    db.save(tmp_path / 'index.faiss')
+
+    loaded = FaissDB.load(tmp_path / 'index.faiss', mmap=False)
+    _, ids = loaded.search(vectors[1], top_k=3, filter={'tenant': 'globex'})
+
+    assert (tmp_path / 'index.faiss.metadata.json').exists()
+    assert loaded.get_metadata(['chunk-1']) == [metadata[1]]
+    assert list(ids)[:1] == ['chunk-1']
+
+
+def test_numpy_filtered_search(
+    vectors: np.ndarray, metadata: list[dict[str, object]]
+) -> None:
+    """Score only the matching rows and keep metadata across removals."""
+    db = NumpyDB(block_size=64)
+    db.embed(vectors, metadata=metadata)
+    db.remove([0])
+
+    _, ids = db.search(vectors[599], top_k=5, filter={'tenant': 'initech'})
+
+    assert list(ids)[:1] == [599]
+    assert all(metadata[id_]['tenant'] == 'initech' for id_ in ids)
+    assert db.get_metadata([599]) == [metadata[599]]
+
+
+@pytest.mark.skipif(
+    sys.platform == 'win32',
+    reason='Skipping test on Windows due to file locking issues.',
+)
+def test_chroma_filtered_search(
+    vectors: np.ndarray, metadata: list[dict[str, object]]
+) -> None:
+    """Push the filter down as chroma's `where` clause."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        try:
+            client = chromadb.PersistentClient(
+                path=temp_dir, settings=Settings(allow_reset=True)
+            )
+            db = ChromaDB(client=client)
+            db.add(list(range(600)), vectors, metadata)
+            _, ids = db.search(
+                vectors[2],
+                top_k=5,
+                filter={'tenant': 'initech', 'page': {'$gte': 2}},
+            )
+            _, ranged = db.search(
+                vectors[2],
+                top_k=50,
+                filter={'page': {'$gte': 2, '$lte': 4}},
+            )
+            stored = db.get_metadata([2])
+        except Exception as exc:
+            skip_if_runtime_unavailable('chroma', exc)
+            raise
+
+    assert list(ids)[:1] == ['2']
+    assert all(metadata[int(id_)]['tenant'] == 'initech' for id_ in ids)
+    assert stored == [metadata[2]]
+    assert ranged
+    assert all(2 <= metadata[int(id_)]['page'] <= 4 for id_ in ranged)
+
+
+def test_augmented_search_with_filter(animals_data: list[str]) -> None:
+    """Narrow an augmentation search by the metadata given at index time."""
+    aug = KeywordAug(top_k=1)
+    aug.index(
+        animals_data,
+        metadata=[
+            {'tenant': TENANTS[i % 2]} for i in range(len(animals_data))
+        ],
+    )
+
+    matching = aug.search('honey bee', animals_data, filter={'tenant': 'acme'})
+    others = aug.search('honey bee', animals_data, filter={'tenant': 'globex'})
+
+    assert 'Honey Bee' in matching[0]
+    assert 'Honey Bee' not in others[0]
@@ -0,0 +1,137 @@
+"""Tests for Rago package: brute-force NumPy vector database."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from rago import DB
+from rago.augmented.db import FaissDB, NumpyDB
+
+from .models import KeywordAug
+
+TOP_K = 5
+
+
+@pytest.fixture
+def vectors() -> np.ndarray:
+    """Return a small random corpus of float32 vectors."""
+    rng = np.random.default_rng(0)
+    return rng.standard_normal((3_000, 16), dtype=np.float32)
+
+
+@pytest.mark.parametrize('metric', ['l2', 'ip', 'cosine'])
+def test_numpy_matches_exact_faiss(vectors: np.ndarray, metric: str) -> None:
+    """Return the exact neighbours and scores of a flat faiss index."""
+    db = NumpyDB(metric=metric, block_size=700)
+    db.embed(vectors)
+    flat = FaissDB(metric=metric)
+    flat.embed(vectors)
+
+    results = db.search_many(vectors[:20], TOP_K)
+    expected = flat.search_many(vectors[:20], TOP_K)
+
+    for (scores, ids), (expected_scores, expected_ids) in zip(
+        results, expected
+    ):
+        assert list(ids) == list(expected_ids)
+        np.testing.assert_allclose(scores, expected_scores, atol=1e-3)
+
+
+@pytest.mark.parametrize('dtype', ['float32', 'float16'])
+def test_numpy_memmap_storage(
+    vectors: np.ndarray, tmp_path: Path, dtype: str
+) -> None:
+    """Grow a memory-mapped matrix across several additions."""
+    path = tmp_path / 'vectors.bin'
+    db = NumpyDB(dtype=dtype, path=path, block_size=512)
+    for start in range(0, len(vectors), 1_000):
+        stop = start + 1_000
+        db.add(list(range(start, stop)), vectors[start:stop])
+
+    _, ids = db.search(vectors[2_500], top_k=1)
+
+    assert list(ids) == [2_500]
+    assert isinstance(db._vectors, np.memmap)
+    assert db.index.dtype == np.dtype(dtype)
+    assert path.stat().st_size >= len(vectors) * 16 * db.index.itemsize
+
+
+def test_numpy_add_remove_update(vectors: np.ndarray) -> None:
+    """Keep external ids stable while rows move around."""
+    db = NumpyDB()
+    db.add([f'chunk-{i}' for i in range(100)], vectors[:100])
+
+    db.remove(['chunk-3', 'chunk-missing'])
+    db.update(['chunk-5'], vectors[3:4])
+
+    assert db.index.shape == (99, 16)
+    assert list(db.search(vectors[3], top_k=1)[1]) == ['chunk-5']
+    assert list(db.search(vectors[99], top_k=1)[1]) == ['chunk-99']
+    with pytest.raises(ValueError, match='already in the database'):
+        db.add(['chunk-7'], vectors[:1])
+
+
+def test_numpy_search_handles_small_and_empty_corpus() -> None:
+    """Return fewer results than requested without failing."""
+    db = NumpyDB()
+
+    assert db.search_many(np.ones((2, 4)), top_k=3)[1][1] == []
+
+    db.embed(np.eye(2, 4, dtype=np.float32))
+
+    assert list(db.search(np.ones(4), top_k=3)[1]) == [0, 1]
+
+
+def test_numpy_backend_through_db_config(animals_data: list[str]) -> None:
+    """Search a corpus with `DB(backend='numpy')`."""
+    db = DB(backend='numpy', metric='cosine').db
+    aug = KeywordAug(db=db, top_k=1)
+
+    result = aug.search('honey bee', animals_data)
+
+    assert isinstance(db, NumpyDB)
+    assert 'Honey Bee' in result[0]
+
+
+@pytest.mark.parametrize('metric', ['l2', 'cosine'])
+def test_numpy_int8_storage(vectors: np.ndarray, metric: str) -> None:
+    """Calibrate int8 codes on the corpus and keep scores close."""
+    db = NumpyDB(metric=metric, dtype='int8', block_size=700)
+    db.embed(vectors.astype(np.float64))
+    exact = NumpyDB(metric=metric)
+    exact.embed(vectors)
+
+    results = db.search_many(vectors[:20], TOP_K)
+    expected = exact.search_many(vectors[:20], TOP_K)
+
+    assert db.index.dtype == np.int8
+    assert np.abs(db.index).max() == 127
+    for (scores, ids), (expected_scores, expected_ids) in zip(
+        results, expected
+    ):
+        assert list(ids)[:1] == list(expected_ids)[:1]
+        np.testing.assert_allclose(
+            scores, expected_scores, rtol=0.05, atol=0.05
+        )
+
+    # later additions reuse the calibration: outliers are clipped under
+    # l2, while cosine normalizes them back onto vector 0
+    db.add(['outlier'], 100 * vectors[:1])
+    if metric == 'l2':
+        assert np.abs(db.index[-1]).max() == 127
+    else:
+        np.testing.assert_array_equal(db.index[-1], db.index[0])
+
+
+def test_numpy_add_leaves_caller_vectors_untouched(
+    vectors: np.ndarray,
+) -> None:
+    """Normalize and quantize without writing into the caller's array."""
+    original = vectors.copy()
+    db = NumpyDB(metric='cosine', dtype='int8')
+    db.embed(vectors)
+
+    np.testing.assert_array_equal(vectors, original)
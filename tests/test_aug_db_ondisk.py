@@ -0,0 +1,130 @@
+"""Tests for Rago package: on-disk IVF lists with a memory budget."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from rago import DB
+from rago.augmented.db import FaissDB
+
+TOP_K = 5
+
+
+@pytest.fixture
+def vectors() -> np.ndarray:
+    """Return a small clustered corpus of float32 vectors."""
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((16, 16), dtype=np.float32)
+    labels = rng.integers(0, len(centers), 4_000)
+    noise = rng.standard_normal((4_000, 16), dtype=np.float32)
+    return np.ascontiguousarray(centers[labels] + 0.3 * noise)
+
+
+@pytest.mark.parametrize('metric', ['l2', 'cosine'])
+def test_on_disk_matches_in_memory_ivf(
+    vectors: np.ndarray, tmp_path: Path, metric: str
+) -> None:
+    """Return the same neighbours as the same IVF index held in memory."""
+    memory = FaissDB(index_factory='IVF16,Flat', nprobe=4, metric=metric)
+    memory.embed(vectors)
+    disk = FaissDB(
+        index_factory='IVF16,Flat',
+        nprobe=4,
+        metric=metric,
+        on_disk=tmp_path / 'lists.ivf',
+    )
+    disk.embed(vectors)
+
+    results = disk.search_many(vectors[:20], TOP_K)
+    expected = memory.search_many(vectors[:20], TOP_K)
+
+    assert len(list(tmp_path.glob('lists.ivf.*'))) == 1
+    for (scores, ids), (expected_scores, expected_ids) in zip(
+        results, expected
+    ):
+        assert list(ids) == list(expected_ids)
+        np.testing.assert_allclose(scores, expected_scores, atol=1e-3)
+
+
+def test_memory_budget_bounds_cached_lists(
+    vectors: np.ndarray, tmp_path: Path
+) -> None:
+    """Keep at most `memory_budget` bytes of lists in memory."""
+    list_bytes = len(vectors) // 16 * (16 * 4 + 8)
+    db = FaissDB(
+        index_factory='IVF16,Flat',
+        nprobe=2,
+        on_disk=tmp_path / 'lists.ivf',
+        memory_budget=8 * list_bytes,
+    )
+    db.embed(vectors)
+
+    # a batch probing every list streams them through the cache
+    db.search_many(vectors[:200], TOP_K)
+    lists = db._lists
+    assert lists is not None
+    assert lists.misses >= 16
+    assert 0 < len(lists) < 16
+    assert lists.nbytes <= 8 * list_bytes
+
+    # repeated queries are then served from memory
+    db.search(vectors[0], TOP_K)
+    hits, misses = lists.hits, lists.misses
+    db.search(vectors[0], TOP_K)
+    assert (lists.hits - hits, lists.misses - misses) == (2, 0)
+
+
+def test_on_disk_add_remove_filter_and_reload(
+    vectors: np.ndarray, tmp_path: Path
+) -> None:
+    """Serve writes, filters and a reloaded index from the list file."""
+    db = DB(
+        backend='faiss',
+        index_factory='IVF16,Flat',
+        nprobe=16,
+        on_disk=tmp_path / 'lists.ivf',
+    ).db
+    db.add(
+        list(range(3_000)),
+        vectors[:3_000],
+        [{'even': i % 2 == 0} for i in range(3_000)],
+    )
+    db.add(list(range(3_000, 4_000)), vectors[3_000:])
+    db.remove([3_500])
+
+    _, added = db.search(vectors[3_600], top_k=1)
+    _, removed = db.search(vectors[3_500], top_k=TOP_K)
+    _, odd = db.search(vectors[1], top_k=TOP_K, filter={'even': False})
+    db.compact()
+    db.save(tmp_path / 'index.faiss')
+    loaded = FaissDB.load(tmp_path / 'index.faiss')
+
+    assert list(added) == [3_600]
+    assert 3_500 not in removed
+    assert list(odd)[:1] == [1]
+    assert all(id_ % 2 for id_ in odd)
+    assert loaded.on_disk == tmp_path / 'lists.ivf'
+    assert list(loaded.search(vectors[7], top_k=1)[1]) == [7]
+    with pytest.raises(ValueError, match='IVF<n>,Flat'):
+        FaissDB(on_disk=tmp_path / 'flat.ivf').embed(vectors)
+
+
+def test_on_disk_embed_replaces_the_list_file(
+    vectors: np.ndarray, tmp_path: Path
+) -> None:
+    """Build a new list file on every embed and delete the previous one."""
+    db = FaissDB(
+        index_factory='IVF16,Flat', nprobe=16, on_disk=tmp_path / 'lists.ivf'
+    )
+    db.embed(vectors[:2_000])
+    first = set(tmp_path.glob('lists.ivf*'))
+    db.embed(vectors[2_000:])
+    second = set(tmp_path.glob('lists.ivf*'))
+
+    assert len(first) == len(second) == 1
+    assert first.isdisjoint(second)
+    _, ids = db.search(vectors[2_007], top_k=1)
+    assert list(ids) == [7]
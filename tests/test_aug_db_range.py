@@ -0,0 +1,169 @@
+"""Tests for score thresholds, range search and adaptive-k."""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+
+import chromadb
+import numpy as np
+import pytest
+
+from chromadb.config import Settings
+from rago.augmented.db import (
+    ChromaDB,
+    DBBase,
+    FaissDB,
+    NumpyDB,
+    ShardedDB,
+)
+from rago.io import Input
+
+from .helpers import skip_if_runtime_unavailable
+from .models import KeywordAug
+
+
+@pytest.fixture
+def vectors() -> np.ndarray:
+    """Return a small random corpus of unit float32 vectors."""
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((500, 16), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def expected_hits(
+    vectors: np.ndarray, query: np.ndarray, metric: str, min_score: float
+) -> set[int]:
+    """Return the ids scoring at least `min_score`, by brute force."""
+    if metric == 'l2':
+        scores = -np.sum((vectors - query) ** 2, axis=1)
+    else:
+        scores = vectors @ query
+    return set(np.flatnonzero(scores >= min_score).tolist())
+
+
+def test_cutoff() -> None:
+    """Cut ranked rows by threshold, cap and the largest score gap."""
+    scores = [0.9, 0.85, 0.8, 0.3, 0.25]
+    ids = ['a', 'b', 'c', 'd', 'e']
+
+    assert DBBase._cutoff(scores, ids, min_score=0.5)[1] == ['a', 'b', 'c']
+    assert DBBase._cutoff(scores, ids, 0.5, max_results=2)[1] == ['a', 'b']
+    assert DBBase._cutoff(scores, ids, adaptive=True)[1] == ['a', 'b', 'c']
+    assert DBBase._result_limit(5, 0.5, None) is None
+    assert DBBase._result_limit(5, None, None) == 5
+
+
+@pytest.mark.parametrize(
+    'index_factory,metric,params,min_score',
+    [
+        ('Flat', 'l2', {}, -1.2),
+        ('Flat', 'cosine', {}, 0.4),
+        ('IVF4,Flat', 'ip', {'nprobe': 4}, 0.4),
+        ('HNSW16', 'cosine', {'ef_search': 256}, 0.4),
+    ],
+)
+def test_faiss_range_search(
+    vectors: np.ndarray,
+    index_factory: str,
+    metric: str,
+    params: dict[str, int],
+    min_score: float,
+) -> None:
+    """Return every hit above the threshold, ranked, without a top-k."""
+    db = FaissDB(index_factory=index_factory, metric=metric, **params)
+    db.embed(vectors)
+    db.remove([1])
+
+    results = db.search_many(vectors[:3], min_score=min_score)
+
+    for query, (scores, ids) in zip(vectors[:3], results):
+        expected = expected_hits(vectors, query, metric, min_score) - {1}
+        scores = np.asarray(scores)
+        assert len(expected) > 2
+        assert set(ids) == expected
+        assert np.all(scores >= min_score - 1e-5)
+        assert np.all(np.diff(scores) <= 0)
+
+    _, capped_ids = db.search(vectors[0], min_score=min_score, max_results=2)
+    assert list(capped_ids) == list(results[0][1])[:2]
+
+
+def test_numpy_range_search(vectors: np.ndarray) -> None:
+    """Keep the hits above the threshold in every block."""
+    db = NumpyDB(metric='cosine', block_size=64)
+    db.embed(vectors)
+
+    results = db.search_many(vectors[:3], min_score=0.4)
+    capped = db.search_many(vectors[:3], top_k=50, min_score=0.4)
+
+    for query, (_, ids), (_, capped_ids) in zip(vectors[:3], results, capped):
+        expected = expected_hits(vectors, query, 'cosine', 0.4)
+        assert set(ids) == expected
+        assert list(capped_ids) == list(ids)[: len(capped_ids)]
+        assert len(list(capped_ids)) == min(50, len(expected))
+
+
+def test_adaptive_k_stops_at_the_largest_gap() -> None:
+    """Drop the tail of weak hits after a clear cluster of good ones."""
+    vectors = np.array(
+        [[1.0, 0.0], [0.99, 0.1], [0.98, 0.15], [0.0, 1.0], [-0.1, 1.0]],
+        dtype=np.float32,
+    )
+    for db in (FaissDB(metric='cosine'), NumpyDB(metric='cosine')):
+        db.embed(vectors)
+        _, ids = db.search(vectors[0], top_k=5, adaptive=True)
+        assert sorted(ids) == [0, 1, 2]
+
+
+def test_sharded_range_search(vectors: np.ndarray) -> None:
+    """Merge thresholded shard results and cut adaptively once merged."""
+    db = ShardedDB(num_shards=3, factory=lambda: FaissDB(metric='cosine'))
+    db.embed(vectors)
+
+    scores, ids = db.search(vectors[0], min_score=0.4)
+    adaptive_scores, _ = db.search(vectors[0], top_k=10, adaptive=True)
+
+    assert set(ids) == expected_hits(vectors, vectors[0], 'cosine', 0.4)
+    assert np.all(np.diff(np.asarray(scores)) <= 0)
+    assert list(adaptive_scores) == [pytest.approx(1.0)]
+
+
+@pytest.mark.skipif(
+    sys.platform == 'win32',
+    reason='Skipping test on Windows due to file locking issues.',
+)
+def test_chroma_score_threshold(vectors: np.ndarray) -> None:
+    """Cut chroma's ranked results at the score threshold."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        try:
+            client = chromadb.PersistentClient(
+                path=temp_dir, settings=Settings(allow_reset=True)
+            )
+            db = ChromaDB(client=client, metric='cosine')
+            db.add(list(range(100)), vectors[:100])
+            scores, ids = db.search(vectors[0], min_score=0.4)
+        except Exception as exc:
+            skip_if_runtime_unavailable('chroma', exc)
+            raise
+
+    expected = expected_hits(vectors[:100], vectors[0], 'cosine', 0.4)
+    assert {int(id_) for id_ in ids} == expected
+    assert np.all(np.asarray(scores) >= 0.4 - 1e-5)
+
+
+def test_augmented_min_score_and_output_scores(
+    animals_data: list[str],
+) -> None:
+    """Send only relevant chunks onwards, with their scores."""
+    aug = KeywordAug(top_k=5, db=FaissDB(metric='cosine'), min_score=0.3)
+    output = aug.process(Input(query='honey bee', content=animals_data))
+
+    assert 0 < len(output.content) < 5
+    assert 'Honey Bee' in output.content[0]
+    assert len(output.scores) == len(output.content)
+    assert all(score >= 0.3 for score in output.scores)
+    assert aug.logs['scores'] == output.scores
+
+    unfiltered = KeywordAug(top_k=5)
+    assert len(unfiltered.search('honey bee', animals_data)) == 5
@@ -0,0 +1,83 @@
+"""Tests for Rago package: sharded scatter-gather vector database."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from rago import DB
+from rago.augmented.db import FaissDB, NumpyDB, ShardedDB
+
+TOP_K = 5
+
+
+@pytest.fixture
+def vectors() -> np.ndarray:
+    """Return a small random corpus of float32 vectors."""
+    rng = np.random.default_rng(0)
+    return rng.standard_normal((1_000, 16), dtype=np.float32)
+
+
+def test_sharded_matches_a_single_index(vectors: np.ndarray) -> None:
+    """Merge per-shard results into the exact global top-k."""
+    sharded = ShardedDB(num_shards=3)
+    sharded.embed(vectors)
+    single = FaissDB()
+    single.embed(vectors)
+
+    results = sharded.search_many(vectors[:10], TOP_K)
+    expected = single.search_many(vectors[:10], TOP_K)
+
+    assert sorted(sharded._sizes) == [333, 333, 334]
+    for (scores, ids), (expected_scores, expected_ids) in zip(
+        results, expected
+    ):
+        assert list(ids) == list(expected_ids)
+        np.testing.assert_allclose(scores, expected_scores, rtol=1e-5)
+
+
+def test_sharded_add_remove_update(vectors: np.ndarray) -> None:
+    """Route removals and updates to the shard holding each id."""
+    db = ShardedDB(num_shards=2, factory=NumpyDB)
+    db.add([f'chunk-{i}' for i in range(100)], vectors[:100])
+
+    db.remove(['chunk-0'])
+    db.update(['chunk-1'], vectors[:1])
+
+    assert sum(db._sizes) == 99
+    assert list(db.search(vectors[0], top_k=1)[1]) == ['chunk-1']
+    with pytest.raises(ValueError, match='already in the database'):
+        db.add(['chunk-2'], vectors[:1])
+
+
+def test_sharded_add_and_remove_shards(vectors: np.ndarray) -> None:
+    """Fill a new shard first and stop searching a detached one."""
+    db = ShardedDB(num_shards=2)
+    db.add(list(range(100)), vectors[:100])
+
+    shard = db.add_shard()
+    db.add(list(range(100, 150)), vectors[100:150])
+
+    assert db._sizes == [50, 50, 50]
+    assert list(db.search(vectors[120], top_k=1)[1]) == [120]
+
+    db.remove_shard(shard)
+
+    assert 120 not in db.search(vectors[120], top_k=TOP_K)[1]
+    with pytest.raises(ValueError, match='last shard'):
+        for other in list(db.shards):
+            db.remove_shard(other)
+
+
+def test_sharded_filter_and_config(vectors: np.ndarray) -> None:
+    """Forward filters to the shards and build shards from `DB(...)`."""
+    db = DB(backend='sharded', num_shards=4, metric='cosine').db
+    db.embed(vectors, metadata=[{'even': i % 2 == 0} for i in range(1_000)])
+
+    _, ids = db.search(vectors[3], top_k=TOP_K, filter={'even': False})
+
+    assert isinstance(db, ShardedDB)
+    assert len(db.shards) == 4
+    assert all(shard.metric == 'cosine' for shard in db.shards)
+    assert list(ids)[:1] == [3]
+    assert all(id_ % 2 for id_ in ids)
@@ -0,0 +1,182 @@
+"""Tests for Rago package: SQLite-backed vector and chunk store."""
+
+from __future__ import annotations
+
+import sqlite3
+
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pytest
+
+from rago import DB
+from rago.augmented.db import FaissDB, NumpyDB, SQLiteDB
+
+from .models import KeywordAug
+
+
+@pytest.fixture
+def vectors() -> np.ndarray:
+    """Return a small random corpus of float32 vectors."""
+    rng = np.random.default_rng(0)
+    return rng.standard_normal((200, 8), dtype=np.float32)
+
+
+def test_sqlite_persists_across_reopen(
+    tmp_path: Path, vectors: np.ndarray
+) -> None:
+    """Test that a reopened file serves the same results, ids and texts."""
+    path = tmp_path / 'store.sqlite3'
+    texts = [f'chunk {i}' for i in range(len(vectors))]
+    metadata = [{'parity': i % 2} for i in range(len(vectors))]
+    db = SQLiteDB(path, batch_size=64)
+    db.embed(vectors, metadata, texts=texts)
+    db.add(['extra'], vectors[:1] * 2, [{'parity': 0}], texts=['more'])
+    expected = db.search(vectors[3], top_k=5)
+    db.close()
+
+    reopened = SQLiteDB(path)
+    assert reopened.index is None
+    scores, ids = reopened.search(vectors[3], top_k=5)
+    assert list(ids) == list(expected[1])
+    np.testing.assert_allclose(scores, expected[0], rtol=1e-6)
+    assert isinstance(reopened.index, np.ndarray)
+    assert len(reopened) == len(vectors) + 1
+    assert reopened.texts() == [*texts, 'more']
+    assert reopened.get_texts(['extra', 3]) == ['more', 'chunk 3']
+    assert reopened.get_metadata([5]) == [{'parity': 1}]
+
+    _, ids = reopened.search(vectors[3], top_k=4, filter={'parity': 1})
+    assert all(id_ % 2 == 1 for id_ in ids)
+
+
+def test_sqlite_uses_wal(tmp_path: Path, vectors: np.ndarray) -> None:
+    """Test that the file is in WAL mode and readable while open."""
+    path = tmp_path / 'store.sqlite3'
+    db = SQLiteDB(path)
+    db.embed(vectors[:10])
+    with sqlite3.connect(path) as reader:
+        mode = reader.execute('PRAGMA journal_mode').fetchone()[0]
+        count = reader.execute('SELECT COUNT(*) FROM chunks').fetchone()[0]
+    assert mode == 'wal'
+    assert count == 10
+
+
+def test_sqlite_failed_batch_adds_nothing(
+    tmp_path: Path, vectors: np.ndarray
+) -> None:
+    """Test that a batch with a duplicate id is rolled back as a whole."""
+    db = SQLiteDB(tmp_path / 'store.sqlite3', batch_size=4)
+    db.embed(vectors[:10])
+    with pytest.raises(ValueError, match='already in the database'):
+        db.add([*range(100, 108), 0], vectors[10:19])
+    assert len(db) == 10
+    with pytest.raises(KeyError):
+        db.get_metadata([100])
+
+
+def test_sqlite_writes_reach_cached_index(
+    tmp_path: Path, vectors: np.ndarray
+) -> None:
+    """Test that add, update and remove keep the built index current."""
+    db = SQLiteDB(
+        tmp_path / 'store.sqlite3', factory=lambda: NumpyDB(metric='cosine')
+    )
+    db.embed(vectors[:50])
+    db.search(vectors[0])
+
+    db.add([50], vectors[50:51])
+    assert list(db.search(vectors[50], top_k=1)[1]) == [50]
+    db.update([50], vectors[7:8], texts=['moved'])
+    assert set(db.search(vectors[7], top_k=2)[1]) == {7, 50}
+    assert db.get_texts([50]) == ['moved']
+    db.remove([7, 50])
+    assert not {7, 50} & set(db.search(vectors[7], top_k=5)[1])
+    assert len(db) == 49
+
+    scores, _ = db.search(vectors[0], top_k=50, min_score=0.5)
+    assert np.all(np.asarray(scores) >= 0.5)
+
+
+def test_sqlite_from_config(tmp_path: Path, vectors: np.ndarray) -> None:
+    """Test `DB(backend='sqlite')` with a faiss search index."""
+    config = DB(
+        backend='sqlite',
+        path=tmp_path / 'store.sqlite3',
+        index_backend='faiss',
+    )
+    db = config.db
+    assert isinstance(db, SQLiteDB)
+    db.embed(vectors)
+    _, ids = db.search(vectors[9], top_k=1)
+    assert list(ids) == [9]
+    assert isinstance(db._search_db, FaissDB)
+
+
+class RecordingDB(NumpyDB):
+    """NumpyDB recording the rows of each `embed` and `add` call."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls: list[tuple[str, int]] = []
+
+    def embed(self, documents: Any, metadata: Any = None) -> None:
+        """Record the call and embed."""
+        self.calls.append(('embed', len(documents)))
+        super().embed(documents, metadata)
+
+    def add(self, ids: Any, vectors: Any, metadata: Any = None) -> None:
+        """Record the call and add."""
+        self.calls.append(('add', len(ids)))
+        super().add(ids, vectors, metadata)
+
+
+def test_sqlite_builds_the_index_with_one_embed(
+    tmp_path: Path, vectors: np.ndarray
+) -> None:
+    """Test that the index sees every row at once and maps ids back."""
+    path = tmp_path / 'store.sqlite3'
+    db = SQLiteDB(path, batch_size=16)
+    db.add([f'chunk-{i}' for i in range(len(vectors))], vectors)
+    db.close()
+
+    reopened = SQLiteDB(path, factory=RecordingDB, batch_size=16)
+    _, ids = reopened.search(vectors[42], top_k=1)
+    search_db = reopened._search_db
+
+    assert isinstance(search_db, RecordingDB)
+    # NumpyDB.embed adds the rows itself, in one call
+    assert search_db.calls == [('embed', len(vectors)), ('add', len(vectors))]
+    assert list(ids) == ['chunk-42']
+    reopened.update(['chunk-42'], vectors[7:8])
+    assert set(reopened.search(vectors[7], top_k=2)[1]) == {
+        'chunk-7',
+        'chunk-42',
+    }
+
+
+def test_sqlite_texts_follow_ids_after_update(
+    tmp_path: Path, vectors: np.ndarray
+) -> None:
+    """Test that `texts` keeps the order of ids 0..n-1 after updates."""
+    db = SQLiteDB(tmp_path / 'store.sqlite3')
+    db.embed(vectors[:12], texts=[f'chunk {i}' for i in range(12)])
+    db.update([3], vectors[3:4], texts=['changed'])
+
+    texts = db.texts()
+
+    assert texts[3] == 'changed'
+    assert texts[10] == 'chunk 10'
+
+
+def test_augmented_step_stores_texts_in_sqlite(
+    tmp_path: Path, animals_data: list[str]
+) -> None:
+    """Test that indexing through an augmentation step keeps the chunks."""
+    db = SQLiteDB(tmp_path / 'store.sqlite3')
+    aug = KeywordAug(db=db, top_k=1)
+    aug.index(animals_data[:-1])
+    aug.add_documents(animals_data[-1:])
+
+    assert db.texts() == animals_data
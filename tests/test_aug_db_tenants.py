@@ -0,0 +1,166 @@
+"""Tests for Rago package: per-tenant databases with memory accounting."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import faiss
+import numpy as np
+import pytest
+
+from rago.augmented.db import FaissDB, NumpyDB, TenantDB, TenantManager
+from rago.augmented.db.tenants import index_nbytes
+
+DIM = 8
+
+
+def _vectors(seed: int, count: int = 100) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((count, DIM), dtype=np.float32)
+
+
+def _tenant_bytes(count: int = 100) -> int:
+    db = FaissDB()
+    db.embed(_vectors(0, count))
+    return index_nbytes(db)
+
+
+def test_tenants_are_isolated(tmp_path: Path) -> None:
+    """Test that each tenant searches only its own vectors."""
+    manager = TenantManager(tmp_path)
+    acme, globex = manager.get('acme'), manager.get('globex')
+    assert isinstance(acme, TenantDB)
+    acme.add(['a'], _vectors(1, 1))
+    globex.add(['g'], _vectors(1, 1))
+    assert list(acme.search(_vectors(1, 1)[0], top_k=5)[1]) == ['a']
+    assert list(globex.search(_vectors(1, 1)[0], top_k=5)[1]) == ['g']
+    assert manager.tenants == ['acme', 'globex']
+    assert set(manager.loaded()) == {'acme', 'globex'}
+    assert manager.nbytes == sum(manager.loaded().values()) > 0
+
+
+def test_cold_tenants_are_evicted_and_reloaded(tmp_path: Path) -> None:
+    """Test LRU eviction to disk within the budget and lazy reload."""
+    size = _tenant_bytes()
+    manager = TenantManager(
+        tmp_path, memory_budget=int(size * 2.5), tenant_quota=size * 2
+    )
+    for tenant in ('a', 'b', 'c'):
+        manager.get(tenant).embed(_vectors(ord(tenant)))
+    assert list(manager.loaded()) == ['b', 'c']
+    assert manager.nbytes <= manager.memory_budget
+    assert manager.evictions == 1
+
+    vectors = _vectors(ord('a'))
+    _, ids = manager.get('a').search(vectors[5], top_k=1)
+    assert list(ids) == [5]
+    assert manager.loads == 1
+    assert list(manager.loaded()) == ['c', 'a']
+
+    # a new manager finds the tenants saved by the previous one
+    manager.evict_all()
+    restarted = TenantManager(tmp_path)
+    assert restarted.tenants == ['a', 'b', 'c']
+    assert restarted.loaded() == {}
+    _, ids = restarted.get('b').search(_vectors(ord('b'))[3], top_k=1)
+    assert list(ids) == [3]
+
+
+def test_oversized_tenant_is_evicted_first(tmp_path: Path) -> None:
+    """Test that a tenant over its quota does not push out the others."""
+    size = _tenant_bytes()
+    manager = TenantManager(
+        tmp_path, memory_budget=size * 4, tenant_quota=size * 2
+    )
+    manager.get('small-1').embed(_vectors(1))
+    manager.get('small-2').embed(_vectors(2))
+    big = manager.get('big')
+    big.embed(_vectors(3, 300))
+    assert set(manager.loaded()) == {'small-1', 'small-2'}
+
+    # reads of the big tenant load it once and keep the others resident
+    for _ in range(3):
+        assert len(list(big.search(_vectors(3, 1)[0], top_k=2)[1])) == 2
+    assert set(manager.loaded()) == {'small-1', 'small-2', 'big'}
+    assert manager.loads == 1
+
+    # the next use of another tenant evicts it again
+    manager.get('small-1').search(_vectors(1, 1)[0])
+    assert set(manager.loaded()) == {'small-1', 'small-2'}
+
+
+def test_clean_tenants_are_not_saved_again(tmp_path: Path) -> None:
+    """Test that evicting a tenant only read since its load skips saving."""
+    manager = TenantManager(tmp_path)
+    db = manager.get('acme')
+    db.embed(_vectors(1))
+    manager.evict('acme')
+    path = tmp_path / 'acme.tenant'
+    mtime = path.stat().st_mtime_ns
+
+    db.search(_vectors(1, 1)[0])
+    manager.evict('acme')
+    assert path.stat().st_mtime_ns == mtime
+
+    db.add([500], _vectors(2, 1))
+    manager.evict('acme')
+    assert path.stat().st_mtime_ns != mtime
+
+
+def test_drop_tenant(tmp_path: Path) -> None:
+    """Test that dropping a tenant deletes its saved files."""
+    manager = TenantManager(tmp_path)
+    manager.get('a/b').embed(_vectors(0))
+    manager.evict('a/b')
+    assert manager.tenants == ['a/b']
+    assert list(tmp_path.iterdir())
+    manager.drop('a/b')
+    assert manager.tenants == []
+    assert not list(tmp_path.iterdir())
+    assert manager.get('a/b').index is None
+
+
+def test_negative_budget(tmp_path: Path) -> None:
+    """Test that a negative memory budget is rejected."""
+    with pytest.raises(ValueError, match='memory_budget'):
+        TenantManager(tmp_path, memory_budget=-1)
+
+
+def test_nbytes_is_estimated_without_copying(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that measuring a tenant never serializes its index."""
+
+    def serialize_index(index: object) -> None:
+        raise AssertionError('index_nbytes must not serialize the index')
+
+    monkeypatch.setattr(faiss, 'serialize_index', serialize_index)
+    for index_factory in ('Flat', 'HNSW16'):
+        db = FaissDB(index_factory=index_factory)
+        db.embed(_vectors(0, 200))
+        assert index_nbytes(db) >= 200 * DIM * 4
+
+
+def test_metadata_counts_towards_the_quota(tmp_path: Path) -> None:
+    """Test that a tenant with large metadata is evicted first."""
+    size = _tenant_bytes()
+    manager = TenantManager(
+        tmp_path, memory_budget=int(size * 3.5), tenant_quota=size * 2
+    )
+    manager.get('plain').embed(_vectors(1))
+    manager.get('light').embed(_vectors(2), [{'page': 1}] * 100)
+    # the same vectors, but their metadata takes the tenant over budget
+    manager.get('heavy').embed(_vectors(3), [{'text': 'x' * 1_000}] * 100)
+
+    assert set(manager.loaded()) == {'plain', 'light'}
+    assert manager.loaded()['light'] > size
+    assert manager.tenants == ['heavy', 'light', 'plain']
+
+
+def test_numpy_nbytes_counts_the_whole_buffer() -> None:
+    """Test that a NumPy index counts its spare capacity too."""
+    db = NumpyDB()
+    db.add(list(range(5)), _vectors(0, 5))
+
+    assert db.index.base is not None
+    assert index_nbytes(db) >= db.index.base.nbytes > db.index.nbytes
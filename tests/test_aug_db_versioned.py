@@ -0,0 +1,198 @@
+"""Tests for Rago package: versioned vector database with hot swaps."""
+
+from __future__ import annotations
+
+import gc
+import threading
+import weakref
+
+from typing import Any, Optional, Sequence
+
+import numpy as np
+import pytest
+
+from rago import DB
+from rago.augmented.db import FaissDB, NumpyDB, VersionedDB
+
+from .models import KeywordAug
+
+
+@pytest.fixture
+def vectors() -> np.ndarray:
+    """Return a small random corpus of float32 vectors."""
+    rng = np.random.default_rng(0)
+    return rng.standard_normal((1_000, 16), dtype=np.float32)
+
+
+class SlowDB(FaissDB):
+    """FaissDB whose `embed` waits until the test releases it."""
+
+    started = threading.Event()
+    release = threading.Event()
+
+    def embed(
+        self,
+        documents: Any,
+        metadata: Optional[Sequence[dict[str, Any]]] = None,
+    ) -> None:
+        """Block the build until `release` is set."""
+        SlowDB.started.set()
+        assert SlowDB.release.wait(10)
+        super().embed(documents, metadata)
+
+
+def test_searches_continue_during_a_background_rebuild(
+    vectors: np.ndarray,
+) -> None:
+    """Serve the old snapshot until the new one is swapped in."""
+    SlowDB.started.clear()
+    SlowDB.release.clear()
+    db = VersionedDB(factory=SlowDB, db=FaissDB())
+    db.current.embed(vectors[:500])
+
+    future = db.rebuild(vectors[500:], background=True)
+    assert future is not None
+    assert SlowDB.started.wait(10)
+
+    # the old snapshot answers while the new one is being built
+    _, ids = db.search(vectors[3], top_k=1)
+    db.add(['late'], vectors[3:4] + 1e-3)
+    assert list(ids) == [3]
+    assert db.version == 0
+
+    SlowDB.release.set()
+    assert future.result(timeout=10) == 1
+
+    _, ids = db.search(vectors[503], top_k=1)
+    _, late = db.search(vectors[3], top_k=1)
+    assert list(ids) == [3]
+    assert list(late) == ['late']
+    assert db.current.index.ntotal == 501
+
+
+def test_concurrent_readers_never_see_a_partial_index(
+    vectors: np.ndarray,
+) -> None:
+    """Every search returns a complete result from one of the snapshots."""
+    db = VersionedDB(factory=lambda: NumpyDB(block_size=64))
+    db.embed(vectors)
+    errors: list[BaseException] = []
+    stop = threading.Event()
+
+    def reader() -> None:
+        while not stop.is_set():
+            try:
+                _, ids = db.search(vectors[7], top_k=5)
+                assert len(list(ids)) == 5
+            except BaseException as exc:
+                errors.append(exc)
+                return
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for _ in range(5):
+        db.rebuild(vectors[::-1], background=True).result(timeout=30)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert db.version == 6
+
+
+def test_replaced_snapshot_is_freed(vectors: np.ndarray) -> None:
+    """Drop the old snapshot once nothing reads it anymore."""
+    db = DB(backend='versioned', snapshot_backend='numpy').db
+    db.embed(vectors)
+    old = weakref.ref(db.current)
+
+    db.embed(vectors[:10])
+    gc.collect()
+
+    assert isinstance(db, VersionedDB)
+    assert isinstance(db.current, NumpyDB)
+    assert old() is None
+    assert db.index.shape == (10, 16)
+
+
+def test_replay_remaps_colliding_ids(vectors: np.ndarray) -> None:
+    """Give writes made during a rebuild ids past the rebuilt ones."""
+    SlowDB.started.clear()
+    SlowDB.release.clear()
+    db = VersionedDB(factory=SlowDB, db=FaissDB())
+    db.current.embed(vectors[:100])
+
+    with db:
+        future = db.rebuild(vectors[100:400], background=True)
+        assert future is not None
+        assert SlowDB.started.wait(10)
+        # 150 is free in the served snapshot but not in the rebuilt one
+        db.add([150, 'x'], vectors[800:802])
+        db.remove([3, 'x'])
+        db.update([150], vectors[900:901])
+        SlowDB.release.set()
+        future.result(timeout=10)
+
+    assert db.remapped == {150: 300}
+    _, ids = db.search(vectors[900], top_k=1)
+    _, kept = db.search(vectors[103], top_k=1)
+    _, removed = db.search(vectors[801], top_k=5)
+    assert list(ids) == [300]
+    assert list(kept) == [3]
+    assert 'x' not in list(removed)
+    assert db._pool is None
+
+
+def test_updates_during_a_rebuild_are_applied_in_place(
+    vectors: np.ndarray,
+) -> None:
+    """Update a vector added during a rebuild without duplicating it."""
+    SlowDB.started.clear()
+    SlowDB.release.clear()
+    db = VersionedDB(factory=SlowDB, db=FaissDB())
+    db.current.embed(vectors[:100])
+
+    with db:
+        future = db.rebuild(vectors[100:400], background=True)
+        assert future is not None
+        assert SlowDB.started.wait(10)
+        db.add([150], vectors[800:801])
+        db.update([150, 2], vectors[900:902])
+        SlowDB.release.set()
+        future.result(timeout=10)
+
+    assert db.remapped == {150: 300}
+    assert db.index.ntotal - len(db.current._deleted) == 301
+    _, updated = db.search(vectors[900], top_k=5)
+    _, kept = db.search(vectors[102], top_k=1)
+    _, stale = db.search(vectors[800], top_k=5)
+    assert list(updated)[:1] == [300]
+    assert list(updated).count(300) == 1
+    assert list(kept) == [2]
+    assert 300 not in list(stale)
+
+
+def test_snapshot_publishes_the_corpus(vectors: np.ndarray) -> None:
+    """Swap a corpus in together with its snapshot."""
+    db = VersionedDB(factory=NumpyDB)
+    db.rebuild(vectors[:3], corpus=['a', 'b', 'c'])
+
+    version, current, corpus = db.snapshot
+
+    assert version == 1
+    assert current is db.current
+    assert corpus == ['a', 'b', 'c']
+
+
+def test_augmented_step_searches_a_versioned_snapshot(
+    animals_data: list[str],
+) -> None:
+    """Resolve hits against the documents published with the snapshot."""
+    db = VersionedDB(factory=NumpyDB)
+    aug = KeywordAug(db=db, top_k=1)
+
+    aug.index(animals_data)
+
+    assert db.snapshot[2] == animals_data
+    assert 'Honey Bee' in aug.search('honey bee', animals_data)[0]
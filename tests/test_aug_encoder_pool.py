@@ -0,0 +1,72 @@
+"""Tests for Rago package: multi-process encoder pool."""
+
+from __future__ import annotations
+
+import os
+
+from typing import Any
+
+import numpy as np
+import pytest
+
+from rago.augmented.encoder_pool import EncoderPool
+
+
+class LengthModel:
+    """Encoder embedding a text as its length and worker pid."""
+
+    def encode(
+        self, texts: list[str], batch_size: int, convert_to_numpy: bool
+    ) -> Any:
+        """Return `[len(text), pid, threads]` per text."""
+        import torch
+
+        return np.array(
+            [
+                [len(text), os.getpid(), torch.get_num_threads()]
+                for text in texts
+            ],
+            dtype=np.float64,
+        )
+
+
+def test_pool_encodes_in_order() -> None:
+    """Test that chunks from several workers come back in input order."""
+    texts = ['x' * length for length in range(100)]
+    with EncoderPool(
+        LengthModel(), workers=2, batch_size=4, threads_per_worker=1
+    ) as pool:
+        result = pool.encode(texts)
+        assert pool.chunk_size == 16
+        assert pool.encode([]).shape[0] == 0
+    assert result.dtype == np.float32
+    assert result.flags.c_contiguous
+    np.testing.assert_array_equal(result[:, 0], np.arange(100))
+    assert os.getpid() not in set(result[:, 1].tolist())
+    assert set(result[:, 2].tolist()) == {1}
+
+
+@pytest.mark.skipif(not hasattr(os, 'sched_setaffinity'), reason='Linux only')
+def test_pool_pins_workers() -> None:
+    """Test that pinned workers still encode every text."""
+    with EncoderPool(
+        LengthModel(), workers=2, batch_size=2, pin_threads=True
+    ) as pool:
+        result = pool.encode(['a', 'bb', 'ccc', 'dddd', 'eeeee'])
+    np.testing.assert_array_equal(result[:, 0], [1, 2, 3, 4, 5])
+
+
+def test_pool_starts_workers_eagerly() -> None:
+    """Test that every worker is started when the pool is created."""
+    with EncoderPool(LengthModel(), workers=2, batch_size=2) as pool:
+        processes = pool._executor._processes
+        assert len(processes) == 2
+        pids = set(processes)
+        pool.encode(['a', 'bb', 'ccc'])
+        assert set(processes) == pids
+
+
+def test_pool_rejects_bad_sizes() -> None:
+    """Test that non-positive sizes are rejected."""
+    with pytest.raises(ValueError, match='positive'):
+        EncoderPool(LengthModel(), workers=1, batch_size=0)
@@ -0,0 +1,86 @@
+"""Tests for the indexed-corpus lifecycle of augmentation steps."""
+
+from __future__ import annotations
+
+from rago.augmented.db import FaissDB
+from rago.base import Pipeline
+from rago.io import Output
+
+from .models import KeywordAug
+
+
+def test_search_reuses_index_for_the_same_corpus(
+    animals_data: list[str],
+) -> None:
+    """Embed the corpus once and only the query afterwards."""
+    aug = KeywordAug(top_k=1)
+
+    first = aug.search('peregrine falcon', animals_data)
+    second = aug.search('honey bee', animals_data)
+
+    assert 'Peregrine Falcon' in first[0]
+    assert 'Honey Bee' in second[0]
+    assert aug.embedded[0] == animals_data
+    assert all(len(batch) == 1 for batch in aug.embedded[1:])
+
+
+def test_search_reindexes_when_the_corpus_changes(
+    animals_data: list[str],
+) -> None:
+    """Rebuild the index when the incoming content has a new fingerprint."""
+    aug = KeywordAug(top_k=1)
+    aug.index(animals_data)
+
+    assert aug.is_indexed(animals_data)
+    assert not aug.is_indexed(animals_data[:3])
+
+    result = aug.search('peregrine falcon', animals_data[:3])
+
+    assert 'Peregrine Falcon' in result[0]
+    assert aug.embedded[-2] == animals_data[:3]
+
+
+def test_add_documents_only_embeds_new_chunks(
+    animals_data: list[str],
+) -> None:
+    """Append new documents without re-embedding the indexed ones."""
+    aug = KeywordAug(db=FaissDB(), top_k=1)
+    aug.index(animals_data[:5])
+    aug.add_documents(animals_data[5:])
+
+    assert aug.embedded == [animals_data[:5], animals_data[5:]]
+    assert aug.is_indexed(animals_data)
+
+    result = aug.search('honey bee', animals_data)
+
+    assert 'Honey Bee' in result[0]
+    assert len(aug.embedded) == 3
+
+
+def test_process_searches_the_indexed_corpus(
+    animals_data: list[str],
+) -> None:
+    """Search the pre-built index when the pipeline carries no content."""
+    aug = KeywordAug(top_k=1)
+    aug.index(animals_data)
+
+    output = (Pipeline() | aug).run('peregrine falcon')
+
+    assert isinstance(output, Output)
+    assert 'Peregrine Falcon' in output.content[0]
+    assert len(aug.embedded) == 2
+
+
+def test_search_many_embeds_all_queries_at_once(
+    animals_data: list[str],
+) -> None:
+    """Embed every query in one batch and return results in query order."""
+    aug = KeywordAug(top_k=1)
+    aug.index(animals_data)
+
+    results = aug.search_many(['honey bee', 'peregrine falcon'])
+
+    assert 'Honey Bee' in results[0][0]
+    assert 'Peregrine Falcon' in results[1][0]
+    assert aug.embedded[1:] == [['honey bee', 'peregrine falcon']]
+    assert results[0] == aug.search('honey bee', animals_data)
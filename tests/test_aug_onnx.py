@@ -0,0 +1,57 @@
+"""Tests for Rago package: ONNX Runtime sentence-transformer embeddings."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from rago.augmented import Augmented
+from rago.augmented.sentence_transformer import SentenceTransformerAug
+
+
+def test_unknown_runtime_is_rejected() -> None:
+    """Test that only the supported runtimes are accepted."""
+    with pytest.raises(ValueError, match='Unsupported runtime'):
+        SentenceTransformerAug(runtime='tensorrt')
+    with pytest.raises(ValueError, match="requires runtime='onnx'"):
+        SentenceTransformerAug(quantize=True)
+
+
+def test_runtime_reaches_the_backend() -> None:
+    """Test that `Augmented(runtime=...)` configures the backend."""
+    aug = Augmented(backend='sentence_transformers', runtime='tensorrt')
+    with pytest.raises(ValueError, match='Unsupported runtime'):
+        aug._resolve()
+
+
+@pytest.mark.skip_on_ci
+@pytest.mark.parametrize('quantize', [False, True])
+def test_onnx_matches_torch(
+    tmp_path: Path, animals_data: list[str], quantize: bool
+) -> None:
+    """Test that ONNX embeddings stay close to the PyTorch ones."""
+    pytest.importorskip('optimum.onnxruntime')
+    torch_vectors = np.asarray(
+        SentenceTransformerAug().get_embedding(animals_data)
+    )
+    aug = SentenceTransformerAug(
+        runtime='onnx', quantize=quantize, onnx_cache_dir=tmp_path
+    )
+    onnx_vectors = np.asarray(aug.get_embedding(animals_data))
+    assert list(tmp_path.glob('**/*.onnx'))
+
+    cosine = np.sum(torch_vectors * onnx_vectors, axis=1) / (
+        np.linalg.norm(torch_vectors, axis=1)
+        * np.linalg.norm(onnx_vectors, axis=1)
+    )
+    assert cosine.min() > (0.97 if quantize else 0.9999)
+
+    # the cached export is reused
+    reloaded = SentenceTransformerAug(
+        runtime='onnx', quantize=quantize, onnx_cache_dir=tmp_path
+    )
+    np.testing.assert_allclose(
+        reloaded.get_embedding(animals_data), onnx_vectors, atol=1e-5
+    )
@@ -0,0 +1,59 @@
+"""Tests for Rago package: batched spaCy embeddings."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+spacy = pytest.importorskip('spacy')
+
+from rago.augmented.spacy import SpaCyAug  # noqa: E402
+
+WORDS = {'cat': 0, 'dog': 1, 'fish': 2, 'bird': 3}
+
+
+@pytest.fixture
+def model_path(tmp_path: Path) -> str:
+    """Save a small English pipeline with static vectors and a parser."""
+    nlp = spacy.blank('en')
+    for word, position in WORDS.items():
+        nlp.vocab.set_vector(word, np.eye(4, dtype=np.float32)[position])
+    nlp.add_pipe('sentencizer')
+    nlp.to_disk(tmp_path)
+    return str(tmp_path)
+
+
+def test_spacy_pipe_embeddings(model_path: str) -> None:
+    """Test that batched embeddings match the per-document vectors."""
+    aug = SpaCyAug(model_name=model_path, batch_size=2)
+    texts = ['cat dog', 'fish', 'bird bird cat', 'dog']
+    assert aug.model.pipe_names == []
+
+    result = aug.get_embedding(texts)
+    assert result.dtype == np.float32
+    assert result.shape == (4, 4)
+    expected = np.stack([aug.model(text).vector for text in texts])
+    np.testing.assert_allclose(result, expected)
+
+    with pytest.raises(ValueError, match='no valid word vectors'):
+        aug.get_embedding(['cat', 'unknown'])
+
+
+def test_spacy_single_batch_stays_in_process(
+    model_path: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that workers are only used for more than one batch."""
+    aug = SpaCyAug(model_name=model_path, batch_size=2, n_process=2)
+    calls: list[int] = []
+    pipe = aug.model.pipe
+
+    def spy(texts: list[str], **kwargs: int) -> object:
+        calls.append(kwargs['n_process'])
+        return pipe(texts, batch_size=kwargs['batch_size'])
+
+    monkeypatch.setattr(aug.model, 'pipe', spy)
+    aug.get_embedding(['cat', 'dog'])
+    aug.get_embedding(['cat', 'dog', 'fish'])
+    assert calls == [1, 2]
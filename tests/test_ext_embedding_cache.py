@@ -0,0 +1,70 @@
+"""Tests for the per-chunk embedding cache."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+
+from rago.extensions.embedding_cache import EmbeddingCacheFile
+
+
+class CountingEncoder:
+    """Deterministic encoder that records which texts it embedded."""
+
+    def __init__(self) -> None:
+        self.calls: list[list[str]] = []
+
+    def __call__(self, content: list[str]) -> np.ndarray:
+        """Embed texts by length and first character."""
+        self.calls.append(list(content))
+        return np.array(
+            [[len(text), ord(text[0])] for text in content], dtype=np.float32
+        )
+
+
+def test_embedding_cache_only_encodes_unseen_chunks(tmp_path: Path) -> None:
+    """Send only new chunks to the encoder and keep the input order."""
+    cache = EmbeddingCacheFile(tmp_path)
+    encoder = CountingEncoder()
+
+    first = cache.get_or_embed('model', ['aa', 'b', 'aa'], encoder)
+    second = cache.get_or_embed('model', ['ccc', 'b', 'aa'], encoder)
+
+    assert encoder.calls == [['aa', 'b'], ['ccc']]
+    np.testing.assert_array_equal(first, [[2, 97], [1, 98], [2, 97]])
+    np.testing.assert_array_equal(second, [[3, 99], [1, 98], [2, 97]])
+    assert second.dtype == np.float32
+
+
+def test_embedding_cache_persists_and_isolates_namespaces(
+    tmp_path: Path,
+) -> None:
+    """Reload vectors from disk and never mix vectors across models."""
+    encoder = CountingEncoder()
+    EmbeddingCacheFile(tmp_path).get_or_embed('model', ['aa', 'b'], encoder)
+
+    reloaded = EmbeddingCacheFile(tmp_path)
+    result = reloaded.get_or_embed('model', ['b', 'aa'], encoder)
+    reloaded.get_or_embed('other-model', ['b'], encoder)
+
+    np.testing.assert_array_equal(result, [[1, 98], [2, 97]])
+    assert encoder.calls == [['aa', 'b'], ['b']]
+
+
+def test_embedding_cache_shared_by_two_instances(tmp_path: Path) -> None:
+    """Rows appended by another instance never shift this one's rows."""
+    encoder = CountingEncoder()
+    first = EmbeddingCacheFile(tmp_path)
+    second = EmbeddingCacheFile(tmp_path)
+    second.get_or_embed('model', ['b'], encoder)
+
+    first.get_or_embed('model', ['x'], encoder)
+    second.get_or_embed('model', ['yyy'], encoder)
+    result = second.get_or_embed('model', ['yyy', 'x', 'b'], encoder)
+
+    np.testing.assert_array_equal(result, [[3, 121], [1, 120], [1, 98]])
+    reloaded = EmbeddingCacheFile(tmp_path).get_or_embed(
+        'model', ['x', 'yyy', 'b'], encoder
+    )
+    np.testing.assert_array_equal(reloaded, [[1, 120], [3, 121], [1, 98]])
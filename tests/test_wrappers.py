@@ -0,0 +1,118 @@
+"""Tests for backend reuse in the declarative step wrappers."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+from rago.augmented import Augmented
+from rago.augmented.base import AugmentedBase, EmbeddingType
+from rago.generation import Generation
+from rago.generation.base import GenerationBase
+from rago.retrieval import Retrieval
+
+
+class CountingGeneration(GenerationBase):
+    """Generator that counts how many times it was built."""
+
+    default_model_name = 'dummy'
+    instances = 0
+
+    def _load_optional_modules(self) -> None:
+        """Avoid loading optional runtime dependencies in tests."""
+
+    def _setup(self) -> None:
+        """Count backend construction."""
+        CountingGeneration.instances += 1
+
+    def generate(self, query: str, data: list[str]) -> str:
+        """Return the configured temperature for assertions."""
+        del query, data
+        return str(self.temperature)
+
+
+class CountingAug(AugmentedBase):
+    """Augmenter with a deterministic embedding that counts builds."""
+
+    default_model_name = 'dummy'
+    instances = 0
+
+    def _setup(self) -> None:
+        """Count backend construction."""
+        CountingAug.instances += 1
+        self.model = object()
+
+    def get_embedding(self, content: list[str]) -> EmbeddingType:
+        """Embed texts by their length."""
+        return np.array([[len(text), 1.0] for text in content], 'float32')
+
+    def search(self, query: str, documents: Any, top_k: int = 0) -> list[str]:
+        """Return the documents closest in length to the query."""
+        self.db.embed(self.get_embedding(documents))
+        _, indices = self.db.search(self.get_embedding([query]), top_k)
+        return self._resolve_retrieved_docs(documents, indices)
+
+
+def test_generation_wrapper_reuses_backend(monkeypatch: Any) -> None:
+    """Build the generator once and rebuild only on config changes."""
+    monkeypatch.setattr('rago.generation.llama.OllamaGen', CountingGeneration)
+    CountingGeneration.instances = 0
+
+    generator = Generation(backend='ollama', temperature=0.1)
+    for _ in range(3):
+        assert generator.generate('question', ['context']) == '0.1'
+    assert CountingGeneration.instances == 1
+
+    generator(temperature=0.1)
+    generator.generate('question', ['context'])
+    assert CountingGeneration.instances == 1
+
+    generator(temperature=0.2)
+    assert generator.generate('question', ['context']) == '0.2'
+    assert CountingGeneration.instances == 2
+
+
+def test_augmented_wrapper_reuses_backend(monkeypatch: Any) -> None:
+    """Reuse the augmenter across searches until the config changes."""
+    monkeypatch.setattr(
+        'rago.augmented.sentence_transformer.SentenceTransformerAug',
+        CountingAug,
+    )
+    CountingAug.instances = 0
+    documents = ['a', 'bbbb', 'cccccccc']
+
+    aug = Augmented(backend='sentence_transformers', top_k=1)
+    for _ in range(3):
+        assert aug.search('bbb', documents, top_k=1) == ['bbbb']
+    assert CountingAug.instances == 1
+
+    aug(top_k=2)
+    aug.search('bbb', documents, top_k=1)
+    assert CountingAug.instances == 2
+
+
+def test_generation_wrapper_rebuilds_on_nested_changes(
+    monkeypatch: Any,
+) -> None:
+    """Rebuild when a nested parameter changed in place is applied again."""
+    monkeypatch.setattr('rago.generation.llama.OllamaGen', CountingGeneration)
+    CountingGeneration.instances = 0
+    api_params = {'options': {'seed': 1}}
+
+    generator = Generation(backend='ollama', api_params=api_params)
+    generator.generate('question', ['context'])
+    api_params['options']['seed'] = 2
+    generator(api_params=api_params)
+    generator.generate('question', ['context'])
+
+    assert CountingGeneration.instances == 2
+
+
+def test_retrieval_wrapper_rebuilds_on_new_source() -> None:
+    """Rebuild the retriever only when the call-time source changes."""
+    ret = Retrieval(backend='string')
+
+    first = ret._resolve(source=['a'])
+    assert ret._resolve(source=['a']) is first
+    assert ret._resolve(source=['b']) is not first